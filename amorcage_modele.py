@@ -0,0 +1,122 @@
+# --- IMPORTS DES LIBRAIRIES ---
+import os                         # Pour le fichier verrou et les fichiers du modèle
+import sys                        # Pour relancer le même interpréteur
+import time                       # Pour l'âge du verrou
+import subprocess                 # Pour entraîner hors du processus de l'application
+import threading                  # Pour attendre l'entraînement sans bloquer l'application
+
+# Fichiers produits par `text_sentiment.py`, le rapport en dernier
+FICHIERS_MODELE = ('sentiment_model.joblib', 'tfidf_vectorizer.joblib', 'classification_report.joblib')
+# Verrou posé pendant un entraînement, commun à tous les processus de la machine
+FICHIER_VERROU = 'modele_sentiment.lock'
+# Le verrou est rafraîchi pendant l'entraînement ; sans rafraîchissement
+# depuis ce délai (en secondes), l'entraîneur est considéré comme arrêté
+INTERVALLE_VERROU = 10
+DELAI_VERROU_ABANDONNE = 60
+
+
+class AmorcageModele:
+    """
+    Entraînement du modèle de sentiment en arrière-plan, une fois par machine.
+
+    Les fichiers du modèle sont produits par `text_sentiment.py` dans un
+    sous-processus, attendu par un fil d'exécution : l'application reste
+    utilisable pendant l'entraînement. Un fichier verrou créé de façon exclusive
+    (O_CREAT | O_EXCL) garantit qu'un seul entraînement tourne, quels que soient
+    le nombre de sessions et de processus de l'application. Le verrou est
+    rafraîchi pendant l'entraînement ; un verrou qui ne l'est plus (entraîneur
+    arrêté) est repris.
+    """
+
+    PRET = 'pret'
+    EN_COURS = 'en_cours'
+    ECHEC = 'echec'
+
+    def __init__(self, dossier='.', script='text_sentiment.py'):
+        self.dossier = dossier
+        self.script = script
+        self.verrou = os.path.join(dossier, FICHIER_VERROU)
+        self.erreur = None
+        self._fil = None
+        self._acces = threading.Lock()
+
+    def pret(self):
+        """Vrai si les fichiers du modèle sont tous présents."""
+        return all(os.path.exists(os.path.join(self.dossier, nom)) for nom in FICHIERS_MODELE)
+
+    @property
+    def etat(self):
+        """
+        État du modèle : `PRET`, `EN_COURS` ou `ECHEC` (voir `erreur`). Tant que
+        le modèle manque, relance l'entraînement si aucun ne tourne sur la machine.
+        """
+        if self.pret():
+            return self.PRET
+        if self.erreur is not None:
+            return self.ECHEC
+        self.demarrer()
+        return self.EN_COURS
+
+    def demarrer(self):
+        """Lance l'entraînement en arrière-plan si le modèle manque et qu'aucun entraînement ne tourne."""
+        with self._acces:
+            if self.pret() or (self._fil is not None and self._fil.is_alive()):
+                return
+            if not self._prendre_verrou():
+                return
+            self.erreur = None
+            self._fil = threading.Thread(target=self._entrainer, daemon=True)
+            self._fil.start()
+
+    def relancer(self):
+        """Oublie l'échec du dernier entraînement et en relance un."""
+        self.erreur = None
+        self.demarrer()
+
+    def _prendre_verrou(self):
+        try:
+            descripteur = os.open(self.verrou, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                abandonne = time.time() - os.path.getmtime(self.verrou) > DELAI_VERROU_ABANDONNE
+            except FileNotFoundError:
+                abandonne = True
+            if not abandonne:
+                return False
+            try:
+                os.remove(self.verrou)
+            except FileNotFoundError:
+                pass
+            try:
+                descripteur = os.open(self.verrou, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                return False
+        with os.fdopen(descripteur, 'w') as fichier:
+            fichier.write(str(os.getpid()))
+        return True
+
+    def _entrainer(self):
+        try:
+            processus = subprocess.Popen([sys.executable, self.script], cwd=self.dossier,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            # Sortie d'erreur lue à part pour que le sous-processus ne bloque pas sur un tampon plein
+            erreurs = []
+            lecteur = threading.Thread(target=lambda: erreurs.append(processus.stderr.read()), daemon=True)
+            lecteur.start()
+            while True:
+                try:
+                    processus.wait(timeout=INTERVALLE_VERROU)
+                    break
+                except subprocess.TimeoutExpired:
+                    os.utime(self.verrou)
+            lecteur.join()
+            if processus.returncode != 0 or not self.pret():
+                lignes = ''.join(erreurs).strip().splitlines()
+                self.erreur = lignes[-1] if lignes else f"code de sortie {processus.returncode}"
+        except OSError as exception:
+            self.erreur = str(exception)
+        finally:
+            try:
+                os.remove(self.verrou)
+            except FileNotFoundError:
+                pass
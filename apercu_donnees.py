@@ -0,0 +1,137 @@
+# --- IMPORTS DES LIBRAIRIES ---
+import os                         # Pour tester la présence des fichiers
+import json                       # Pour le fichier de résumé des jeux
+import numpy as np                # Pour les positions des pages
+import pandas as pd               # Pour manipuler les tableaux
+import pyarrow as pa              # Pour assembler les morceaux d'une page
+
+from stockage import chemin_parquet, typer_colonnes, fragments_parquet
+
+
+# --- RÉSUMÉ DES JEUX DE DONNÉES ---
+def resume_donnees(df):
+    """
+    Résumé d'un jeu au format long, affiché par app.py sans charger le jeu.
+
+    Args:
+        df (DataFrame): Jeu avec 'Date' et 'Ticker'.
+
+    Returns:
+        dict: 'lignes', 'colonnes', 'tickers' (liste triée), 'debut' et 'fin'
+            (dates ISO, None si le jeu est vide).
+    """
+    dates = pd.to_datetime(df['Date'])
+    return {'lignes': int(len(df)),
+            'colonnes': [str(col) for col in df.columns],
+            'tickers': sorted(str(t) for t in df['Ticker'].dropna().unique()),
+            'debut': dates.min().date().isoformat() if len(df) else None,
+            'fin': dates.max().date().isoformat() if len(df) else None}
+
+
+def fusionner_resumes(*resumes):
+    """Résumé de la réunion de jeux résumés séparément (colonnes du premier résumé)."""
+    debuts = [r['debut'] for r in resumes if r['debut'] is not None]
+    fins = [r['fin'] for r in resumes if r['fin'] is not None]
+    return {'lignes': sum(r['lignes'] for r in resumes),
+            'colonnes': resumes[0]['colonnes'],
+            'tickers': sorted({t for r in resumes for t in r['tickers']}),
+            'debut': min(debuts) if debuts else None,
+            'fin': max(fins) if fins else None}
+
+
+def ecrire_resumes(chemin, resumes):
+    """Écrit les résumés des jeux ({nom du jeu: résumé}) en JSON."""
+    with open(chemin, 'w', encoding='utf-8') as fichier:
+        json.dump(resumes, fichier, ensure_ascii=False, indent=1)
+
+
+def lire_resumes(chemin):
+    """Lit les résumés écrits par `ecrire_resumes`."""
+    with open(chemin, encoding='utf-8') as fichier:
+        return json.load(fichier)
+
+
+# --- LECTURE PAR PAGES ---
+class JeuPagine:
+    """
+    Accès page par page à un jeu du pipeline, éventuellement restreint à
+    quelques tickers, sans le charger en entier.
+
+    Version Parquet : le nombre de lignes de chaque fichier est lu dans ses
+    métadonnées, une page n'ouvre que les fichiers qui la recouvrent. Version
+    CSV : les lignes sont comptées (et les lignes des tickers demandés repérées)
+    une fois, une page n'analyse que le CSV jusqu'à sa dernière ligne.
+
+    Les lignes sont dans l'ordre ticker puis date (ordre du fichier pour le CSV).
+    """
+
+    def __init__(self, chemin_csv, tickers=None):
+        self.chemin_csv = chemin_csv
+        self.tickers = None if tickers is None else [str(t) for t in tickers]
+        chemin = chemin_parquet(chemin_csv)
+        self._parquet = os.path.isdir(chemin)
+
+        if self._parquet:
+            self._schema, self._fragments = fragments_parquet(chemin, self.tickers)
+            self._debuts = np.cumsum([0] + [f.metadata.num_rows for f in self._fragments])
+            self.lignes = int(self._debuts[-1])
+            self._ordre = self._ordre_colonnes()
+        elif self.tickers is None:
+            self._positions = None
+            with open(chemin_csv, 'rb') as fichier:
+                self.lignes = sum(1 for _ in fichier) - 1
+        else:
+            colonne = pd.concat(pd.read_csv(chemin_csv, usecols=['Ticker'], chunksize=1_000_000))['Ticker']
+            self._positions = np.flatnonzero(colonne.astype(str).isin(self.tickers).to_numpy())
+            self.lignes = len(self._positions)
+
+    def nombre_pages(self, taille):
+        return max(1, -(-self.lignes // taille))
+
+    def page(self, numero, taille):
+        """
+        Lignes de la page `numero` (à partir de 0) de `taille` lignes.
+
+        Returns:
+            DataFrame: Lignes typées de la page (vide au-delà de la dernière).
+        """
+        debut, fin = numero * taille, min((numero + 1) * taille, self.lignes)
+        if debut >= fin:
+            return self._lire_parquet(0, 0) if self._parquet else self._lire_csv(0, 0)
+        if self._parquet:
+            return self._lire_parquet(debut, fin)
+        if self._positions is None:
+            return self._lire_csv(debut, fin)
+        positions = self._positions[debut:fin]
+        bloc = self._lire_csv(positions[0], positions[-1] + 1)
+        return bloc.iloc[positions - positions[0]].reset_index(drop=True)
+
+    def _ordre_colonnes(self):
+        """
+        Ordre des colonnes du jeu écrit (celui du CSV), lu dans les métadonnées
+        pandas d'un fichier : les colonnes de partition (Ticker, Année) n'y sont
+        pas à leur place dans le schéma du jeu Parquet. None si absent.
+        """
+        if not self._fragments:
+            return None
+        metadonnees = self._fragments[0].physical_schema.metadata or {}
+        if b'pandas' not in metadonnees:
+            return None
+        return [c['name'] for c in json.loads(metadonnees[b'pandas'])['columns'] if c['name'] is not None]
+
+    def _lire_parquet(self, debut, fin):
+        morceaux = []
+        for i in range(max(self._debuts.searchsorted(debut, side='right') - 1, 0), len(self._fragments)):
+            if self._debuts[i] >= fin:
+                break
+            table = self._fragments[i].to_table(schema=self._schema)
+            depart = max(debut - self._debuts[i], 0)
+            morceaux.append(table.slice(depart, min(fin, self._debuts[i + 1]) - self._debuts[i] - depart))
+        table = pa.concat_tables(morceaux) if morceaux else self._schema.empty_table()
+        df = table.to_pandas()
+        ordre = [c for c in self._ordre or ('Date', 'Ticker') if c in df.columns]
+        return df[ordre + [c for c in df.columns if c not in ordre]]
+
+    def _lire_csv(self, debut, fin):
+        df = pd.read_csv(self.chemin_csv, skiprows=range(1, debut + 1), nrows=fin - debut)
+        return typer_colonnes(df)
@@ -1,6 +1,5 @@
-import sys
 import os
-import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 if "__file__" in globals():
     script_dir = os.path.dirname(os.path.abspath(__file__)) 
@@ -16,6 +15,15 @@ import joblib
 
 import texts
 import graph
+from stockage import lire_donnees, ouvrir_donnees, chemin_matrices, version_donnees
+from matrice_large import charger_matrice
+from trame_indexee import TrameIndexee, metadonnees_tickers
+from valeurs_manquantes import profil_valeurs_manquantes, comptes_mensuels
+from apercu_donnees import JeuPagine, resume_donnees, lire_resumes
+from cache_figures import CacheFigures
+import sous_echantillonnage
+import matrice_large
+import trame_indexee
 from util import (  ticker_to_name,
                     name_to_ticker,
                     adjust_to_last_friday,
@@ -24,36 +32,158 @@ from util import (  ticker_to_name,
                     secteur_map,
                     benchmark_map   )
 
-if not (    os.path.exists("sentiment_model.joblib") and
-            os.path.exists("tfidf_vectorizer.joblib") and
-            os.path.exists("classification_report.joblib")  ):
-    
-    with st.status( label="Entrainement du modèle de sentiment de texte (~30sec)",
-                    expanded=True   ) as status:
-        
-        st.write("Lancement du script")
-        subprocess.run([sys.executable,"text_sentiment.py"])
-        status.update(label="Entrainement terminé", expanded=False)
-
-
 from text_sentiment import (    text_cleaner,
                                 generer_wordcloud   )
+from amorcage_modele import AmorcageModele
+
+#ENTRAINEMENT DU MODELE DE SENTIMENT EN ARRIERE-PLAN SI SES FICHIERS MANQUENT (UNE FOIS PAR MACHINE, DERRIERE UN FICHIER VERROU)
+#LES PAGES D'ANALYSE DES PRIX RESTENT UTILISABLES PENDANT L'ENTRAINEMENT
+@st.cache_resource
+def load_amorcage(path:str) -> AmorcageModele:
+
+    amorcage = AmorcageModele(path)
+    amorcage.demarrer()
+    return amorcage
+
+amorcage = load_amorcage(script_dir)
 
 #CREATION D UNE FONCTION D'IMPORT DES DIFFERENTS DATAFRAMES AFIN QU IL SOIT CONSERVE EN MEMOIRE
+#LA VERSION PARQUET (DEJA TYPEE) EST LUE EN PRIORITE, EN NE CHARGEANT QUE LES COLONNES/TICKERS DEMANDES
+@st.cache_data
+def load_df(path:str, colonnes:list=None, tickers:list=None) -> pd.DataFrame:
+
+    return lire_donnees(path, colonnes=colonnes, tickers=tickers)
+
+#COLONNES UTILISEES PAR LES PAGES D'ANALYSE ET DE COMPARAISON
+COLONNES_ANALYSE = ["Date","Ticker","Prix","Rendement","Volatilité_30j","Type_actif","Secteur","Benchmark"]
+
+#VERSION DU JEU FINAL (DATES ET TAILLES DES FICHIERS), LUE A CHAQUE EXECUTION SANS LIRE LE JEU : LES RESSOURCES CI-DESSOUS
+#ET LES FIGURES SONT GARDEES PAR VERSION, UN JEU REECRIT PAR LE PIPELINE EST DONC RELU AVANT D'ETRE AFFICHE
+version = version_donnees("data/dataframe_final_pret_pour_streamlit.csv")
+
+#IMPORT DU DATAFRAME FINAL, TYPE UNE FOIS PAR LE PIPELINE : COLONNES EN MEMOIRE MAPPEE OUVERTES SANS COPIE, UN SEUL
+#EXEMPLAIRE PAR PROCESSUS (CACHE_RESOURCE) DONT LES PAGES SONT PARTAGEES PAR TOUS LES PROCESSUS DE LA MACHINE
+#TRIE PAR (TICKER, DATE) AVEC L'INDEX TICKER -> (DEBUT, FIN) DES LIGNES : LES LIGNES D'UN ACTIF SE LISENT PAR TRANCHE
+#ET LES TYPES/SECTEURS/BENCHMARKS DANS UNE TABLE D'UNE LIGNE PAR ACTIF, SANS PARCOURIR TOUT LE FORMAT LONG
+@st.cache_resource(max_entries=1)
+def load_trame(path:str, version:str) -> TrameIndexee:
+
+    return TrameIndexee(ouvrir_donnees(path, COLONNES_ANALYSE))
+
+data = load_trame("data/dataframe_final_pret_pour_streamlit.csv", version)
+
+#MATRICES DATE x TICKER (PRIX, RENDEMENT, VOLATILITE) OUVERTES EN MEMOIRE MAPPEE UNE FOIS PAR PROCESSUS
+#LES GRAPHIQUES Y LISENT UNE PERIODE PAR ARITHMETIQUE D'INDICES AU LIEU DE FILTRER LE FORMAT LONG
+@st.cache_resource(max_entries=1)
+def load_matrice(path:str, version:str):
+
+    return charger_matrice(chemin_matrices(path), load_trame(path, version).df)
+
+matrice = load_matrice("data/dataframe_final_pret_pour_streamlit.csv", version)
+
+#FIGURES PLOTLY DEJA CONSTRUITES (JSON) PAR GRAPHIQUE, ACTIFS, PERIODE ET VERSION DU JEU, PARTAGEES PAR TOUTES LES SESSIONS
+#LES MOINS RECEMMENT DEMANDEES SONT RETIREES AU-DELA D'UNE TAILLE MAXIMALE, UNE COPIE SUR DISQUE SURVIT AUX REDEMARRAGES
+#LA CLE CONTIENT LE CODE DE graph.py ET DES MODULES QUI FACONNENT LES FIGURES : UNE CORRECTION N'EST JAMAIS MASQUEE
+@st.cache_resource
+def load_cache_figures(path:str) -> CacheFigures:
+
+    return CacheFigures(dossier=path, dependances=(sous_echantillonnage, matrice_large, trame_indexee))
+
+figures = load_cache_figures("data/.cache_figures")
+
+#FIGURE SERVIE PAR LE CACHE, CONSTRUITE PAR graph.py SEULEMENT A LA PREMIERE DEMANDE POUR CETTE VERSION DU JEU
+def cached_figure(builder, donnees, *args):
+
+    return figures.figure(builder, donnees, *args, version=version)
+
+#FILS D'EXECUTION PARTAGES PAR TOUTES LES SESSIONS POUR CONSTRUIRE LES FIGURES D'UNE PAGE EN PARALLELE
+@st.cache_resource
+def load_executor() -> ThreadPoolExecutor:
+
+    return ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="figures")
+
+executor = load_executor()
+
+#EMPLACEMENT D'UNE FIGURE RESERVE A SA PLACE DANS LA PAGE, REMPLI PAR render_figures
+def figure_slot(builder, donnees, *args) -> tuple:
+
+    return (st.empty(), builder, donnees, args)
+
+#FIGURES D'UNE PAGE CONSTRUITES EN PARALLELE ET AFFICHEES CHACUNE DES QU'ELLE EST PRETE : LA PAGE EST COMPLETE APRES
+#LA FIGURE LA PLUS LENTE ET NON APRES LA SOMME DES FIGURES. LES APPELS STREAMLIT RESTENT DANS LE FIL DU SCRIPT
+def render_figures(slots:list, parallel:bool=True):
+
+    if not parallel:
+        for placeholder, builder, donnees, args in slots:
+            placeholder.plotly_chart(cached_figure(builder, donnees, *args))
+        return
+
+    futures = { executor.submit(cached_figure, builder, donnees, *args): placeholder
+                for placeholder, builder, donnees, args in slots }
+    for future in as_completed(futures):
+        futures[future].plotly_chart(future.result())
+
+#PROFIL DES VALEURS MANQUANTES PAR ACTIF (COMPTES, COUVERTURE, TROUS) ECRIT PAR LE PIPELINE DE PREPARATION
+#A DEFAUT (FICHIERS D'UNE VERSION ANTERIEURE), CALCULE UNE FOIS A PARTIR DU FICHIER BRUT
+@st.cache_data
+def load_profil(path:str, path_brut:str) -> pd.DataFrame:
+
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    return profil_valeurs_manquantes(load_df(path_brut).drop_duplicates())
+
+#LIGNES ET VALEURS PRESENTES PAR TICKER ET PAR MOIS, SOURCE DE LA CARTE DES VALEURS MANQUANTES
+@st.cache_data
+def load_comptes_manquants(path:str, path_brut:str) -> pd.DataFrame:
+
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    return comptes_mensuels(load_df(path_brut).drop_duplicates())
+
+#RESUME DES JEUX BRUT, NETTOYE ET FINAL (LIGNES, COLONNES, TICKERS, PERIODE) ECRIT PAR LE PIPELINE DE PREPARATION
+#A DEFAUT (FICHIERS D'UNE VERSION ANTERIEURE), CALCULE UNE FOIS A PARTIR DES JEUX
 @st.cache_data
-def load_df(path:str) -> pd.DataFrame:
+def load_resumes(path:str, paths:dict) -> dict:
+
+    resumes = lire_resumes(path) if os.path.exists(path) else {}
+    return {name: resumes[name] if name in resumes else resume_donnees(load_df(path_jeu)) for name, path_jeu in paths.items()}
+
+#JEU LU PAGE PAR PAGE (NOMBRE DE LIGNES ET POSITION DES FICHIERS), GARDE EN MEMOIRE PAR JEU, PAR FILTRE D'ACTIFS
+#ET PAR VERSION DU JEU : LES FICHIERS SONT REPERES A NOUVEAU DES QUE LE PIPELINE REECRIT LE JEU
+@st.cache_resource(max_entries=64)
+def load_jeu_pagine(path:str, tickers:tuple=None, version:str=None) -> JeuPagine:
+
+    return JeuPagine(path, tickers)
 
-    return pd.read_csv(path)
+#TABLEAU PAGINE ET FILTRABLE PAR ACTIF : SEULE LA PAGE AFFICHEE EST LUE ET ENVOYEE AU NAVIGATEUR
+def paginated_table(path:str, resume:dict, key:str):
 
-#IMPORT DU DATAFRAME FINAL
-data = load_df("data/dataframe_final_pret_pour_streamlit.csv")
-#CONVERSION DE LA COLONNE DATE EN DATETIME POUR L'ANALYSE TEMPORELLE
-data["Date"] = pd.to_datetime(data["Date"])
-#CONVERTION EN TYPE CATEGORY POUR ACCELERER CERTAINE OPERATION
-data["Type_actif"] = data["Type_actif"].astype("category", copy=False)
-data["Secteur"] = data["Secteur"].astype("category", copy=False)
-data["Benchmark"] = data["Benchmark"].astype("category", copy=False)
-data["Ticker"] = data["Ticker"].astype("category", copy=False)
+    col_1, col_2, col_3 = st.columns([3,1,1])
+    with col_1:
+        tickers = st.multiselect("Filtrer par actif", resume["tickers"], key=f"{key}_tickers")
+    with col_2:
+        size = st.selectbox("Lignes par page", [50,100,500,1000], key=f"{key}_taille")
+    jeu = load_jeu_pagine(path, tuple(tickers) if tickers else None, version_donnees(path))
+    with col_3:
+        page = st.number_input("Page", min_value=1, max_value=jeu.nombre_pages(size), value=1, key=f"{key}_page")
+    st.dataframe(jeu.page(page-1, size), use_container_width=True)
+    st.caption(f"Page {page} sur {jeu.nombre_pages(size)} ({jeu.lignes} lignes)")
+
+#METADONNEES PAR ACTIF ECRITES PAR LE PIPELINE DE PREPARATION : PREMIERE DATE UTILE (VEILLE DU PREMIER PRIX DIFFERENT
+#DU PREMIER PRIX), DERNIERE DATE, DERNIERE DATE DE DEBUT D'UNE PERIODE DE 20 LIGNES, TYPE, SECTEUR ET BENCHMARK
+#CHARGEES UNE FOIS EN DICTIONNAIRE TICKER -> CHAMPS, A DEFAUT CALCULEES A PARTIR DU DATAFRAME FINAL
+@st.cache_data(max_entries=1)
+def load_metadonnees(path:str, path_final:str, version:str) -> dict:
+
+    metadonnees = pd.read_parquet(path) if os.path.exists(path) else metadonnees_tickers(load_trame(path_final, version))
+    return metadonnees.to_dict("index")
+
+metadonnees = load_metadonnees("data/metadonnees_tickers.parquet","data/dataframe_final_pret_pour_streamlit.csv",version)
+
+#VALEURS DISTINCTES D'UN ATTRIBUT (TYPE, SECTEUR, BENCHMARK) DANS L'ORDRE DES ACTIFS
+def attribute_values(attribut:str) -> list:
+
+    return list(dict.fromkeys(champs[attribut] for champs in metadonnees.values()))
 
 ##################################################################################################################
 ###   CONFIGURATION DE LA SIDEBAR   ##############################################################################
@@ -63,6 +193,7 @@ st.sidebar.markdown("### :material/settings: Paremètre")
 
 presentation = st.sidebar.toggle("Présentation du jeu de données",value=True)
 text_analysis = st.sidebar.toggle("Analyseur de text")
+parallel = st.sidebar.toggle("Construction parallèle des graphiques",value=True)
 
 st.sidebar.subheader("Analyse")
 comparison = st.sidebar.toggle("Comparer plusieurs actifs")
@@ -74,19 +205,19 @@ if not comparison:
     asset_name = st.sidebar.selectbox("Sélectionner un actif", list(ticker_to_name.values()))
     asset_ticker = name_to_ticker[asset_name]
 
-    first_value = data["Prix"][data["Ticker"] == asset_ticker].iloc[0]
-    date_first_different_price = data["Date"][(data["Ticker"] == asset_ticker) & (first_value != data["Prix"])].iloc[0]
-    date_first_different_price -= pd.Timedelta(days=1)
+    date_first_different_price = metadonnees[asset_ticker]["premiere_date"]
+    last_start_date = metadonnees[asset_ticker]["derniere_date_debut"]
+    last_date = metadonnees[asset_ticker]["derniere_date"]
 
     start_date = st.sidebar.date_input( "Date de début",
                                         date_first_different_price,
                                         min_value=date_first_different_price,
-                                        max_value=data["Date"][data["Ticker"] == asset_ticker].iloc[-20] )
+                                        max_value=last_start_date )
     
     end_date = st.sidebar.date_input(   "Date de fin",
-                                        data["Date"][data["Ticker"] == asset_ticker].iloc[-1],
+                                        last_date,
                                         min_value=start_date + pd.Timedelta(days=20),
-                                        max_value=data["Date"][data["Ticker"] == asset_ticker].iloc[-1]  )
+                                        max_value=last_date  )
     
     start_date = adjust_to_last_friday(start_date)
     end_date = adjust_to_last_friday(end_date)
@@ -103,17 +234,17 @@ else:
 
     elif comparison_type == "Type d'actif":
 
-        asset_type = st.sidebar.multiselect("Sélectionner une ou plusieurs catégories d'actifs", list(data["Type_actif"].unique()))
+        asset_type = st.sidebar.multiselect("Sélectionner une ou plusieurs catégories d'actifs", attribute_values("Type_actif"))
         asset_list = [name for name in ticker_to_name.values() if type_map[name_to_ticker[name]] in asset_type]
 
     elif comparison_type == "Secteur":
 
-        asset_sector = st.sidebar.multiselect("Sélectionner un ou plusieurs secteurs d'activité", list(data["Secteur"].unique()))
+        asset_sector = st.sidebar.multiselect("Sélectionner un ou plusieurs secteurs d'activité", attribute_values("Secteur"))
         asset_list = [name for name in ticker_to_name.values() if secteur_map[name_to_ticker[name]] in asset_sector]
 
     elif comparison_type == "Benchmark":
 
-        asset_benchmark = st.sidebar.multiselect("Sélectionner un ou plusieurs benchmarks", list(data["Benchmark"].unique()))
+        asset_benchmark = st.sidebar.multiselect("Sélectionner un ou plusieurs benchmarks", attribute_values("Benchmark"))
         asset_list = [name for name in ticker_to_name.values() if benchmark_map[name_to_ticker[name]] in asset_benchmark]
 
     group = st.sidebar.toggle("Par groupe",value=True) if comparison_type != "Actif" else None
@@ -142,18 +273,21 @@ if presentation and not submit:
 
     st.session_state["skip"] = False
 
-    pre_data = load_df("data/donnees_financieres_300k_lignes.csv")
-    pre_data_2 = load_df("data/donnees_financieres_clean.csv")
-    pre_data["Ticker"] = pre_data["Ticker"].astype("category", copy=False)
-    pre_data_2["Ticker"] = pre_data_2["Ticker"].astype("category", copy=False)
+    resumes = load_resumes( "data/resume_jeux.json",
+                            {   "brut": "data/donnees_financieres_300k_lignes.csv",
+                                "clean": "data/donnees_financieres_clean.csv",
+                                "final": "data/dataframe_final_pret_pour_streamlit.csv"  }   )
+    profil = load_profil("data/profil_valeurs_manquantes.parquet","data/donnees_financieres_300k_lignes.csv")
+    comptes_manquants = load_comptes_manquants(  "data/comptes_valeurs_manquantes.parquet",
+                                                "data/donnees_financieres_300k_lignes.csv"  )
 
     st.header("Présentation du jeu de données")
 
     st.markdown(f":blue-badge[:material/info: Information] \n\n{texts.text_1}")
     st.subheader("Jeu de données avant nettoyage")
-    st.dataframe(pre_data, use_container_width=True)
-    st.info(    f"nombre de ligne : **{pre_data.shape[0]}**"
-                f"\n\nnombre de colonne : **{pre_data.shape[1]}**"  )
+    paginated_table("data/donnees_financieres_300k_lignes.csv", resumes["brut"], "brut")
+    st.info(    f"nombre de ligne : **{resumes['brut']['lignes']}**"
+                f"\n\nnombre de colonne : **{len(resumes['brut']['colonnes'])}**"  )
 
     st.subheader("Jeu de données après nettoyage")
     st.markdown(f":blue-badge[:material/info: Information] \n\n{texts.text_2}")
@@ -164,26 +298,29 @@ if presentation and not submit:
         col_1, col_2= st.columns(2)
         with col_1:
             st.markdown("###### Description de la colonne prix")
-            st.dataframe(pre_data.describe())
+            st.dataframe(load_df("data/donnees_financieres_300k_lignes.csv", ["Prix"]).describe())
             st.markdown("###### Période de couverture des données")
-            st.pyplot(graph.graph_coverage(pre_data))
+            st.pyplot(graph.graph_coverage(profil))
         with col_2:
             st.markdown("###### Actifs avec le plus de valeurs manquantes")
-            st.pyplot(graph.graph_missing_value(pre_data))
+            st.pyplot(graph.graph_missing_value(profil))
             st.markdown("###### Distribution Avant/Après nettoyage")
-            st.pyplot(graph.graph_price_distrib(pre_data,pre_data_2))
-    st.dataframe(pre_data_2, use_container_width=True)
-    st.info(    f"nombre de ligne : **{pre_data_2.shape[0]}**"
-                f"\n\nnombre de colonne : **{pre_data_2.shape[1]}**"  )
+            st.pyplot(graph.graph_price_distrib(    load_df("data/donnees_financieres_300k_lignes.csv", ["Prix"]),
+                                                    load_df("data/donnees_financieres_clean.csv", ["Prix"])   ))
+        st.markdown("###### Carte des valeurs manquantes")
+        st.pyplot(graph.graph_missing_map(comptes_manquants))
+    paginated_table("data/donnees_financieres_clean.csv", resumes["clean"], "clean")
+    st.info(    f"nombre de ligne : **{resumes['clean']['lignes']}**"
+                f"\n\nnombre de colonne : **{len(resumes['clean']['colonnes'])}**"  )
 
     st.subheader("Jeu de données après traitement")
     if st.toggle("En voir plus",  key="voir_plus_2"):
         st.markdown(f":blue-badge[:material/info: Information] \n\n{texts.text_3}")
         st.markdown(f":blue-badge[:material/pie_chart: Pie Chart]")
-        st.plotly_chart(graph.graph_category_pie_chart(data,data["Ticker"].unique()))
-    st.dataframe(data, use_container_width=True)
-    st.info(    f"nombre de ligne : **{data.shape[0]}**"
-                f"\n\nnombre de colonne : **{data.shape[1]}**"  )
+        st.plotly_chart(cached_figure(graph.graph_category_pie_chart,data,data.tickers))
+    paginated_table("data/dataframe_final_pret_pour_streamlit.csv", resumes["final"], "final")
+    st.info(    f"nombre de ligne : **{resumes['final']['lignes']}**"
+                f"\n\nnombre de colonne : **{len(resumes['final']['colonnes'])}**"  )
     
 ##################################################################################################################
 ###   MISE EN PAGE SANS COMPARAISON   ############################################################################
@@ -193,25 +330,33 @@ if submit and not comparison:
     
     st.markdown(f"# :green-badge[:material/analytics: Analyse] Analyse de {asset_name}")
 
+    with_benchmark = asset_ticker not in attribute_values("Benchmark")
+
+    #SERIES DE L'ACTIF (ET DE SON BENCHMARK) SUR LA PERIODE LUES UNE FOIS, PARTAGEES PAR LES FIGURES DE LA PAGE
+    extrait = matrice.extraire([asset_ticker,benchmark_map[asset_ticker]] if with_benchmark else [asset_ticker],start_date,end_date)
+    slots = []
+
     st.markdown(f"### :green-badge[:material/finance_mode: Prix] Graphique de {asset_name}")
-    st.plotly_chart(graph.graph_price(data,asset_ticker,start_date,end_date))
+    slots.append(figure_slot(graph.graph_price,extrait,asset_ticker,start_date,end_date))
 
     st.markdown(f"### :green-badge[:material/bar_chart_4_bars: Distribution] Histogramme des rendements de {asset_name}")
-    st.plotly_chart(graph.graph_returns_distrib(data,asset_ticker,start_date,end_date))
+    slots.append(figure_slot(graph.graph_returns_distrib,extrait,asset_ticker,start_date,end_date))
 
     st.markdown(f"### :green-badge[:material/electric_bolt: Risque] Volatilité des rendements de {asset_name}")
-    st.plotly_chart(graph.graph_volatility(data,asset_ticker,start_date,end_date))
+    slots.append(figure_slot(graph.graph_volatility,extrait,asset_ticker,start_date,end_date))
 
     st.markdown(f"### :green-badge[:material/electric_bolt: Risque] Volatilité des rendements de {asset_name}")
-    st.plotly_chart(graph.graph_boxplot_vol(data,asset_ticker,start_date,end_date))
+    slots.append(figure_slot(graph.graph_boxplot_vol,extrait,asset_ticker,start_date,end_date))
 
-    if asset_ticker not in data["Benchmark"].unique():
+    if with_benchmark:
 
         st.markdown(f"### :green-badge[:material/balance: Versus] {asset_name} VS benchmark : {benchmark_map[asset_ticker]}")
-        st.plotly_chart(graph.graph_asset_vs_benchmark(data,asset_ticker,benchmark_map[asset_ticker],start_date,end_date))
+        slots.append(figure_slot(graph.graph_asset_vs_benchmark,extrait,asset_ticker,benchmark_map[asset_ticker],start_date,end_date))
 
         st.markdown(f"### :green-badge[:material/balance: Versus] {asset_name} & benchmark : {benchmark_map[asset_ticker]}")
-        st.plotly_chart(graph.graph_price_asset_and_benchmark(data,asset_ticker,benchmark_map[asset_ticker],start_date,end_date))
+        slots.append(figure_slot(graph.graph_price_asset_and_benchmark,extrait,asset_ticker,benchmark_map[asset_ticker],start_date,end_date))
+
+    render_figures(slots,parallel)
 
 ##################################################################################################################
 ###   MISE EN PAGE AVEC COMPARAISON   ############################################################################
@@ -234,15 +379,9 @@ if (submit and comparison) or (st.session_state.get("skip", False)):
 
     st.markdown(f"# :violet-badge[:material/balance: Versus] {comparison_title}")
 
-    first_values = []
-    for ticker in asset_tickers:
-        
-        first_value = data["Prix"][data["Ticker"] == ticker].iloc[0]
-        date_first_different_price = data["Date"][(data["Ticker"] == ticker) & (first_value != data["Prix"])].iloc[0]
-        date_first_different_price -= pd.Timedelta(days=1)
-        first_values.append(date_first_different_price)
-
-    first_value = max(first_values)
+    first_value = max(metadonnees[ticker]["premiere_date"] for ticker in asset_tickers)
+    last_start_date = metadonnees[asset_tickers[-1]]["derniere_date_debut"]
+    last_date = metadonnees[asset_tickers[-1]]["derniere_date"]
 
     col_1, col_2 = st.columns(2)
 
@@ -251,26 +390,32 @@ if (submit and comparison) or (st.session_state.get("skip", False)):
         start_date = st.date_input( "Date de début",
                                     first_value,
                                     min_value=first_value,
-                                    max_value=data["Date"][data["Ticker"] == ticker].iloc[-20]    )
+                                    max_value=last_start_date    )
 
     with col_2:
 
         end_date = st.date_input(   "Date de fin",
-                                    data["Date"][data["Ticker"] == ticker].iloc[-1],
+                                    last_date,
                                     min_value=start_date + pd.Timedelta(days=20),
-                                    max_value=data["Date"][data["Ticker"] == ticker].iloc[-1]   )
+                                    max_value=last_date   )
         
+    #SERIES DES ACTIFS SUR LA PERIODE LUES UNE FOIS, PARTAGEES PAR LES FIGURES DE LA PAGE
+    extrait = matrice.extraire(asset_tickers,start_date,end_date)
+    slots = []
+
     st.markdown(f"### :violet-badge[:material/pie_chart: Pie Chart] Répartition")
-    st.plotly_chart(graph.graph_category_pie_chart(data,asset_tickers))
+    slots.append(figure_slot(graph.graph_category_pie_chart,data,asset_tickers))
 
     st.markdown(f"### :violet-badge[:material/finance_mode: Prix] Graphique des actifs")
-    st.plotly_chart(graph.graph_price(data,asset_tickers,start_date,end_date))
+    slots.append(figure_slot(graph.graph_price,extrait,asset_tickers,start_date,end_date))
 
     st.markdown(f"### :violet-badge[:material/grid_on: Matrice] Heatmap de corrélation des actifs")
-    st.plotly_chart(graph.graph_corr(data,asset_tickers,start_date,end_date))
+    slots.append(figure_slot(graph.graph_corr,extrait,asset_tickers,start_date,end_date))
 
     st.markdown(f"### :violet-badge[:material/stacked_bar_chart: Barplot] Volatilité des actifs")
-    st.plotly_chart(graph.graph_boxplot_vol(data,asset_tickers,start_date,end_date))
+    slots.append(figure_slot(graph.graph_boxplot_vol,extrait,asset_tickers,start_date,end_date))
+
+    render_figures(slots,parallel)
 
 ##################################################################################################################
 ###   MISE EN PAGE TEXT MINING   #################################################################################
@@ -293,36 +438,62 @@ if text_analysis:
 
     st.markdown(f"# :grey-badge[:material/star:] Résultat")
 
+    #ETAT DU MODELE VERIFIE TOUTES LES 5 SECONDES PENDANT L'ENTRAINEMENT, PAGE RECHARGEE DES QU'IL EST PRET
+    @st.fragment(run_every=5)
+    def model_pending():
+
+        if amorcage.etat == AmorcageModele.EN_COURS:
+            st.badge(label="Entraînement du modèle de sentiment en cours (~30sec)", icon=":material/hourglass_top:", color="orange")
+        else:
+            st.rerun()
+
     @st.cache_data
     def joblib_load(path:str):
 
         return joblib.load(path)
 
-    model = joblib_load("sentiment_model.joblib")
-    vectorizer = joblib_load("tfidf_vectorizer.joblib")
-    classification_report = joblib_load("classification_report.joblib")
+    model_state = amorcage.etat
 
-    text = vectorizer.transform([text])
-    y_pred = model.predict(text)
+    if model_state == AmorcageModele.EN_COURS:
 
-    match y_pred:
+        model_pending()
 
-        case 0:
-            sentiment = "Négatif"
-            badge_sentiment = ":material/sentiment_dissatisfied:"
-            sentiment_color = "red"
-        case 1:
-            sentiment = "Neutre"
-            badge_sentiment = ":material/sentiment_neutral:"
-            sentiment_color = "grey"
-        case 2:
-            sentiment = "Positif"
-            badge_sentiment = ":material/sentiment_satisfied:"
-            sentiment_color = "green"
+    elif model_state == AmorcageModele.ECHEC:
+
+        st.badge(label=f"L'entraînement du modèle de sentiment a échoué : {amorcage.erreur}", icon=":material/error:", color="red")
+        if st.button("Relancer l'entraînement"):
+            amorcage.relancer()
+            st.rerun()
+
+    else:
+
+        st.badge(label="Modèle de sentiment prêt", icon=":material/check_circle:", color="green")
+
+        model = joblib_load("sentiment_model.joblib")
+        vectorizer = joblib_load("tfidf_vectorizer.joblib")
+        classification_report = joblib_load("classification_report.joblib")
+
+        text = vectorizer.transform([text])
+        y_pred = model.predict(text)
+
+        match y_pred:
+
+            case 0:
+                sentiment = "Négatif"
+                badge_sentiment = ":material/sentiment_dissatisfied:"
+                sentiment_color = "red"
+            case 1:
+                sentiment = "Neutre"
+                badge_sentiment = ":material/sentiment_neutral:"
+                sentiment_color = "grey"
+            case 2:
+                sentiment = "Positif"
+                badge_sentiment = ":material/sentiment_satisfied:"
+                sentiment_color = "green"
 
-    st.badge(label=f"Le sentiment de l'article est {sentiment}", icon=badge_sentiment, color=sentiment_color)
+        st.badge(label=f"Le sentiment de l'article est {sentiment}", icon=badge_sentiment, color=sentiment_color)
 
-    if st.toggle("En voir plus",  key="voir_plus_3"):
+        if st.toggle("En voir plus",  key="voir_plus_3"):
 
-        st.markdown(f"### :blue-badge[:material/info: Information] Rapport de Classification")
-        st.pyplot(graph.graph_report(classification_report))
\ No newline at end of file
+            st.markdown(f"### :blue-badge[:material/info: Information] Rapport de Classification")
+            st.pyplot(graph.graph_report(classification_report))
\ No newline at end of file
@@ -0,0 +1,111 @@
+# --- IMPORTS DES LIBRAIRIES ---
+import numpy as np                # Pour les calculs vectorisés
+import pandas as pd               # Pour manipuler les tableaux
+
+# Métriques relatives disponibles et préfixe de la colonne produite
+METRIQUES = {
+    # Prix de l'actif / prix du benchmark × 100 (100 pour le benchmark lui-même)
+    'ratio': 'Performance_vs',
+    # Rendement de l'actif - rendement du benchmark, en points de %
+    'exces': 'Rendement_excedentaire_vs',
+    # Croissance de l'actif / croissance du benchmark depuis la première date de l'actif - 1, en %
+    'surperformance_cumulee': 'Surperformance_cumulee_vs',
+}
+
+
+def liste_benchmarks(benchmarks):
+    """Normalise une valeur de benchmark_map en liste (un ou plusieurs benchmarks, aucun si None)."""
+    if benchmarks is None:
+        return []
+    if isinstance(benchmarks, (list, tuple)):
+        return list(benchmarks)
+    return [benchmarks]
+
+
+def joindre_benchmarks(df, benchmark_map, metriques=('ratio',)):
+    """
+    Aligne chaque ligne sur le prix de son benchmark à la même date et calcule
+    les métriques relatives, sans boucle Python sur les lignes.
+
+    Les prix des benchmarks sont mis en matrice date × benchmark une seule fois,
+    puis chaque ligne y lit sa valeur par indexation (indice de la date, indice
+    du benchmark) : le coût est linéaire en nombre de lignes.
+
+    Args:
+        df (DataFrame): Format long avec 'Date', 'Ticker', 'Prix'
+            (et 'Rendement' pour la métrique 'exces').
+        benchmark_map (dict): Ticker -> benchmark, ou liste de benchmarks
+            (le premier est le benchmark principal).
+        metriques (list): Métriques à calculer parmi `METRIQUES`.
+
+    Returns:
+        DataFrame: Copie de `df` avec la colonne 'Benchmark' (benchmark principal)
+            et une colonne par métrique et par benchmark : '<préfixe>_Benchmark'
+            pour le principal, '<préfixe>_<benchmark>' pour les benchmarks
+            secondaires (NaN pour les actifs qui ne s'y comparent pas).
+    """
+    inconnues = set(metriques) - set(METRIQUES)
+    if inconnues:
+        raise ValueError(f"Métrique(s) inconnue(s) : {sorted(inconnues)}")
+
+    df = df.copy()
+    tickers = df['Ticker'].astype(str)
+    listes = {t: liste_benchmarks(b) for t, b in benchmark_map.items()}
+
+    principal = tickers.map({t: b[0] for t, b in listes.items() if b})
+    df['Benchmark'] = principal
+
+    # Matrices date × benchmark construites une seule fois
+    tous = sorted({b for liste in listes.values() for b in liste})
+    lignes_benchmarks = df[tickers.isin(tous)]
+    champs = ['Prix', 'Rendement'] if 'exces' in metriques else ['Prix']
+    larges = {champ: lignes_benchmarks.pivot(index='Date', columns='Ticker', values=champ) for champ in champs}
+    axe_benchmarks = pd.Index(larges['Prix'].columns.astype(str))
+    matrices = {champ: large.to_numpy(dtype=np.float64) for champ, large in larges.items()}
+
+    # Position de la date de chaque ligne dans la matrice (-1 si absente)
+    ligne = larges['Prix'].index.get_indexer(df['Date'])
+
+    def metriques_vs(benchmark):
+        """Métriques de chaque ligne par rapport au benchmark donné ligne à ligne."""
+        colonne = axe_benchmarks.get_indexer(benchmark)
+        valide = (ligne >= 0) & (colonne >= 0)
+        lui_meme = (tickers == benchmark).to_numpy()
+        sans_benchmark = benchmark.isna().to_numpy()
+
+        def lire(champ):
+            valeurs = np.full(len(df), np.nan)
+            valeurs[valide] = matrices[champ][ligne[valide], colonne[valide]]
+            return valeurs
+
+        ratio = df['Prix'].to_numpy() / lire('Prix') * 100
+        # Benchmark lui-même (ou actif sans benchmark) = 100
+        ratio[lui_meme | sans_benchmark] = 100
+
+        resultats = {}
+        for metrique in metriques:
+            if metrique == 'ratio':
+                valeurs = ratio
+            elif metrique == 'exces':
+                valeurs = df['Rendement'].to_numpy() - lire('Rendement')
+                valeurs[lui_meme] = 0
+            else:
+                # Rapport des croissances depuis la première ligne de chaque actif
+                ratio_initial = pd.Series(ratio, index=df.index).groupby(tickers).transform('first')
+                valeurs = (ratio / ratio_initial.to_numpy() - 1) * 100
+            resultats[metrique] = valeurs
+        return resultats
+
+    for metrique, valeurs in metriques_vs(principal).items():
+        df[f"{METRIQUES[metrique]}_Benchmark"] = valeurs
+
+    # Benchmarks secondaires : une colonne par benchmark, NaN pour les actifs non concernés
+    secondaires = sorted({b for liste in listes.values() for b in liste[1:]})
+    for benchmark in secondaires:
+        concernes = {t for t, b in listes.items() if benchmark in b[1:]}
+        concerne = tickers.isin(concernes).to_numpy()
+        cible = pd.Series(np.where(concerne, benchmark, None), index=df.index)
+        for metrique, valeurs in metriques_vs(cible).items():
+            df[f"{METRIQUES[metrique]}_{benchmark}"] = np.where(concerne, valeurs, np.nan)
+
+    return df
@@ -0,0 +1,196 @@
+# --- IMPORTS DES LIBRAIRIES ---
+import os                         # Pour les fichiers du cache disque
+import json                       # Pour la forme canonique des paramètres
+import uuid                       # Pour nommer les fichiers temporaires sans collision
+import hashlib                    # Pour la clé d'une figure
+import inspect                    # Pour le code source des constructeurs
+import threading                  # Pour les sessions servies en parallèle
+from collections import OrderedDict
+import plotly.io as pio           # Pour recréer une figure à partir de son JSON
+
+# Taille maximale des figures gardées en mémoire et sur disque (octets de JSON UTF-8)
+TAILLE_MAX_MEMOIRE = 64 * 1024 ** 2
+TAILLE_MAX_DISQUE = 512 * 1024 ** 2
+
+# Part de `taille_max_disque` visée après un élagage du disque : le dossier
+# n'est pas reparcouru à chaque écriture une fois la limite atteinte
+MARGE_ELAGAGE = 0.9
+
+
+def _canonique(valeur):
+    """Forme JSON d'un paramètre : séquences en listes, dates en ISO, le reste en texte."""
+    if isinstance(valeur, (list, tuple)):
+        return [_canonique(v) for v in valeur]
+    if hasattr(valeur, 'isoformat'):
+        return valeur.isoformat()
+    if valeur is None or isinstance(valeur, (bool, int, float)):
+        return valeur
+    return str(valeur)
+
+
+class CacheFigures:
+    """
+    Figures Plotly déjà construites, rangées sous forme JSON (octets UTF-8) par
+    constructeur, paramètres (actifs, période...) et version du jeu de données.
+
+    Les figures les moins récemment demandées sont retirées dès que la taille
+    totale dépasse `taille_max`. Avec un `dossier`, chaque figure est aussi
+    écrite sur disque (même limite par ancienneté d'usage, `taille_max_disque`) :
+    les vues courantes restent servies sans recalcul après un redémarrage et
+    par tous les processus de la machine. La taille du dossier est tenue à jour
+    à chaque écriture ; il n'est reparcouru que pour l'élaguer (et recompter les
+    fichiers écrits par les autres processus).
+
+    La clé contient le code source du module du constructeur et des modules
+    `dependances` (lecture des séries, réductions, statistiques) : une figure
+    construite par une version antérieure de ce code n'est pas resservie. Un
+    module qui façonne les figures sans y être déclaré échappe à cette règle.
+    """
+
+    def __init__(self, taille_max=TAILLE_MAX_MEMOIRE, dossier=None, taille_max_disque=TAILLE_MAX_DISQUE,
+                 dependances=()):
+        self.taille_max = taille_max
+        self.dossier = dossier
+        self.taille_max_disque = taille_max_disque
+        self.version_code = hashlib.sha256(''.join(inspect.getsource(module)
+                                                   for module in dependances).encode()).hexdigest()
+        self.taille = 0
+        self.taille_disque = 0
+        self.succes = 0
+        self.echecs = 0
+        self._figures = OrderedDict()
+        self._sources = {}
+        self._acces = threading.Lock()
+        self._disque = threading.Lock()
+        if dossier is not None:
+            os.makedirs(dossier, exist_ok=True)
+            self.taille_disque = sum(taille for _, taille, _ in self._fichiers_disque())
+
+    def __len__(self):
+        return len(self._figures)
+
+    def cle(self, constructeur, parametres, version=None):
+        """
+        Clé d'une figure : empreinte du constructeur (nom et source de son
+        module), du code des dépendances, des paramètres et de la version.
+        """
+        nom = f"{constructeur.__module__}.{constructeur.__qualname__}"
+        module = constructeur.__module__
+        if module not in self._sources:
+            self._sources[module] = hashlib.sha256(inspect.getsource(inspect.getmodule(constructeur)).encode()).hexdigest()
+        h = hashlib.sha256()
+        h.update(json.dumps([nom, self._sources[module], self.version_code,
+                             _canonique(parametres), _canonique(version)]).encode())
+        return h.hexdigest()[:32]
+
+    def figure(self, constructeur, donnees, *parametres, version=None):
+        """
+        Figure `constructeur(donnees, *parametres)`, servie par le cache si elle
+        y est déjà pour cette version des données.
+
+        Args:
+            constructeur (callable): Fonction qui construit une figure Plotly.
+            donnees: Données passées en premier argument, hors de la clé (la
+                version les représente).
+            *parametres: Autres arguments (tickers, dates...), dans la clé.
+            version: Version du jeu de données (voir `stockage.version_donnees`).
+
+        Returns:
+            Figure: Nouvelle figure à chaque appel, modifiable sans altérer le cache.
+        """
+        cle = self.cle(constructeur, parametres, version)
+        json_figure = self.lire(cle)
+        with self._acces:
+            if json_figure is None:
+                self.echecs += 1
+            else:
+                self.succes += 1
+        if json_figure is None:
+            json_figure = constructeur(donnees, *parametres).to_json().encode('utf-8')
+            self.ecrire(cle, json_figure)
+        return pio.from_json(json_figure.decode('utf-8'))
+
+    def lire(self, cle):
+        """JSON d'une figure en octets UTF-8 (mémoire, puis disque), None si absente."""
+        with self._acces:
+            if cle in self._figures:
+                self._figures.move_to_end(cle)
+                return self._figures[cle]
+        if self.dossier is None:
+            return None
+        chemin = os.path.join(self.dossier, f'{cle}.json')
+        try:
+            with open(chemin, 'rb') as fichier:
+                json_figure = fichier.read()
+            os.utime(chemin)
+        except FileNotFoundError:
+            return None
+        self._garder(cle, json_figure)
+        return json_figure
+
+    def ecrire(self, cle, json_figure):
+        """Range le JSON (octets UTF-8) d'une figure en mémoire et, avec un dossier, sur disque."""
+        self._garder(cle, json_figure)
+        if self.dossier is None:
+            return
+        chemin = os.path.join(self.dossier, f'{cle}.json')
+        tmp = f'{chemin}.{uuid.uuid4().hex}.tmp'
+        with open(tmp, 'wb') as fichier:
+            fichier.write(json_figure)
+        with self._disque:
+            try:
+                self.taille_disque -= os.path.getsize(chemin)
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, chemin)
+            self.taille_disque += len(json_figure)
+            if self.taille_disque > self.taille_max_disque:
+                self._elaguer_disque()
+
+    def vider(self):
+        """Oublie les figures gardées en mémoire (le disque est conservé)."""
+        with self._acces:
+            self._figures.clear()
+            self.taille = 0
+
+    def _garder(self, cle, json_figure):
+        with self._acces:
+            if cle in self._figures:
+                self.taille -= len(self._figures.pop(cle))
+            if len(json_figure) > self.taille_max:
+                return
+            self._figures[cle] = json_figure
+            self.taille += len(json_figure)
+            while self.taille > self.taille_max:
+                _, ancien = self._figures.popitem(last=False)
+                self.taille -= len(ancien)
+
+    def _fichiers_disque(self):
+        """(date d'accès, taille, chemin) des figures écrites sur disque."""
+        fichiers = []
+        with os.scandir(self.dossier) as entrees:
+            for entree in entrees:
+                if entree.name.endswith('.json'):
+                    try:
+                        etat = entree.stat()
+                    except FileNotFoundError:
+                        continue
+                    fichiers.append((etat.st_mtime, etat.st_size, entree.path))
+        return fichiers
+
+    def _elaguer_disque(self):
+        """
+        Supprime les figures du disque les moins récemment utilisées jusqu'à
+        `MARGE_ELAGAGE` × `taille_max_disque` (appelé sous `_disque`).
+        """
+        fichiers = self._fichiers_disque()
+        total = sum(taille for _, taille, _ in fichiers)
+        for _, taille, chemin in sorted(fichiers):
+            if total <= self.taille_max_disque * MARGE_ELAGAGE:
+                break
+            try:
+                os.remove(chemin)
+            except FileNotFoundError:
+                pass
+            total -= taille
+        self.taille_disque = total
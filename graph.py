@@ -8,18 +8,31 @@ import datetime
 
 import streamlit as st
 
-@st.cache_data
-def graph_missing_value(df:pd.DataFrame) -> plt.Figure:
-
-    total_manquants = df['Prix'].isna().groupby(df['Ticker'],observed=False).sum()
-    total_observations = df['Prix'].groupby(df['Ticker'],observed=False).count()
-    pourcentage_manquants = (total_manquants / (total_manquants + total_observations) * 100).round(2)
+from matrice_large import MatriceLarge
+from trame_indexee import TrameIndexee
+from valeurs_manquantes import carte_valeurs_manquantes
+from sous_echantillonnage import reduire_serie, histogramme, statistiques_boite, POINTS_MAX
+
+def _serie(     donnees:Union[pd.DataFrame,MatriceLarge,TrameIndexee],
+                ticker:Union[str,pd.Categorical],
+                colonnes:list,
+                start_date:datetime=None,
+                end_date:datetime=None  ) -> pd.DataFrame:
+
+    #HISTORIQUE D'UN TICKER INDEXE PAR DATE : TRANCHE DE LA MATRICE LARGE (ARITHMETIQUE D'INDICES)
+    #OU DU FORMAT LONG INDEXE PAR TICKER, A DEFAUT FILTRE DU FORMAT LONG
+    if isinstance(donnees,(MatriceLarge,TrameIndexee)):
+        return donnees.serie(ticker,colonnes,start_date,end_date)
+
+    df = donnees[["Date"]+colonnes][donnees["Ticker"] == ticker]
+    df = df.set_index("Date")
+    return df.loc[start_date:end_date,:]
 
-    missing_by_ticker = pd.DataFrame(   {   'total_manquants': total_manquants,
-                                            'total_observations': total_observations,
-                                            'pourcentage_manquants': pourcentage_manquants  }   )
+@st.cache_data
+def graph_missing_value(profil:pd.DataFrame) -> plt.Figure:
 
-    missing_tickers = missing_by_ticker[missing_by_ticker['total_manquants'] > 0]\
+    #PROFIL DES VALEURS MANQUANTES PRECALCULE PAR LE PIPELINE (UNE LIGNE PAR TICKER, VOIR valeurs_manquantes.py)
+    missing_tickers = profil[profil['total_manquants'] > 0]\
                     .sort_values('pourcentage_manquants', ascending=False)
     
     plt.figure(figsize=(12, 12))
@@ -33,13 +46,13 @@ def graph_missing_value(df:pd.DataFrame) -> plt.Figure:
     return plt.gcf()
 
 @st.cache_data
-def graph_coverage(df: pd.DataFrame) -> plt.Figure:
-
-    df['Date'] = pd.to_datetime(df['Date'])
-
-    df = df.dropna(axis=0, how="any")
+def graph_coverage(profil: pd.DataFrame) -> plt.Figure:
 
-    coverage = df.groupby('Ticker',observed=False)['Date'].agg(min='min', max='max').reset_index()
+    #PREMIERE ET DERNIERE DATE AVEC UN PRIX, LUES DANS LE PROFIL DES VALEURS MANQUANTES
+    coverage = profil.dropna(subset=['premiere_date_valide'])
+    coverage = pd.DataFrame(    {   'Ticker': coverage.index,
+                                    'min': coverage['premiere_date_valide'].to_numpy(),
+                                    'max': coverage['derniere_date_valide'].to_numpy()  }   )
     coverage['duration'] = (coverage['max'] - coverage['min']).dt.days
     coverage = coverage.sort_values('min')
 
@@ -56,6 +69,35 @@ def graph_coverage(df: pd.DataFrame) -> plt.Figure:
     plt.tight_layout()
     return plt.gcf()
 
+@st.cache_data
+def graph_missing_map(comptes:pd.DataFrame, hauteur:int=100, largeur:int=300) -> plt.Figure:
+
+    #CARTE DATE x TICKER DE LA FRACTION DE VALEURS MANQUANTES, REDUITE A AU PLUS hauteur x largeur BLOCS
+    #LE COUT D'AFFICHAGE NE DEPEND PAS DU NOMBRE DE LIGNES DU JEU DE DONNEES
+    carte = carte_valeurs_manquantes(comptes, hauteur, largeur)
+
+    plt.figure(figsize=(12, 8))
+    plt.imshow( carte.to_numpy(),
+                aspect='auto',
+                interpolation='nearest',
+                cmap='viridis',
+                vmin=0,
+                vmax=1  )
+    plt.colorbar(label="Fraction de valeurs manquantes")
+
+    annees = carte.columns.year
+    debuts = [ i for i in range(len(annees)) if i == 0 or annees[i] != annees[i-1] ]
+    pas = max(1, len(debuts) // 12)
+    plt.xticks(debuts[::pas], annees[debuts[::pas]])
+    pas = max(1, len(carte) // 40)
+    plt.yticks(range(0, len(carte), pas), carte.index[::pas])
+
+    plt.xlabel("Date")
+    plt.ylabel("Ticker")
+    plt.title("Carte des valeurs manquantes")
+    plt.tight_layout()
+    return plt.gcf()
+
 @st.cache_data
 def graph_price_distrib(df:pd.DataFrame, df_clean:pd.DataFrame) -> plt.Figure:
 
@@ -73,62 +115,62 @@ def graph_price_distrib(df:pd.DataFrame, df_clean:pd.DataFrame) -> plt.Figure:
     plt.tight_layout()
     return plt.gcf()
 
-def graph_price(    df:pd.DataFrame,
+def graph_price(    donnees:Union[pd.DataFrame,MatriceLarge,TrameIndexee],
                     asset_ticker:Union[str,pd.Categorical,list],
                     start_date:datetime,
-                    end_date:datetime   ) -> go.Figure:
+                    end_date:datetime,
+                    points:int=POINTS_MAX   ) -> go.Figure:
     
     asset_ticker = [asset_ticker] if not isinstance(asset_ticker,list) else asset_ticker
 
     fig = go.Figure()
 
-    df1 = df.copy()
     for ticker in asset_ticker:
 
-        df = df1[["Date","Prix"]][df1["Ticker"] == ticker]
-        df.set_index("Date",inplace=True)
-        df = df.loc[start_date:end_date,:]
+        #AU PLUS points POINTS PAR COURBE (MIN ET MAX PAR PAQUET DE DATES), TRACES EN WEBGL
+        prix = reduire_serie(_serie(donnees,ticker,["Prix"],start_date,end_date)["Prix"],points)
 
-        fig.add_trace(  go.Scatter( x=df.index,
-                                    y=df["Prix"],
-                                    name = str(ticker)    )   )
+        fig.add_trace(  go.Scattergl(   x=prix.index,
+                                        y=prix,
+                                        name = str(ticker)    )   )
     
     fig.update_layout(  xaxis_title = "Date",
                         yaxis_title = "Prix"    )
 
     return fig
 
-def graph_returns_distrib(  df:pd.DataFrame,
+def graph_returns_distrib(  donnees:Union[pd.DataFrame,MatriceLarge,TrameIndexee],
                             asset_ticker:Union[str,pd.Categorical],
                             start_date:datetime,
                             end_date:datetime   ) -> go.Figure:
     
-    df = df[["Date","Rendement"]][df["Ticker"] == asset_ticker]
-    df["Rendement"] /= 100
-    df.set_index("Date",inplace=True)
-    df = df.loc[start_date:end_date,:]
+    df = _serie(donnees,asset_ticker,["Rendement"],start_date,end_date)
 
-    fig = go.Figure(    data=go.Histogram(  histnorm="probability",
-                                            x=df["Rendement"],
-                                            name="Rendements",
-                                            nbinsx=300  )   )
+    #PROBABILITE DE CHAQUE CLASSE CALCULEE ICI : 300 BARRES ENVOYEES AU NAVIGATEUR QUEL QUE SOIT LE NOMBRE DE RENDEMENTS
+    centres, largeur, probabilites = histogramme(df["Rendement"].to_numpy() / 100, 300)
+
+    fig = go.Figure(    data=go.Bar(    x=centres,
+                                        y=probabilites,
+                                        width=largeur,
+                                        name="Rendements"   )   )
     
-    fig.update_layout(  xaxis_title = "Rendements",
+    fig.update_layout(  bargap = 0,
+                        xaxis_title = "Rendements",
                         yaxis_title = "Probabilité" )
     
     return fig
 
-def graph_volatility(   df:pd.DataFrame,
+def graph_volatility(   donnees:Union[pd.DataFrame,MatriceLarge,TrameIndexee],
                         asset_ticker:Union[str,pd.Categorical],
                         start_date:datetime,
-                        end_date:datetime   ) -> go.Figure:
+                        end_date:datetime,
+                        points:int=POINTS_MAX   ) -> go.Figure:
 
-    df = df[["Date","Volatilité_30j"]][df["Ticker"] == asset_ticker]
-    df.set_index("Date",inplace=True)
-    df = df.loc[start_date:end_date,:]
+    #AU PLUS points POINTS (MIN ET MAX PAR PAQUET DE DATES : LES PICS DE VOLATILITE RESTENT VISIBLES), TRACES EN WEBGL
+    volatilite = reduire_serie(_serie(donnees,asset_ticker,["Volatilité_30j"],start_date,end_date)["Volatilité_30j"],points)
 
-    fig = go.Figure(    data=go.Scatter(    x=df.index,
-                                            y=df["Volatilité_30j"],
+    fig = go.Figure(    data=go.Scattergl(  x=volatilite.index,
+                                            y=volatilite,
                                             name = str(asset_ticker),    )   )
     
     fig.update_layout(  xaxis_title = "Date",
@@ -136,23 +178,19 @@ def graph_volatility(   df:pd.DataFrame,
 
     return fig
 
-def graph_asset_vs_benchmark(   df:pd.DataFrame,
+def graph_asset_vs_benchmark(   donnees:Union[pd.DataFrame,MatriceLarge,TrameIndexee],
                                 asset_ticker:Union[str,pd.Categorical],
                                 benchmark_ticker:Union[str,pd.Categorical],
                                 start_date:datetime,
                                 end_date:datetime   ) -> go.Figure:
-    df1 = df.copy()
-    df1 = df1[["Date","Volatilité_30j","Rendement"]][df1["Ticker"] == asset_ticker]
+
+    df1 = _serie(donnees,asset_ticker,["Volatilité_30j","Rendement"],start_date,end_date)
     df1["Rendement"] /= 100
-    df1.set_index("Date",inplace=True)
-    df1 = df1.loc[start_date:end_date,:]
     mean_return = df1["Rendement"].rolling(30).mean().mean()
     mean_vol = df1["Volatilité_30j"].mean()
 
-    df = df[["Date","Volatilité_30j","Rendement"]][df["Ticker"] == benchmark_ticker]
+    df = _serie(donnees,benchmark_ticker,["Volatilité_30j","Rendement"],start_date,end_date)
     df["Rendement"] /= 100
-    df.set_index("Date",inplace=True)
-    df = df.loc[start_date:end_date,:]
     mean_return_benchmark = df["Rendement"].rolling(30).mean().mean()
     mean_vol_benchmark = df["Volatilité_30j"].mean()
 
@@ -195,42 +233,48 @@ def graph_asset_vs_benchmark(   df:pd.DataFrame,
 
     return fig
 
-def graph_price_asset_and_benchmark(    df:pd.DataFrame,
+def graph_price_asset_and_benchmark(    donnees:Union[pd.DataFrame,MatriceLarge,TrameIndexee],
                                         asset_ticker:Union[str,pd.Categorical],
                                         benchmark_ticker:Union[str,pd.Categorical],
                                         start_date:datetime,
-                                        end_date:datetime   ) -> go.Figure:
+                                        end_date:datetime,
+                                        points:int=POINTS_MAX   ) -> go.Figure:
 
-    df1 = df.copy()
-    df1 = df1[["Date","Prix"]][df1["Ticker"] == asset_ticker]
-    df1.set_index("Date",inplace=True)
-    df1 = df1.loc[start_date:end_date,:]
+    #AU PLUS points POINTS PAR COURBE (MIN ET MAX PAR PAQUET DE DATES), TRACES EN WEBGL
+    prix = reduire_serie(_serie(donnees,asset_ticker,["Prix"],start_date,end_date)["Prix"],points)
 
-    df = df[["Date","Prix"]][df["Ticker"] == benchmark_ticker]
-    df.set_index("Date",inplace=True)
-    df = df.loc[start_date:end_date,:]    
+    prix_benchmark = reduire_serie(_serie(donnees,benchmark_ticker,["Prix"],start_date,end_date)["Prix"],points)
 
-    fig = go.Figure(    data=go.Scatter(    x=df1.index,
-                                            y=df1["Prix"],
+    fig = go.Figure(    data=go.Scattergl(  x=prix.index,
+                                            y=prix,
                                             name = str(asset_ticker)    )   )
 
-    fig.add_scatter(    x=df1.index,
-                        y=df["Prix"],
-                        name=str(benchmark_ticker)  )
+    fig.add_trace(  go.Scattergl(   x=prix_benchmark.index,
+                                    y=prix_benchmark,
+                                    name=str(benchmark_ticker)  )   )
 
     fig.update_layout(  xaxis_title = "Date",
                         yaxis_title = "Prix"    )
     
     return fig
 
-def graph_corr( df:pd.DataFrame,
+def graph_corr( donnees:Union[pd.DataFrame,MatriceLarge,TrameIndexee],
                 asset_tickers:Union[str,pd.Categorical],
                 start_date:datetime,
                 end_date:datetime   ) -> go.Figure:
 
-    df = df[df["Ticker"].isin(asset_tickers)]
-    df = df.pivot_table(index="Date", columns="Ticker",values="Prix",observed=False)
-    df = df.loc[start_date:end_date]
+    #BLOC DATE x TICKER LU DIRECTEMENT DANS LA MATRICE LARGE, SANS PIVOT
+    if isinstance(donnees,MatriceLarge):
+        df = donnees.large("Prix",sorted(map(str,asset_tickers)),start_date,end_date)
+        df = df.dropna(how="all")
+    elif isinstance(donnees,TrameIndexee):
+        df = donnees.plusieurs(asset_tickers,["Date","Ticker","Prix"])
+        df = df.pivot_table(index="Date", columns="Ticker",values="Prix",observed=True)
+        df = df.loc[start_date:end_date]
+    else:
+        df = donnees[donnees["Ticker"].isin(asset_tickers)]
+        df = df.pivot_table(index="Date", columns="Ticker",values="Prix",observed=False)
+        df = df.loc[start_date:end_date]
     df = df.pct_change()
     df = df.corr()
 
@@ -247,7 +291,7 @@ def graph_corr( df:pd.DataFrame,
 
     return fig
 
-def graph_boxplot_vol(  df:pd.DataFrame,
+def graph_boxplot_vol(  donnees:Union[pd.DataFrame,MatriceLarge,TrameIndexee],
                         asset_ticker:Union[str,pd.Categorical,list],
                         start_date:datetime,
                         end_date:datetime   ) -> go.Figure:
@@ -256,14 +300,28 @@ def graph_boxplot_vol(  df:pd.DataFrame,
 
     fig = go.Figure()
 
-    df1 = df.copy()
     for ticker in asset_ticker:
 
-        df = df1[["Date","Volatilité_30j"]][df1["Ticker"] == ticker]
-        df.set_index("Date",inplace=True)
-        df = df.loc[start_date:end_date,:]
-
-        fig.add_trace(  go.Box( y=df["Volatilité_30j"],
+        df = _serie(donnees,ticker,["Volatilité_30j"],start_date,end_date)
+
+        #QUARTILES, MOYENNE, MOUSTACHES ET ECHANTILLON DES VALEURS ABERRANTES CALCULES ICI :
+        #QUELQUES NOMBRES PAR BOITE ENVOYES AU NAVIGATEUR QUEL QUE SOIT LE NOMBRE D'OBSERVATIONS
+        stats = statistiques_boite(df["Volatilité_30j"].to_numpy())
+
+        if stats is None:
+            fig.add_trace(  go.Box( y=[],
+                                    name=ticker )   )
+            continue
+
+        fig.add_trace(  go.Box( x=[ticker],
+                                q1=[stats["q1"]],
+                                median=[stats["median"]],
+                                q3=[stats["q3"]],
+                                mean=[stats["mean"]],
+                                lowerfence=[stats["lowerfence"]],
+                                upperfence=[stats["upperfence"]],
+                                y=[stats["aberrants"]],
+                                boxpoints="outliers",
                                 name=ticker,
                                 boxmean=True    )   )
     
@@ -272,11 +330,15 @@ def graph_boxplot_vol(  df:pd.DataFrame,
     
     return fig
 
-def graph_category_pie_chart(   df:pd.DataFrame,
+def graph_category_pie_chart(   df:Union[pd.DataFrame,TrameIndexee],
                                 asset_ticker:Union[str,pd.Categorical,list] ) -> go.Figure:
 
-    df = df[["Ticker","Secteur","Benchmark","Type_actif"]][df["Ticker"].isin(asset_ticker)]
-    df.drop_duplicates(inplace=True)
+    #UNE LIGNE PAR ACTIF : LUE DANS LA TABLE DES ATTRIBUTS DU FORMAT INDEXE, OU DEDOUBLONNEE DU FORMAT LONG
+    if isinstance(df,TrameIndexee):
+        df = df.attributs.loc[[str(ticker) for ticker in asset_ticker if ticker in df]]
+    else:
+        df = df[["Ticker","Secteur","Benchmark","Type_actif"]][df["Ticker"].isin(asset_ticker)]
+        df.drop_duplicates(inplace=True)
 
     type_counts = df["Type_actif"].value_counts()
     type_counts = type_counts[type_counts>0]
@@ -0,0 +1,159 @@
+# --- IMPORTS DES LIBRAIRIES ---
+import os                         # Pour tester l'existence du dossier des matrices
+import numpy as np                # Pour les matrices date × ticker
+import pandas as pd               # Pour manipuler les tableaux
+
+from stockage import ecrire_matrices, ouvrir_matrices
+
+# Champs du jeu final mis en matrice et précision de stockage.
+# Prix garde la double précision (comparaisons au centime), les indicateurs
+# dérivés tiennent en simple précision.
+TYPES_MATRICES = {'Prix': np.float64, 'Rendement': np.float32, 'Volatilité_30j': np.float32}
+
+
+class MatriceLarge:
+    """
+    Représentation large du jeu final : un axe des dates trié, un axe des
+    tickers et une matrice date × ticker par champ.
+
+    Les matrices sont stockées par colonne (ordre Fortran) : l'historique d'un
+    ticker est contigu, et une période se lit par arithmétique d'indices (deux
+    recherches dichotomiques sur l'axe des dates) au lieu d'un filtre booléen
+    sur toutes les lignes du format long. Une cellule sans ligne dans le
+    format long vaut NaN dans toutes les matrices ; 'Prix' sert de témoin.
+    """
+
+    def __init__(self, dates, tickers, matrices):
+        self.dates = pd.DatetimeIndex(dates, name='Date')
+        self.tickers = [str(t) for t in tickers]
+        self.matrices = matrices
+        self._colonnes = {t: i for i, t in enumerate(self.tickers)}
+
+    @classmethod
+    def depuis_long(cls, df, champs=tuple(TYPES_MATRICES)):
+        """
+        Construit les matrices à partir d'un DataFrame long (Date, Ticker, champs).
+
+        Args:
+            df (DataFrame): Données au format long.
+            champs (list): Colonnes à mettre en matrice.
+
+        Returns:
+            MatriceLarge: Matrices en mémoire.
+        """
+        dates = pd.DatetimeIndex(np.unique(df['Date'].to_numpy()))
+        tickers = pd.Index(sorted(df['Ticker'].astype(str).unique()))
+        lignes = dates.get_indexer(df['Date'])
+        colonnes = tickers.get_indexer(df['Ticker'].astype(str))
+
+        matrices = {}
+        for champ in champs:
+            matrice = np.full((len(dates), len(tickers)), np.nan,
+                              dtype=TYPES_MATRICES.get(champ, np.float64), order='F')
+            matrice[lignes, colonnes] = df[champ].to_numpy()
+            matrices[champ] = matrice
+        return cls(dates, tickers, matrices)
+
+    @classmethod
+    def ouvrir(cls, dossier, champs=None):
+        """Ouvre en mémoire mappée des matrices écrites par `ecrire`."""
+        return cls(*ouvrir_matrices(dossier, champs))
+
+    def ecrire(self, dossier):
+        """Enregistre les matrices (un .npy par champ, relisible en mémoire mappée)."""
+        ecrire_matrices(dossier, self.dates, self.tickers, self.matrices, ordre='F')
+
+    def ajouter(self, df):
+        """
+        Intègre de nouvelles lignes longues (nouvelles dates et/ou nouveaux
+        tickers) : les matrices existantes sont recopiées telles quelles dans
+        les nouveaux axes, seules les nouvelles cellules viennent de `df`.
+
+        Returns:
+            MatriceLarge: Nouvelles matrices en mémoire.
+        """
+        nouvelle = MatriceLarge.depuis_long(df, list(self.matrices))
+        dates = self.dates.union(nouvelle.dates)
+        tickers = self.tickers + [t for t in nouvelle.tickers if t not in self._colonnes]
+
+        # Bloc des cellules touchées par les nouvelles lignes
+        bloc = np.ix_(dates.get_indexer(nouvelle.dates), pd.Index(tickers).get_indexer(nouvelle.tickers))
+
+        matrices = {}
+        for champ, existante in self.matrices.items():
+            matrice = np.full((len(dates), len(tickers)), np.nan, dtype=existante.dtype, order='F')
+            matrice[dates.get_indexer(self.dates), :len(self.tickers)] = existante
+            ajout = nouvelle.matrices[champ]
+            matrice[bloc] = np.where(np.isnan(ajout), matrice[bloc], ajout)
+            matrices[champ] = matrice
+        return MatriceLarge(dates, tickers, matrices)
+
+    def colonne(self, ticker):
+        """Indice de la colonne d'un ticker (KeyError s'il est absent)."""
+        return self._colonnes[str(ticker)]
+
+    def plage(self, debut=None, fin=None):
+        """Tranche de lignes couvrant [debut, fin] (bornes incluses, comme .loc)."""
+        i = 0 if debut is None else self.dates.searchsorted(pd.Timestamp(debut), side='left')
+        j = len(self.dates) if fin is None else self.dates.searchsorted(pd.Timestamp(fin), side='right')
+        return slice(i, j)
+
+    def serie(self, ticker, champs, debut=None, fin=None):
+        """
+        Historique d'un ticker sur une période, comme les lignes correspondantes
+        du format long.
+
+        Args:
+            ticker (str): Ticker.
+            champs (list or str): Champ(s) à lire.
+            debut, fin (date): Bornes incluses de la période, tout l'historique si None.
+
+        Returns:
+            DataFrame: Index Date, une colonne par champ.
+        """
+        champs = [champs] if isinstance(champs, str) else list(champs)
+        lignes = self.plage(debut, fin)
+        j = self.colonne(ticker)
+
+        present = ~np.isnan(self.matrices['Prix'][lignes, j]) if 'Prix' in self.matrices else slice(None)
+        return pd.DataFrame({champ: self.matrices[champ][lignes, j][present] for champ in champs},
+                            index=self.dates[lignes][present])
+
+    def large(self, champ, tickers=None, debut=None, fin=None):
+        """
+        Bloc date × ticker d'un champ, équivalent d'un pivot du format long.
+
+        Returns:
+            DataFrame: Index Date, une colonne par ticker.
+        """
+        tickers = self.tickers if tickers is None else [str(t) for t in tickers]
+        lignes = self.plage(debut, fin)
+        colonnes = [self.colonne(t) for t in tickers]
+        return pd.DataFrame(self.matrices[champ][lignes][:, colonnes],
+                            index=self.dates[lignes], columns=pd.Index(tickers, name='Ticker'))
+
+    def extraire(self, tickers, debut=None, fin=None):
+        """
+        Bloc de quelques tickers sur une période, copié en mémoire une fois
+        (ordre Fortran) : les figures d'une même page y lisent leurs séries sans
+        relire les matrices complètes. Les séries et blocs lus sur l'extrait
+        sont ceux de la matrice complète sur la même période.
+
+        Returns:
+            MatriceLarge: Matrices en mémoire, tickers dans l'ordre demandé (sans doublon).
+        """
+        tickers = list(dict.fromkeys(str(t) for t in tickers))
+        lignes = self.plage(debut, fin)
+        colonnes = [self.colonne(t) for t in tickers]
+        matrices = {champ: np.asfortranarray(matrice[lignes][:, colonnes]) for champ, matrice in self.matrices.items()}
+        return MatriceLarge(self.dates[lignes], tickers, matrices)
+
+
+def charger_matrice(dossier, df=None, champs=tuple(TYPES_MATRICES)):
+    """
+    Ouvre les matrices écrites par le pipeline, ou les construit à partir du
+    format long `df` si le dossier n'existe pas (fichiers d'une version antérieure).
+    """
+    if os.path.isdir(dossier):
+        return MatriceLarge.ouvrir(dossier, list(champs))
+    return MatriceLarge.depuis_long(df, champs)
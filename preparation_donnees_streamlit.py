@@ -3,885 +3,944 @@
 
 # Phases de préparation des données
 # ===
+#
+# Pipeline en étapes nommées : dédoublonnage, filtrage des actifs trop
+# incomplets, remplissage des valeurs manquantes, enrichissement, jointure
+# avec les benchmarks, export. Chaque étape est mise en cache sur disque sous
+# une empreinte de ses entrées, de ses paramètres et de son code : une
+# relance ne recalcule que les étapes dont l'un des trois a changé.
+#
+# Utilisation : python preparation_donnees_streamlit.py [--diagnostic] [--sans-cache]
 
 # Importation des packages
 # ---
 
-# In[ ]:
-
-
+import argparse
+import filecmp
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import os
-
-
-# Lecture du fichier csv téléchargé et informations sur la base de données
-# --
-
-# In[2]:
-
-
-df = pd.read_csv("Data/donnees_financieres_300k_lignes.csv")
-df
-
-
-# In[3]:
-
-
-print(df.head(10))  # Affiche les 5 premières lignes
-
-
-# In[4]:
-
-
-df.columns
-
-
-# In[5]:
-
-
-df.index
-
-
-# In[6]:
-
-
-df.info()
-
-
-# In[8]:
-
-
-df['Date'] = pd.to_datetime(df['Date'])
-
-
-# In[9]:
-
-
-df.info()
-
-
-# In[10]:
-
-
-df['Ticker'] = df['Ticker'].astype('string')  # Conversion en string
-
-
-# In[11]:
-
-
-df.info()
-
-
-# In[12]:
-
-
-df.shape
-
-
-# In[13]:
-
-
-df.describe()  # Affiche les statistiques descriptives
-#df.describe(include='all')  # Inclut les colonnes non numériques
-
-
-# Analyse exploiratoire des données
-# --
-
-# In[14]:
-
-
-#Vérification des doublons
-
-print("🔍 Nombre de doublons :", df.duplicated().sum()) 
-
-
-
-# In[15]:
-
-
-# vérification de la plage de dates et de la cohérence des dates
-# Date minimale et maximale globale du DataFrame
-print(f"Date minimale globale : {df['Date'].min()}")
-print(f"Date maximale globale : {df['Date'].max()}")
-
-# Date minimale et maximale par ticker (très utile pour voir les débuts d'historique)
-print("\nDates minimales et maximales par Ticker :")
-print(df.groupby('Ticker')['Date'].agg(['min', 'max']))
-
-
-
-# Normal comme résultat car la prémière date de trading est le 03/01/2000 même si le téléchargement commence le 01/01/2000
-
 
-# In[16]:
-
-
-# Compter le nombre de jours uniques pour chaque ticker
-print("\nNombre de jours d'historique par Ticker :")
-print(df.groupby('Ticker')['Date'].nunique().sort_values(ascending=False))
-
-
-# In[17]:
-
-
-# Vérification des valeurs manquantes
-# Analyse complète des NA
-missing_data = df.isnull().sum().sort_values(ascending=False)
-missing_percent = (df.isnull().mean()*100).round(2)
-
-print("Valeurs manquantes par colonne:")
-print(missing_data[missing_data > 0])  # Affiche seulement les colonnes avec NA
-
-# Visualisation des NA (avec une heatmap)
-
-
-plt.figure(figsize=(10,6))
-sns.heatmap(df.isnull(), cbar=False, cmap='viridis')
-plt.title("Carte des valeurs manquantes")
-plt.show()
-#sortie du graphique : Une heatmap où :
-
- #Les lignes représentent les observations
-
-# Les colonnes représentent les variables (Date, Ticker, Prix)
-
-# Les zones jaunes/vertes montrent les valeurs manquantes (Prix)
-
-# Les zones violettes montrent les valeurs présentes
-
-
-# In[18]:
-
-
-# 1. Calcul des valeurs manquantes par ticker
-missing_by_ticker = df.groupby('Ticker')['Prix'].agg([
-    ('total_manquants', lambda x: x.isnull().sum()),
-    ('total_observations', 'count'),
-    ('pourcentage_manquants', lambda x: round(x.isnull().mean()*100, 2))
-])
-
-# 2. Filtrage et tri des tickers avec des NA
-missing_tickers = missing_by_ticker[missing_by_ticker['total_manquants'] > 0]\
-                  .sort_values('pourcentage_manquants', ascending=False)
-
-# 3. Affichage des résultats
-print("📊 Analyse détaillée des valeurs manquantes par actif:")
-print(f"• {len(missing_tickers)} actifs sur {len(missing_by_ticker)} contiennent des NA")
-print(f"• Moyenne de NA par actif: {missing_tickers['pourcentage_manquants'].mean():.1f}%")
-print("\nTop 10 des actifs avec le plus de valeurs manquantes:")
-print(missing_tickers.head(10))
-
-# 4. Visualisation
-plt.figure(figsize=(12, 8))
-
-# Histogramme des pourcentages de NA
-plt.subplot(2, 1, 1)
-sns.histplot(data=missing_tickers, x='pourcentage_manquants', bins=30)
-plt.title('Distribution des pourcentages de valeurs manquantes par actif')
-plt.xlabel('% de valeurs manquantes')
-plt.ylabel('Nombre d\'actifs')
-
-# Top 15 des actifs avec le plus de NA
-plt.subplot(2, 1, 2)
-missing_tickers.head(15)['pourcentage_manquants'].plot(kind='barh', color='salmon')
-plt.title('Top 15 des actifs avec le plus de valeurs manquantes')
-plt.xlabel('% de valeurs manquantes')
-plt.tight_layout()
-plt.show()
-
-# 5. Analyse temporelle des NA (exemple pour un ticker problématique)
-if not missing_tickers.empty:
-    sample_ticker = missing_tickers.index[0]
-    ticker_data = df[df['Ticker'] == sample_ticker][['Date', 'Prix']].set_index('Date')
-    
-    print(f"\n🔍 Analyse temporelle pour {sample_ticker}:")
-    plt.figure(figsize=(12, 4))
-    plt.plot(ticker_data['Prix'], label='Prix')
-    plt.scatter(ticker_data[ticker_data['Prix'].isnull()].index, 
-                [0]*len(ticker_data[ticker_data['Prix'].isnull()]), 
-                color='red', label='Valeurs manquantes')
-    plt.title(f'Emplacement des NA pour {sample_ticker}')
-    plt.legend()
-    plt.show()
-
-
-# Pic 0-20% :
-# 
-# 35 actifs ont peu de NA (<20%)
-# 
-# Ce sont les actifs les plus fiables (ex: grandes entreprises cotées depuis longtemps)
-# 
-# Queue droite :
-# 
-# Quelques outliers (5-10 actifs) ont 40-60% de NA
-# 
-# Probablement :
-# 
-# Cryptomonnaies récentes
-# 
-# Entreprises ayant fait faillite.
-
-# In[19]:
-
-
-# reserver aux autres qui feront la visualisation
-# Première et dernière date disponible par actif
-coverage = df.groupby('Ticker')['Date'].agg(['min', 'max', 'count'])
-coverage['duration'] = coverage['max'] - coverage['min']
-print("\nCouverture temporelle par actif:")
-print(coverage.sort_values('duration', ascending=False))
-
-# Visualisation de la couverture (nécessite plotly pour une meilleure interactivité)
-fig = px.scatter(coverage.reset_index(), 
-                 x='min', y='Ticker', 
-                 size='count',
-                 title="Couverture temporelle des actifs")
-import plotly.io as pio
-pio.renderers.default = 'browser'
-fig.show()
-
-
-# Statistiques descriptives avant le traitement des valeurs manquantes
-# ----
-
-# In[20]:
-
-
-print("📊 Statistiques AVANT nettoyage des valeurs manquantes :")
-print(df['Prix'].describe())
-
-print("\n🔍 Nombre de valeurs manquantes :", df['Prix'].isna().sum())
-print(f"🔎 Nombre de lignes : {df.shape[0]}")
-print(f"🔎 Nombre d'actifs : {df['Ticker'].nunique()}")
-
-
-# Phases de nettoyage des valeurs manquantes des doublons et justifications
-# ===
-
-# Les doublons n’ont aucun intérêt analytique ici. Chaque ligne représente une observation unique d’un prix à une date pour un actif donné. Nous les supprimons pour garantir l’unicité des observations.
-
-# In[21]:
-
-
-# 🔎 1. SUPPRESSION DES DOUBLONS
-print("Nombre de doublons avant suppression :", df.duplicated().sum())
-df.drop_duplicates(inplace=True)
-print("✔️ Doublons supprimés. Nombre de lignes restantes :", df.shape[0])
-
-
-# 
-# Tous les actifs ne sont pas comparables :
-# 
-# Les cryptomonnaies sont très récentes → historique très court
-# 
-# Les ETF peuvent aussi avoir été créés tardivement
-# 
-# Les actions comme TSLA ou META n’étaient pas cotées avant les années 2010
-# 
-# 🔍 Appliquer un seuil unique (ex. 30%) serait trop rigide et éliminerait des actifs pertinents
-# 
-# ✅ On adopte une stratégie différenciée selon le type d’actif :
-# 
-# Type d’actif	Seuil de suppression
-# Crypto	> 50 % de NaN
-# Action	> 60 % de NaN
-# ETF	> 60 % de NaN
-
-# In[28]:
-
-
-# Crée un dictionnaire manuel pour mapper les tickers à leur catégorie d’actif
-type_map = {
-    # 🔶 Cryptomonnaies
-    'BTC-USD': 'Crypto',     # Bitcoin
-    'ETH-USD': 'Crypto',     # Ethereum
-    'XRP-USD': 'Crypto',     # Ripple
-    'LTC-USD': 'Crypto',     # Litecoin
-
-    # 🔷 ETF
-    'SPY': 'ETF',            # S&P 500 ETF
-    'QQQ': 'ETF',            # Nasdaq-100 ETF
-    'DIA': 'ETF',            # Dow Jones ETF
-    'TLT': 'ETF',            # Treasury Bonds ETF (20+ years)
-    'IEF': 'ETF',            # Treasury Bonds ETF (7–10 years)
-    'GLD': 'ETF',            # Gold ETF
-    'SLV': 'ETF',            # Silver ETF
-
-    # 🔵 Actions technologiques / GAFAM
-    'AAPL': 'Action',        # Apple – Technologie
-    'MSFT': 'Action',        # Microsoft – Technologie
-    'GOOGL': 'Action',       # Alphabet/Google – Technologie
-    'META': 'Action',        # Meta (Facebook) – Réseaux sociaux
-    'AMZN': 'Action',        # Amazon – E-commerce & Cloud
-    'NFLX': 'Action',        # Netflix – Streaming
-    'NVDA': 'Action',        # Nvidia – Semi-conducteurs
-    'ADBE': 'Action',        # Adobe – Logiciels
-
-    # 🔵 Actions financières
-    'JPM': 'Action',         # JPMorgan Chase – Banque
-    'BAC': 'Action',         # Bank of America – Banque
-    'WFC': 'Action',         # Wells Fargo – Banque
-    'GS': 'Action',          # Goldman Sachs – Banque d'investissement
-    'MS': 'Action',          # Morgan Stanley – Banque d'investissement
-    'V': 'Action',           # Visa – Paiements
-    'MA': 'Action',          # Mastercard – Paiements
-
-    # 🔵 Actions industrielles
-    'GE': 'Action',          # General Electric – Industrie
-    'CAT': 'Action',         # Caterpillar – Machines industrielles
-    'BA': 'Action',          # Boeing – Aéronautique
-
-    # 🔵 Actions énergie
-    'XOM': 'Action',         # ExxonMobil – Pétrole
-    'CVX': 'Action',         # Chevron – Pétrole
-
-    # 🔵 Actions santé
-    'JNJ': 'Action',         # Johnson & Johnson – Santé
-    'LLY': 'Action',         # Eli Lilly – Santé
-    'PFE': 'Action',         # Pfizer – Pharmaceutique
-    'MRK': 'Action',         # Merck & Co – Pharmaceutique
-    'ABBV': 'Action',        # AbbVie – Biotechnologie
-    'UNH': 'Action',         # UnitedHealth – Assurance santé
-    'TMO': 'Action',         # Thermo Fisher – Biotechnologie
-
-    # 🔵 Actions consommation
-    'WMT': 'Action',         # Walmart – Distribution
-    'HD': 'Action',          # Home Depot – Bricolage
-    'COST': 'Action',        # Costco – Grande distribution
-    'DIS': 'Action',         # Disney – Divertissement
-    'NKE': 'Action',         # Nike – Équipement sportif
-    'KO': 'Action',          # Coca-Cola – Boissons
-    'PEP': 'Action',         # PepsiCo – Boissons et snacks
-    'PG': 'Action',          # Procter & Gamble – Produits ménagers
-
-    # 🔵 Actions télécoms & communication
-    'VZ': 'Action',          # Verizon – Télécom
-    'TMUS': 'Action',        # T-Mobile US – Télécom
-    'CMCSA': 'Action',       # Comcast – Télécom/Câble
-
-    # 🔵 Actions technologiques (divers)
-    'CRM': 'Action',         # Salesforce – Logiciels
-    'CSCO': 'Action',        # Cisco – Réseaux
-    'TXN': 'Action',         # Texas Instruments – Semi-conducteurs
-    'AVGO': 'Action',        # Broadcom – Semi-conducteurs
-    'DHR': 'Action',          # Danaher – Santé/Instrumentation
-    # 🔵 Actions automobiles
-    'TSLA': 'Action',     # Tesla – Véhicules électriques / Technologie
+from benchmarks import joindre_benchmarks, liste_benchmarks
+from statistiques_glissantes import ajouter_statistiques_glissantes, bornes_segments
+from valeurs_manquantes import (profil_valeurs_manquantes, fusionner_profils,
+                                comptes_mensuels, fusionner_comptes, remplir_segments)
+from matrice_large import MatriceLarge, TYPES_MATRICES
+from trame_indexee import metadonnees_tickers, LIGNES_PERIODE_MIN
+from apercu_donnees import resume_donnees, fusionner_resumes, ecrire_resumes, lire_resumes
+from stockage import (lire_donnees, lire_parquet, ecrire_parquet, ajouter_parquet,
+                      chemin_parquet, chemin_matrices, convertir_en_parquet, partitions_parquet, lire_partition,
+                      ecrire_matrices, ecrire_matrices_par_colonnes, ouvrir_matrices,
+                      typer_colonnes, rapport_memoire, chemin_colonnes, ecrire_colonnes,
+                      ecrire_colonnes_par_morceaux, ouvrir_colonnes)
+from util import type_map, secteur_map, benchmark_map
+
+
+# Emplacements des fichiers
+# ---
 
+DOSSIER_DONNEES = 'Data'
+FICHIER_BRUT = 'donnees_financieres_300k_lignes.csv'
+FICHIER_CLEAN = 'donnees_financieres_clean.csv'
+FICHIER_FINAL = 'dataframe_final_pret_pour_streamlit.csv'
+DOSSIER_CACHE = '.cache_preparation'
+# Agrégats cumulés du rendement par ticker, tenus à jour par la mise à jour incrémentale
+FICHIER_AGREGATS = 'agregats_rendement.parquet'
+# Profil des valeurs manquantes du fichier brut (dédoublonné), lu par app.py
+FICHIER_PROFIL = 'profil_valeurs_manquantes.parquet'
+# Lignes et valeurs présentes par ticker et par mois, source de la carte des valeurs manquantes
+FICHIER_COMPTES_MANQUANTS = 'comptes_valeurs_manquantes.parquet'
+# Première et dernière dates utiles, nombre de lignes et attributs par ticker, lus par app.py
+FICHIER_METADONNEES = 'metadonnees_tickers.parquet'
+# Lignes, colonnes, tickers et période des jeux brut, nettoyé et final, affichés par app.py
+FICHIER_RESUME = 'resume_jeux.json'
+
+# Tous les actifs ne sont pas comparables : les cryptomonnaies ont un historique
+# très court, certains ETF et actions (TSLA, META) ont été cotés tardivement.
+# Un seuil unique (ex. 30 %) éliminerait des actifs pertinents, on adopte donc
+# une politique par type d'actif : seuil de suppression (en % de NaN) et
+# remplissage des prix manquants restants, 'ffill_bfill' (report de la dernière
+# valeur connue, puis de la première vers le début de l'historique) ou 'ffill'
+# (report seul : les lignes antérieures au premier prix sont supprimées).
+# Un actif sans type connu n'est pas filtré et suit 'ffill_bfill'.
+POLITIQUE_NAN = {
+    'Crypto': {'seuil': 50, 'remplissage': 'ffill_bfill'},
+    'Action': {'seuil': 60, 'remplissage': 'ffill_bfill'},
+    'ETF': {'seuil': 60, 'remplissage': 'ffill_bfill'},
 }
 
 
+# Cache disque des étapes
+# ---
 
-# Pour ne pas modifier le DataFrame original (df), on crée une copie indépendante.
-# On y ajoutera la colonne Type_actif pour appliquer notre stratégie de filtrage.
-
-# In[29]:
-
-
-# On travaille sur une copie pour préserver le DataFrame original
-df_copy = df.copy()
-
-# Ajoute une colonne Type_actif grâce au mapping manuel
-df_copy['Type_actif'] = df_copy['Ticker'].map(type_map)
-
-
-# In[30]:
-
-
-# Extraction des tickers dont le Type_actif est manquant
-tickers_manquants = df_copy[df_copy['Type_actif'].isna()]['Ticker'].unique()
-
-# Affichage du résultat
-print(f"⚠️ {len(tickers_manquants)} ticker(s) n'ont pas encore de Type_actif défini :")
-print(sorted(tickers_manquants))
-
-
-# In[31]:
-
-
-# Conversion de la colonne 'Date' au format datetime
-df_copy['Date'] = pd.to_datetime(df_copy['Date'], errors='coerce')
-
-# Conversion des colonnes catégorielles en string propre
-df_copy['Ticker'] = df_copy['Ticker'].astype('string')
-df_copy['Type_actif'] = df_copy['Type_actif'].astype('string')
-
-print(df_copy.info())
-
-
-# In[32]:
-
-
-df_copy
-
-
-# On récupère les résultats de l’analyse des valeurs manquantes (missing_tickers)
-# On y ajoute aussi le type d’actif pour pouvoir filtrer selon les règles définies.
-
-# In[33]:
-
-
-df_na = missing_tickers.copy()
-df_na['Type_actif'] = df_na.index.map(type_map)
-
-
-# Application de règles spécifiques par type d’actif :
-# 
-# Suppression des cryptos avec >50 % de NaN
-# 
-# Suppression des actions et ETF avec >60 % de NaN
-
-# In[34]:
-
-
-# Définition des conditions selon le type d’actif
-condition_cryptos = (df_na['Type_actif'] == 'Crypto') & (df_na['pourcentage_manquants'] > 50)
-condition_actions = (df_na['Type_actif'] == 'Action') & (df_na['pourcentage_manquants'] > 60)
-condition_etf = (df_na['Type_actif'] == 'ETF') & (df_na['pourcentage_manquants'] > 60)
-
-# Liste finale des tickers à exclure
-tickers_exclus = df_na[condition_cryptos | condition_actions | condition_etf]
-actifs_supprimes = tickers_exclus.index.tolist()
-
-
-# On supprime uniquement les lignes correspondant aux tickers trop incomplets,
-# et on conserve les autres dans une nouvelle version propre : df_clean.
-
-# In[35]:
-
-
-# Création du DataFrame nettoyé (tickers filtrés)
-df_clean = df_copy[~df_copy['Ticker'].isin(actifs_supprimes)].copy()
-
-
-# On applique un double remplissage (ffill() + bfill()) :
-# 
-# ffill() pour remplir les trous par la dernière valeur connue (logique financière)
-# 
-# bfill() pour compléter les valeurs initiales manquantes si aucune valeur connue avant
-
-# In[36]:
-
-
-# Tri nécessaire avant le remplissage temporel
-df_clean.sort_values(by=['Ticker', 'Date'], inplace=True)
-
-# Remplissage par actif
-df_clean['Prix'] = df_clean.groupby('Ticker')['Prix'].transform(lambda x: x.ffill().bfill())
-
-
-# In[38]:
-
-
-print("🧼 Actifs supprimés selon stratégie personnalisée :\n")
-print(tickers_exclus[['Type_actif', 'total_manquants', 'pourcentage_manquants']])
-
-print(f"\n❗ Nombre total d'actifs supprimés : {len(actifs_supprimes)}")
-print("🔻 Tickeurs supprimés :")
-print(", ".join(actifs_supprimes))
-
-print(f"\n✅ Données prêtes pour analyse avec {df_clean.shape[0]} lignes et {df_clean['Ticker'].nunique()} actifs conservés.")
-
-
-# In[39]:
-
-
-print("📊 Statistiques APRÈS nettoyage des valeurs manquantes :")
-print(df_clean['Prix'].describe())
-
-print("\n🧼 Nombre de valeurs manquantes restantes :", df_clean['Prix'].isna().sum())
-print(f"✅ Nombre de lignes restantes : {df_clean.shape[0]}")
-print(f"✅ Nombre d'actifs conservés : {df_clean['Ticker'].nunique()}")
-
-
-# In[40]:
-
-
-fig, ax = plt.subplots(1, 2, figsize=(15, 5))
-sns.boxplot(data=df, x='Prix', ax=ax[0]).set_title("AVANT nettoyage")
-sns.boxplot(data=df_clean, x='Prix', ax=ax[1]).set_title("APRÈS nettoyage")
-plt.show()
-
-
-# Difficile à interpréter 
-
-# In[41]:
-
-
-# --- Visualisation des Distributions de Prix (AVANT vs APRÈS nettoyage) ---
-print("\n--- Visualisation des Distributions de Prix (AVANT vs APRÈS nettoyage) avec KDE et échelle Log ---")
-
-# Utilisez np.log1p sur les prix, en gérant les NaN pour la visualisation
-# (les NaN sont déjà gérés dans df_clean, mais on les retire pour df pour la visualisation)
-prix_avant_log = np.log1p(df['Prix'].dropna())
-prix_apres_log = np.log1p(df_clean['Prix'].dropna())
+def empreinte(*objets):
+    """
+    Empreinte SHA-256 d'une suite de DataFrames, de fonctions et de paramètres.
+
+    Les DataFrames sont hachés par contenu (valeurs, index, colonnes et types),
+    les fonctions et les modules par leur code source, le reste par sa forme JSON.
+    """
+    h = hashlib.sha256()
+    for obj in objets:
+        if isinstance(obj, pd.DataFrame):
+            h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+            h.update(repr(list(zip(obj.columns, obj.dtypes.astype(str)))).encode())
+        elif callable(obj) or inspect.ismodule(obj):
+            h.update(inspect.getsource(obj).encode())
+        else:
+            h.update(json.dumps(obj, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def etape(fonction):
+    """
+    Met en cache le DataFrame renvoyé par une étape du pipeline.
+
+    L'étape est appelée avec ses DataFrames d'entrée en arguments positionnels et
+    ses paramètres en arguments nommés. Le résultat est stocké en Parquet dans
+    `<dossier_cache>/<étape>-<empreinte>.parquet` ; `dossier_cache=None` désactive
+    le cache. L'empreinte couvre aussi les valeurs par défaut des paramètres
+    (tables de correspondance de `util` comprises) et `VERSION_PIPELINE`.
+    """
+    defauts = {nom: parametre.default for nom, parametre in inspect.signature(fonction).parameters.items()
+               if parametre.default is not inspect.Parameter.empty}
+
+    def executer(*entrees, dossier_cache=None, **parametres):
+        nom = fonction.__name__
+        if dossier_cache is None:
+            return fonction(*entrees, **parametres)
+
+        cle = empreinte(VERSION_PIPELINE, fonction, *entrees, {**defauts, **parametres})
+        chemin = os.path.join(dossier_cache, f"{nom}-{cle}.parquet")
+        if os.path.exists(chemin):
+            print(f"♻️  {nom} : résultat repris du cache")
+            return pd.read_parquet(chemin)
+
+        print(f"⚙️  {nom} : calcul")
+        resultat = fonction(*entrees, **parametres)
+        os.makedirs(dossier_cache, exist_ok=True)
+        resultat.to_parquet(chemin + '.tmp', index=True)
+        os.replace(chemin + '.tmp', chemin)
+        return resultat
+
+    executer.__name__ = fonction.__name__
+    executer.__doc__ = fonction.__doc__
+    executer.fonction = fonction
+    return executer
+
+
+# Lecture et diagnostic du fichier téléchargé
+# ---
 
-plt.figure(figsize=(12, 7))
+def charger_brut(chemin, depuis=None, tickers=None):
+    """
+    Lit le fichier long Date/Ticker/Prix (version Parquet si elle existe), en
+    ne gardant que les lignes postérieures à `depuis` et les `tickers` donnés.
+    La date est convertie en datetime et le ticker en chaîne de caractères.
+    """
+    return _convertir_brut(lire_donnees(chemin, depuis=depuis, tickers=tickers))
 
-# Superposition des deux distributions pour une comparaison directe
-sns.kdeplot(prix_avant_log, fill=True, color='skyblue', label='AVANT Nettoyage', alpha=0.6)
-sns.kdeplot(prix_apres_log, fill=True, color='lightgreen', label='APRÈS Nettoyage', alpha=0.6)
 
-plt.title('Comparaison des Distributions de Prix (échelle log) - AVANT vs APRÈS Nettoyage')
-plt.xlabel('Log(1 + Prix)')
-plt.ylabel('Densité')
-plt.legend()
-plt.grid(True)
-plt.show()
+def charger_partition_brute(partitions, ticker):
+    """
+    Lignes brutes d'un ticker lues dans les fichiers déjà repérés du jeu
+    Parquet (voir `stockage.partitions_parquet`), converties comme par `charger_brut`.
+    """
+    return _convertir_brut(lire_partition(partitions, ticker))
 
-print("\nCommentaire sur le graphique KDE :")
-print("Ce graphique de densité en échelle logarithmique permet de mieux visualiser la forme de la distribution des prix avant et après le nettoyage.")
-print("La transformation logarithmique compresse les grandes valeurs et étire les petites, rendant les différences subtiles plus apparentes.")
-print("Vous pouvez observer si la forme de la distribution a changé, si des modes ont disparu ou sont apparus, ou si la dispersion s'est modifiée suite à la suppression des actifs avec de nombreux NaN.")
 
+def _convertir_brut(df):
+    df['Date'] = pd.to_datetime(df['Date'])
+    df['Ticker'] = df['Ticker'].astype('string')
+    return df
 
-# Commentaire sur la Comparaison des Distributions de Prix (AVANT vs APRÈS Nettoyage)
-# Ce graphique montre comment les prix de nos actifs sont répartis, avant et après que nous ayons nettoyé les données. Comme les prix peuvent être très différents (certains très petits, d'autres très grands comme le Bitcoin), nous utilisons une échelle spéciale appelée "échelle logarithmique" sur l'axe des prix. Cela nous permet de bien voir toutes les valeurs, petites et grandes.
-# 
-# Courbe bleue ("AVANT Nettoyage") : Elle représente la répartition des prix bruts, tels qu'ils étaient quand nous avons téléchargé les données.
-# Courbe verte ("APRÈS Nettoyage") : Elle représente la répartition des prix après que nous ayons corrigé les données manquantes (par exemple, en supprimant les actifs qui n'existaient pas au début de notre période d'étude parce qu'ils avaient trop de données manquantes à ces dates).
-# Ce que nous pouvons observer :
-# 
-# Forme Générale Similaire : Les deux courbes se ressemblent beaucoup. Cela veut dire que notre nettoyage n'a pas radicalement changé la façon dont les prix sont répartis dans l'ensemble. La majorité des prix se regroupent toujours autour des mêmes valeurs (autour de 3 à 4 sur l'échelle log, ce qui correspond à des prix moyens après transformation).
-# Légères différences :
-# La courbe verte ("APRÈS Nettoyage") est un peu plus concentrée et a un pic légèrement plus élevé autour de la valeur moyenne. Cela est probablement dû au fait que nous avons supprimé certains actifs qui avaient beaucoup de données manquantes, surtout ceux qui n'existaient que sur une courte période ou qui avaient des prix très bas au début de leur historique. En les retirant, les données restantes sont un peu plus "homogènes" et mieux représentées.
-# On peut voir que la courbe bleue a une "queue" un peu plus large à l'extrême gauche (autour de 0-1 sur l'échelle log) qui est moins présente dans la courbe verte. Cela pourrait indiquer que le nettoyage a permis de retirer des prix très bas associés à des données incomplètes ou peu représentatives.
-# En résumé, le nettoyage des données n'a pas bouleversé la distribution générale des prix, mais il l'a rendue un peu plus précise et cohérente en enlevant les actifs qui rendaient l'analyse plus difficile à cause de leurs nombreuses valeurs manquantes.
 
-# In[ ]:
+def diagnostic(df):
+    """
+    Affiche l'analyse exploratoire du fichier brut : doublons, plage de dates,
+    historique et valeurs manquantes par actif.
+    """
+    print("🔍 Nombre de doublons :", df.duplicated().sum())
 
+    # La première date de trading est le 03/01/2000 même si le téléchargement commence le 01/01/2000
+    print(f"Date minimale globale : {df['Date'].min()}")
+    print(f"Date maximale globale : {df['Date'].max()}")
 
-# Nom du dossier pour sauvegarder le fichier
-output_dir = 'Data'
+    profil = profil_valeurs_manquantes(df)
+    coverage = profil[['premiere_date_valide', 'derniere_date_valide', 'total_observations']]\
+        .set_axis(['min', 'max', 'count'], axis=1)
+    coverage['duration'] = coverage['max'] - coverage['min']
+    print("\nCouverture temporelle par actif:")
+    print(coverage.sort_values('duration', ascending=False))
 
-# Nom du fichier CSV pour les données nettoyées
-output_filename = 'donnees_financieres_clean.csv'
+    missing_by_ticker = profil[['total_manquants', 'total_observations', 'pourcentage_manquants']]
+    missing_tickers = missing_by_ticker[missing_by_ticker['total_manquants'] > 0]\
+                      .sort_values('pourcentage_manquants', ascending=False)
 
-# Chemin complet vers le fichier de sortie
-output_path = os.path.join(output_dir, output_filename)
+    print("\n📊 Analyse détaillée des valeurs manquantes par actif:")
+    print(f"• {len(missing_tickers)} actifs sur {len(missing_by_ticker)} contiennent des NA")
+    print(f"• Moyenne de NA par actif: {missing_tickers['pourcentage_manquants'].mean():.1f}%")
+    print("\nTop 10 des actifs avec le plus de valeurs manquantes:")
+    print(missing_tickers.head(10))
+    print("\nTrous les plus longs (en jours) et nombre de trous par longueur :")
+    print(profil.filter(like='trou').sort_values('plus_long_trou', ascending=False).head(10))
 
-# Vérifier si le dossier existe, sinon le créer
-# exist_ok=True évite une erreur si le dossier existe déjà
-os.makedirs(output_dir, exist_ok=True)
+    print("\n📊 Statistiques AVANT nettoyage des valeurs manquantes :")
+    print(df['Prix'].describe())
+    print(f"🔎 Nombre de lignes : {df.shape[0]}")
+    print(f"🔎 Nombre d'actifs : {df['Ticker'].nunique()}")
 
-# Enregistrer le DataFrame df_clean en tant que fichier CSV
-# index=True est important pour inclure l'index (qui contient les dates) dans le fichier CSV
-df_clean.to_csv(output_path, index=True)
 
-print(f"Le fichier '{output_filename}' a été enregistré avec succès dans le dossier '{output_dir}'.")
-print(f"Chemin complet : {os.path.abspath(output_path)}")
+def valeurs_manquantes_par_ticker(df):
+    """Nombre et pourcentage de prix manquants par ticker (voir `valeurs_manquantes`)."""
+    return profil_valeurs_manquantes(df)[['total_manquants', 'total_observations', 'pourcentage_manquants']]
 
 
-# Phase de création de variables pertinentes pour l’analyse & Streamlit
+# Phases de nettoyage des valeurs manquantes et des doublons
 # ===
 
-# Créer des variables qui :
-# 
-# 🧭 permettent une exploration intuitive dans Streamlit
-# 
-# 📊 facilitent les visualisations dynamiques (filtres, regroupements)
-# 
-# 🔍 aident à révéler des tendances et anomalies sur les actifs
-
-# Variable secteur : Le type d’actif (Action, Crypto, ETF) est trop général pour les analyses comparatives.
-# On crée une variable Secteur pour regrouper les entreprises selon leur activité (technologie, santé, énergie...).
-# Cela permettra :
-# 
-# de filtrer dans Streamlit selon le secteur,
-# 
-# de visualiser la performance moyenne ou la volatilité par secteur,
-# 
-# d’identifier des secteurs plus risqués ou plus stables.
-
-# In[71]:
-
-
-# 🧬 1. Copier le DataFrame de base pour enrichissement
-df_enrichi = df_clean.copy()
-
-
-# 🧭 2. Appliquer le mapping secteur à partir du dictionnaire
-secteur_map = {
-    'AAPL': 'Technologie', 'MSFT': 'Technologie', 'GOOGL': 'Technologie', 'META': 'Technologie', 'ADBE': 'Technologie', 'CRM': 'Technologie',
-    'AMZN': 'E-commerce', 'NFLX': 'Divertissement', 'DIS': 'Divertissement',
-    'NVDA': 'Semi-conducteurs', 'AVGO': 'Semi-conducteurs', 'TXN': 'Semi-conducteurs', 'CSCO': 'Technologie réseaux',
-    'TSLA': 'Automobile', 'CAT': 'Industrie', 'GE': 'Industrie', 'BA': 'Aéronautique', 'DHR': 'Matériel médical',
-    'JNJ': 'Santé', 'PFE': 'Santé', 'MRK': 'Santé', 'LLY': 'Santé', 'ABBV': 'Biotechnologie', 'TMO': 'Biotechnologie', 'UNH': 'Assurance santé',
-    'JPM': 'Banque', 'BAC': 'Banque', 'WFC': 'Banque', 'GS': 'Banque', 'MS': 'Banque', 'V': 'Paiements', 'MA': 'Paiements',
-    'WMT': 'Grande distribution', 'COST': 'Grande distribution', 'HD': 'Bricolage',
-    'NKE': 'Consommation', 'PG': 'Consommation', 'KO': 'Consommation', 'PEP': 'Consommation',
-    'SPY': 'ETF', 'QQQ': 'ETF', 'DIA': 'ETF', 'TLT': 'ETF', 'IEF': 'ETF', 'GLD': 'ETF', 'SLV': 'ETF',
-    'BTC-USD': 'Crypto', 'ETH-USD': 'Crypto', 'XRP-USD': 'Crypto', 'LTC-USD': 'Crypto',
-    'CMCSA': 'Télécom', 'VZ': 'Télécom', 'TMUS': 'Télécom',
-    'CVX': 'Énergie', 'XOM': 'Énergie'
-}
-
-df_enrichi['Secteur'] = df_enrichi['Ticker'].map(secteur_map).astype('string')
-
-
-# In[72]:
-
-
-# 🔎 3. Vérifier les valeurs manquantes dans la colonne 'Secteur'
-secteurs_vides = df_enrichi[df_enrichi['Secteur'].isna()]['Ticker'].unique()
-
-if len(secteurs_vides) == 0:
-    print("✅ Tous les tickers ont un secteur attribué.")
-else:
-    print(f"⚠️ {len(secteurs_vides)} ticker(s) n'ont pas de secteur défini :")
-    print(sorted(secteurs_vides))
-
-
-# Variable "Rendement" (Returns)
-# 
-# Objectif : Calculer le rendement quotidien pour analyser la performance.
-# Définition : variation relative du prix entre deux jours consécutifs pour un même actif
-
-# In[73]:
-
-
-# 🧮 4. Calculer le rendement quotidien en pourcentage
-df_enrichi.sort_values(['Ticker', 'Date'], inplace=True)  # Tri nécessaire
-df_enrichi['Rendement'] = df_enrichi.groupby('Ticker')['Prix'].pct_change() * 100  # En %
-
-print("✅ Variable 'Rendement' (en %) créée avec succès.")
-
-
-# In[74]:
-
-
-df_enrichi
-
-
-#  Vérifier le nombre de valeurs manquantes dans Rendement
-# Donc, nombre valeurs manquantes attendu ≈ nombre de tickers dans le dataset.
-
-# In[75]:
-
-
-nb_na_rendement = df_enrichi['Rendement'].isna().sum()
-nb_total = len(df_enrichi)
-
-print(f"📊 Nombre de rendements manquants : {nb_na_rendement} / {nb_total} lignes")
-
-pourcentage_na = (nb_na_rendement / nb_total) * 100
-print(f"🔎 Pourcentage de valeurs manquantes dans 'Rendement' : {pourcentage_na:.2f}%")
-
-
-# Création de la variable Année
-# 📌 Justification :
-# Extraire des composantes temporelles permet d'analyser les données à différentes échelles.
-# La colonne Année est essentielle pour :
-# 
-# Étudier l’évolution des performances ou des risques année par année ;
-# 
-# Construire des moyennes ou courbes annuelles dans Streamlit ;
-# 
-# Appliquer des filtres temporels dans des tableaux ou des graphiques.
-
-# In[76]:
-
-
-# 🕓 S'assurer que la colonne 'Date' est bien au format datetime
-df_enrichi['Date'] = pd.to_datetime(df_enrichi['Date'], errors='coerce')
-
-# 📅 Création de la colonne 'Année'
-df_enrichi['Année'] = df_enrichi['Date'].dt.year
-
-# ✅ Vérification que toutes les années sont bien remplies
-nb_na_annee = df_enrichi['Année'].isna().sum()
-
-if nb_na_annee == 0:
-    print("✅ La colonne 'Année' a été ajoutée avec succès, sans valeur manquante.")
-else:
-    print(f"⚠️ Attention : {nb_na_annee} valeur(s) manquante(s) dans la colonne 'Année'.")
-
-
-# In[77]:
-
-
-df_enrichi
-
-
-# Création de deux colonnes de volatilité
-# 
-# La volatilité 30 jours est utile pour détecter rapidement les périodes de forte instabilité.
-# 
-# La version annualisée est plus facilement comparable entre actifs, car c’est une norme du secteur financier.
-# 
-# La volatilité quotidienne moyenne permet de :comparer le risque moyen historique des actifs (Crypto vs Actions vs ETF),générer un classement de stabilité des actifs,tracer un barplot par secteur ou par capitalisation dans Streamlit.
-
-# In[78]:
-
-
-# ✅ 1. Volatilité glissante sur 30 jours (en % journalier)
-df_enrichi['Volatilité_30j'] = df_enrichi.groupby('Ticker')['Rendement'].transform(
-    lambda x: x.rolling(window=30).std()
-)
-
-# ✅ 2. Volatilité annualisée sur 30 jours
-df_enrichi['Volatilité_30j_annualisée'] = df_enrichi['Volatilité_30j'] * np.sqrt(252)
-
-# ✅ 3. Volatilité quotidienne globale par actif
-volatilite_quotidienne = df_enrichi.groupby('Ticker')['Rendement'].std()
-
-# ➕ On la réinjecte dans le DataFrame principal (même valeur répétée par ticker)
-df_enrichi['Volatilité_quotidienne'] = df_enrichi['Ticker'].map(volatilite_quotidienne)
-
-print("✅ Variables 'Volatilité_30j', 'Volatilité_30j_annualisée' et 'Volatilité_quotidienne' ajoutées avec succès.")
-
-
-# In[79]:
-
-
-df_enrichi
-
-
-# Variable : Performance relative actif vs benchmark
-# 
-#  Objectif :
-# Comparer la performance quotidienne d’un actif à un benchmark de marché adapté pour voir si l’actif surperforme ou sous-performe en pourcentage par rapport au marché.
-# 
-# Type d’actif / Secteur	Benchmark recommandé
-# 📈 Actions (US large-cap)	SPY
-# 💻 Tech / Nasdaq	QQQ
-# 🛢️ Énergie / Industrie	DIA
-# 🏦 Obligations longues	TLT
-# 💰 Obligations courtes	IEF
-# 🪙 Crypto-monnaies	BTC-USD (optionnel)
-# 🥇 Or / Argent / matières	GLD ou SLV
-# 
-# Créer une variable Performance_vs_Benchmark dynamique, qui :
-# 
-# 🔁 Compare chaque actif à son benchmark adapté (et pas toujours SPY),
-# 
-# 🎯 Donne plus de sens aux classements dans Streamlit (une action tech comparée au Nasdaq, pas au Dow Jones !).
-
-# In[80]:
-
-
-# 📊 Association des actifs à leur benchmark logique
-benchmark_map = {
-    # Actions Tech → QQQ
-    'AAPL': 'QQQ', 'MSFT': 'QQQ', 'GOOGL': 'QQQ', 'META': 'QQQ', 'AMZN': 'QQQ', 'NVDA': 'QQQ', 'ADBE': 'QQQ', 'CRM': 'QQQ',
-
-    # Actions industrielles ou Dow Jones → DIA
-    'BA': 'DIA', 'CAT': 'DIA', 'GE': 'DIA',
-
-    # Santé & large-cap divers → SPY
-    'JNJ': 'SPY', 'PFE': 'SPY', 'MRK': 'SPY', 'LLY': 'SPY', 'UNH': 'SPY', 'TMO': 'SPY',
-    'PG': 'SPY', 'KO': 'SPY', 'PEP': 'SPY', 'DIS': 'SPY', 'NKE': 'SPY',
-    'JPM': 'SPY', 'BAC': 'SPY', 'WFC': 'SPY', 'GS': 'SPY', 'MS': 'SPY', 'V': 'SPY', 'MA': 'SPY',
-    'WMT': 'SPY', 'HD': 'SPY', 'COST': 'SPY', 'TSLA': 'SPY',
-
-    # Obligations longues → TLT
-    'TLT': 'TLT',
-
-    # Obligations courtes → IEF
-    'IEF': 'IEF',
-
-    # Matières premières
-    'GLD': 'GLD', 'SLV': 'SLV',
-
-    # Crypto → BTC comme référence
-    'ETH-USD': 'BTC-USD', 'XRP-USD': 'BTC-USD', 'LTC-USD': 'BTC-USD',
-    'BTC-USD': 'BTC-USD',
-
-    # Benchmarks eux-mêmes → 100%
-    'SPY': 'SPY', 'QQQ': 'QQQ', 'DIA': 'DIA',
-    
-     # 🔬 Biotechnologie / Santé → SPY
-    'ABBV': 'SPY',      # AbbVie – Biotech large-cap
-
-    # ⚙️ Semi-conducteurs → QQQ
-    'AVGO': 'QQQ',      # Broadcom – Tech / Semi
-    'TXN': 'QQQ',       # Texas Instruments – Semi
-    'CSCO': 'QQQ',      # Cisco – Réseaux
-
-    # 📺 Communication / Streaming → QQQ
-    'NFLX': 'QQQ',      # Netflix – Streaming (tech orientée consommation)
-
-    # 🏭 Instrumentation / Santé → SPY
-    'DHR': 'SPY',       # Danaher – Santé/Instrumentation
-
-    # 📡 Télécoms → DIA ou SPY selon préférence (ici SPY pour uniformité)
-    'CMCSA': 'SPY',     # Comcast – Télécom
-    'VZ': 'SPY',        # Verizon – Télécom
-    'TMUS': 'SPY',      # T-Mobile – Télécom
-
-    # 🛢️ Énergie → DIA ou SPY (ici SPY pour large-cap classique)
-    'XOM': 'SPY',       # ExxonMobil – Pétrole
-    'CVX': 'SPY',       # Chevron – Pétrole
-}
-
-
-# In[81]:
-
-
-# ➕ Ajout d'une colonne qui contient le benchmark adapté pour chaque ligne
-df_enrichi['Benchmark'] = df_enrichi['Ticker'].map(benchmark_map)
-
-# 📈 Création d’un dictionnaire avec les prix de chaque benchmark
-benchmark_prices = df_enrichi[df_enrichi['Ticker'].isin(set(benchmark_map.values()))]
-benchmark_series = benchmark_prices.pivot(index='Date', columns='Ticker', values='Prix')
-
-
-# 🧮 Calcul dynamique par ligne
-df_enrichi['Performance_vs_Benchmark'] = df_enrichi.apply(
-    lambda row: (row['Prix'] / benchmark_series.loc[row['Date'], row['Benchmark']] * 100)
-    if pd.notnull(row['Benchmark']) and row['Ticker'] != row['Benchmark']
-    else 100,  # Benchmark lui-même = 100
-    axis=1
-)
-
-print("✅ Variable 'Performance_vs_Benchmark' ajoutée avec succès.")
-
-
-
-# In[82]:
-
-
-# 1. Liste de tous les tickers de ton type_map
-type_map_keys = set(type_map.keys())
-
-# 2. Ton benchmark_map (doit être défini en amont comme dans la réponse précédente)
-benchmark_map_keys = set(benchmark_map.keys())
-
-# 3. Vérification des tickers manquants
-tickers_sans_benchmark = sorted(type_map_keys - benchmark_map_keys)
-
-if not tickers_sans_benchmark:
-    print("✅ Tous les tickers de type_map ont un benchmark défini dans benchmark_map.")
-else:
-    print(f"❌ {len(tickers_sans_benchmark)} ticker(s) n'ont PAS de benchmark dans benchmark_map :")
-    print(tickers_sans_benchmark)
-
-
-# In[83]:
-
-
-df_enrichi
-
-
-# In[84]:
+@etape
+def dedup(df):
+    """
+    Supprime les doublons : chaque ligne représente l'observation unique d'un
+    prix à une date pour un actif, les doublons n'ont aucun intérêt analytique.
+    """
+    return df.drop_duplicates()
+
+
+@etape
+def filtre_nan(df, politique=POLITIQUE_NAN, types_actifs=type_map, verbeux=True):
+    """
+    Ajoute la colonne Type_actif et supprime les actifs dont le pourcentage de
+    prix manquants dépasse le seuil de leur type (voir `POLITIQUE_NAN`), en une
+    seule comparaison sur la table des valeurs manquantes par ticker.
+    `types_actifs` associe son type à chaque ticker. `verbeux=False` n'affiche
+    pas le détail (traitement ticker par ticker).
+    """
+    types = df['Ticker'].map(types_actifs).astype('string')
+
+    tickers_manquants = df['Ticker'][types.isna()].unique()
+    if len(tickers_manquants) and verbeux:
+        print(f"⚠️ {len(tickers_manquants)} ticker(s) n'ont pas encore de Type_actif défini :")
+        print(sorted(tickers_manquants))
+
+    df_na = valeurs_manquantes_par_ticker(df)
+    df_na['Type_actif'] = df_na.index.map(types_actifs)
+    seuil = df_na['Type_actif'].map({t: p['seuil'] for t, p in politique.items()})
+
+    # Tickers à exclure (seuil NaN pour un type inconnu : jamais exclu)
+    tickers_exclus = df_na[(df_na['total_manquants'] > 0) & (df_na['pourcentage_manquants'] > seuil)]
+
+    if verbeux:
+        print(f"🧼 {len(tickers_exclus)} actif(s) supprimé(s) selon la stratégie par type :")
+        print(tickers_exclus[['Type_actif', 'total_manquants', 'pourcentage_manquants']])
+
+    conserve = ~df['Ticker'].isin(tickers_exclus.index).to_numpy()
+    df_filtre = df.take(np.flatnonzero(conserve))
+    df_filtre['Type_actif'] = types.array[conserve]
+    return df_filtre
+
+
+@etape
+def remplissage(df, politique=POLITIQUE_NAN):
+    """
+    Remplissage par actif selon la politique de son type (voir `POLITIQUE_NAN`) :
+    ffill reporte la dernière valeur connue (logique financière), bfill
+    complète les valeurs initiales manquantes. Les lignes sont triées par
+    (Ticker, Date) puis remplies segment par segment, sans groupby.
+    """
+    df_clean = df.sort_values(by=['Ticker', 'Date'])
+    bornes = bornes_segments(df_clean['Ticker'].to_numpy())
+
+    # Stratégie lue une fois par ticker, puis étendue à ses lignes
+    strategies = pd.Series(df_clean['Type_actif'].to_numpy()[bornes[:-1]], dtype='object')\
+        .map({t: p['remplissage'] for t, p in politique.items()}).fillna('ffill_bfill').to_numpy()
+    strategies = np.repeat(strategies, np.diff(bornes))
+
+    df_clean['Prix'] = remplir_segments(df_clean['Prix'].to_numpy(), bornes,
+                                        arriere=strategies == 'ffill_bfill')
+    # Report seul : pas de prix avant la première cotation
+    sans_prix = df_clean['Prix'].isna().to_numpy() & (strategies == 'ffill')
+    return df_clean[~sans_prix] if sans_prix.any() else df_clean
+
+
+# Phase de création de variables pertinentes pour l'analyse & Streamlit
+# ===
 
+@etape
+def enrichissement(df, fenetres=(30,), statistiques=('std',), secteurs=secteur_map, verbeux=True):
+    """
+    Ajoute le secteur (lu dans `secteurs`), le rendement quotidien (en %), l'année et trois mesures
+    de volatilité : glissante sur 30 jours, sa version annualisée (norme du
+    secteur, comparable entre actifs) et la volatilité quotidienne globale de
+    l'actif (même valeur répétée pour toutes ses lignes).
+
+    D'autres fenêtres et statistiques glissantes du rendement peuvent être
+    ajoutées (voir `statistiques_glissantes.STATISTIQUES`) : l'écart-type donne
+    les colonnes 'Volatilité_<n>j', les autres 'Rendement_<statistique>_<n>j'.
+    """
+    df_enrichi = df.copy()
+    df_enrichi['Secteur'] = df_enrichi['Ticker'].map(secteurs).astype('string')
+
+    secteurs_vides = df_enrichi[df_enrichi['Secteur'].isna()]['Ticker'].unique()
+    if len(secteurs_vides) and verbeux:
+        print(f"⚠️ {len(secteurs_vides)} ticker(s) n'ont pas de secteur défini :")
+        print(sorted(secteurs_vides))
+
+    # Variation relative du prix entre deux jours consécutifs pour un même actif
+    df_enrichi.sort_values(['Ticker', 'Date'], inplace=True)
+    df_enrichi['Rendement'] = df_enrichi.groupby('Ticker')['Prix'].pct_change() * 100
+
+    df_enrichi['Année'] = df_enrichi['Date'].dt.year
+
+    # Toutes les fenêtres en une passe sur le tableau trié, sans boucle par ticker
+    ajouter_statistiques_glissantes(
+        df_enrichi, 'Rendement', fenetres=sorted(set(fenetres) | {30}),
+        statistiques=list(dict.fromkeys(['std', *statistiques])),
+        noms=lambda stat, n: f"Volatilité_{n}j" if stat == 'std' else f"Rendement_{stat}_{n}j"
+    )
+    df_enrichi['Volatilité_30j_annualisée'] = df_enrichi['Volatilité_30j'] * np.sqrt(252)
+
+    volatilite_quotidienne = df_enrichi.groupby('Ticker')['Rendement'].std()
+    df_enrichi['Volatilité_quotidienne'] = df_enrichi['Ticker'].map(volatilite_quotidienne)
+    return df_enrichi
+
+
+def agregats_rendement(df):
+    """
+    Agrégats du rendement par ticker : nombre de rendements, somme, somme des
+    carrés, nombre de lignes et dernière date. Ils se cumulent d'une mise à
+    jour à l'autre sans relire l'historique (voir `fusionner_agregats`).
+    """
+    rendement = df['Rendement'].to_numpy(dtype=np.float64)
+    present = ~np.isnan(rendement)
+    valeurs = np.where(present, rendement, 0)
+    lignes = pd.DataFrame({'Ticker': df['Ticker'].astype(str).to_numpy(), 'n': present,
+                           'somme': valeurs, 'somme_carres': valeurs ** 2,
+                           'lignes': 1, 'derniere_date': df['Date'].to_numpy()})
+    return lignes.groupby('Ticker').agg(n=('n', 'sum'), somme=('somme', 'sum'),
+                                        somme_carres=('somme_carres', 'sum'),
+                                        lignes=('lignes', 'sum'), derniere_date=('derniere_date', 'max'))
+
+
+def fusionner_agregats(agregats, nouveaux):
+    """Cumule les agrégats de nouvelles lignes avec les agrégats existants."""
+    sommes = agregats.drop(columns='derniere_date').add(nouveaux.drop(columns='derniere_date'), fill_value=0)
+    sommes['derniere_date'] = pd.concat([agregats['derniere_date'], nouveaux['derniere_date']]).groupby(level=0).max()
+    return sommes.astype({'n': 'int64', 'lignes': 'int64'})
+
+
+def volatilite_agregats(agregats):
+    """Écart-type (ddof=1) du rendement par ticker, tiré des sommes cumulées."""
+    n = agregats['n']
+    variance = (agregats['somme_carres'] - agregats['somme'] ** 2 / n) / (n - 1)
+    return np.sqrt(variance.clip(lower=0)).where(n > 1)
+
+
+@etape
+def jointure_benchmark(df, benchmarks=benchmark_map, metriques=('ratio',), types_actifs=type_map, verbeux=True):
+    """
+    Compare chaque actif à son benchmark adapté (une action tech au Nasdaq, pas
+    au Dow Jones) : Performance_vs_Benchmark = Prix / Prix du benchmark × 100,
+    fixée à 100 pour un benchmark comparé à lui-même. D'autres métriques
+    (rendement excédentaire, surperformance cumulée) et plusieurs benchmarks par
+    actif sont disponibles, voir `benchmarks.joindre_benchmarks`.
+    """
+    tickers_sans_benchmark = sorted(set(types_actifs) - set(benchmarks))
+    if tickers_sans_benchmark and verbeux:
+        print(f"❌ {len(tickers_sans_benchmark)} ticker(s) n'ont PAS de benchmark dans benchmark_map :")
+        print(tickers_sans_benchmark)
+
+    return joindre_benchmarks(df, benchmarks, metriques=metriques)
+
+
+# Version du code des étapes
+# ---
 
-df_enrichi.columns
+# Code appelé par les étapes et l'export en dehors de leur propre source :
+# modules utilitaires et fonctions auxiliaires de ce fichier. Il fait partie de
+# l'empreinte de chaque étape et du marqueur de l'export, une correction de
+# l'un d'eux invalide les résultats mis en cache.
+VERSION_PIPELINE = empreinte(*(inspect.getmodule(f) for f in (joindre_benchmarks, ajouter_statistiques_glissantes,
+                                                              remplir_segments, MatriceLarge, metadonnees_tickers,
+                                                              resume_donnees, ecrire_colonnes)),
+                             valeurs_manquantes_par_ticker, agregats_rendement)
 
 
-# In[85]:
+# Export
+# ---
 
+def export(df_clean, df_final, dossier, dossier_cache=None, profil=None, comptes_manquants=None,
+           resume_brut=None):
+    """
+    Écrit les jeux nettoyé et final en CSV et en Parquet partitionné, ainsi
+    que le jeu final en colonnes mappées partagées par app.py (voir
+    `stockage.ecrire_colonnes`), ses matrices date × ticker (voir `matrice_large`), les
+    agrégats du rendement et les métadonnées par ticker (voir `mettre_a_jour`
+    et `trame_indexee.metadonnees_tickers`), le résumé des jeux (voir
+    `apercu_donnees`) et, s'ils sont fournis, le profil et les comptes
+    mensuels des valeurs manquantes du fichier brut (voir `valeurs_manquantes`).
+    L'écriture est sautée si les fichiers existent et correspondent déjà aux
+    mêmes données (empreinte enregistrée dans le cache).
+    """
+    chemin_clean = os.path.join(dossier, FICHIER_CLEAN)
+    chemin_final = os.path.join(dossier, FICHIER_FINAL)
+    chemin_agregats = os.path.join(dossier, FICHIER_AGREGATS)
+    chemin_metadonnees = os.path.join(dossier, FICHIER_METADONNEES)
+    chemin_resume = os.path.join(dossier, FICHIER_RESUME)
+    manquants = {chemin: df for chemin, df in [(os.path.join(dossier, FICHIER_PROFIL), profil),
+                                               (os.path.join(dossier, FICHIER_COMPTES_MANQUANTS), comptes_manquants)]
+                 if df is not None}
+    sorties = [chemin_clean, chemin_final, chemin_parquet(chemin_clean), chemin_parquet(chemin_final),
+               chemin_colonnes(chemin_final), chemin_matrices(chemin_final), chemin_agregats, chemin_metadonnees, chemin_resume,
+               *manquants]
+
+    marqueur = None
+    if dossier_cache is not None:
+        entrees = [df_clean, df_final, *manquants.values(), resume_brut]
+        marqueur = os.path.join(dossier_cache, f"export-{empreinte(VERSION_PIPELINE, export, *entrees, dossier)}.ok")
+        if os.path.exists(marqueur) and all(os.path.exists(s) for s in sorties):
+            print("♻️  export : fichiers déjà à jour")
+            return
+
+    print("⚙️  export : écriture des fichiers")
+    os.makedirs(dossier, exist_ok=True)
+
+    df_clean.to_csv(chemin_clean, index=True)
+    ecrire_parquet(df_clean, chemin_parquet(chemin_clean))
+
+    df_final.to_csv(chemin_final, index=False)
+    # Partitionné par ticker et par année, lu en priorité par app.py
+    ecrire_parquet(df_final, chemin_parquet(chemin_final), partition_annee=True)
+    # Colonnes typées et triées par (Ticker, Date), ouvertes sans copie par app.py
+    ecrire_colonnes(chemin_colonnes(chemin_final), df_final)
+    # Prix, Rendement et Volatilité_30j en matrices date × ticker pour les graphiques
+    MatriceLarge.depuis_long(df_final).ecrire(chemin_matrices(chemin_final))
+    # Point de départ des mises à jour incrémentales
+    agregats_rendement(df_final).to_parquet(chemin_agregats)
+    # Bornes des périodes proposées par app.py, sans relire l'historique
+    metadonnees_tickers(df_final).to_parquet(chemin_metadonnees)
+    # Résumé des jeux : la page de présentation n'a pas à les charger
+    resumes = {'clean': resume_donnees(df_clean), 'final': resume_donnees(df_final)}
+    ecrire_resumes(chemin_resume, resumes if resume_brut is None else {'brut': resume_brut, **resumes})
+    # Valeurs manquantes du fichier brut, lues par app.py sans relire le fichier
+    for chemin, df in manquants.items():
+        df.to_parquet(chemin)
+
+    if marqueur is not None:
+        os.makedirs(dossier_cache, exist_ok=True)
+        open(marqueur, 'w').close()
+
+    print(f"💾 '{FICHIER_CLEAN}' et '{FICHIER_FINAL}' enregistrés dans '{os.path.abspath(dossier)}'.")
+
+
+# Pipeline complet
+# ===
 
-# 🔄 Création de la version finale pour Streamlit
-dataframe_final_pret_pour_streamlit = df_enrichi.copy()
+def preparer(chemin_brut=os.path.join(DOSSIER_DONNEES, FICHIER_BRUT),
+             dossier_sortie=DOSSIER_DONNEES,
+             politique=POLITIQUE_NAN,
+             benchmarks=benchmark_map,
+             metriques_benchmark=('ratio',),
+             fenetres=(30,),
+             statistiques_rendement=('std',),
+             simple_precision=False,
+             cache=True):
+    """
+    Enchaîne les étapes de préparation et exporte les fichiers pour Streamlit.
+
+    Args:
+        chemin_brut (str): Fichier long téléchargé (Date, Ticker, Prix).
+        dossier_sortie (str): Dossier des fichiers nettoyé et final.
+        politique (dict): Seuil de NaN et remplissage par type d'actif, voir `POLITIQUE_NAN`.
+        benchmarks (dict): Benchmark (ou liste de benchmarks) associé à chaque ticker.
+        metriques_benchmark (list): Métriques relatives calculées, voir `benchmarks.METRIQUES`.
+        fenetres (list): Fenêtres glissantes (en jours de cotation) de l'enrichissement.
+        statistiques_rendement (list): Statistiques glissantes du rendement,
+            voir `statistiques_glissantes.STATISTIQUES`.
+        simple_precision (bool): Stocke les colonnes décimales des jeux
+            nettoyé et final en float32 (voir `stockage.typer_colonnes`).
+        cache (bool): Réutilise les résultats d'étapes déjà calculés.
+
+    Returns:
+        dict: DataFrames intermédiaires ('brut', 'dedup', 'clean', 'enrichi',
+            'final'), les jeux nettoyé et final au schéma déclaré.
+    """
+    dossier_cache = os.path.join(dossier_sortie, DOSSIER_CACHE) if cache else None
+
+    df = charger_brut(chemin_brut)
+    df_dedup = dedup(df, dossier_cache=dossier_cache)
+    df_filtre = filtre_nan(df_dedup, politique=politique, dossier_cache=dossier_cache)
+    df_clean = remplissage(df_filtre, politique=politique, dossier_cache=dossier_cache)
+    df_enrichi = enrichissement(df_clean, fenetres=fenetres, statistiques=statistiques_rendement,
+                                dossier_cache=dossier_cache)
+    df_final = jointure_benchmark(df_enrichi, benchmarks=benchmarks, metriques=metriques_benchmark,
+                                  dossier_cache=dossier_cache)
+
+    print(f"\n✅ Données prêtes pour analyse avec {df_clean.shape[0]} lignes "
+          f"et {df_clean['Ticker'].nunique()} actifs conservés.")
+
+    # Schéma déclaré (voir `stockage.SCHEMA`) : dates, catégories, année sur 16 bits
+    # Lignes numérotées de 0 à n - 1 dans le fichier nettoyé, comme en mode par partition
+    df_clean = typer_colonnes(df_clean.copy(deep=False), simple_precision).reset_index(drop=True)
+    df_final_type = typer_colonnes(df_final.copy(deep=False), simple_precision)
+    print("\n📦 Mémoire du jeu final par colonne, avant et après typage :")
+    print(rapport_memoire(df_final, df_final_type).to_string())
+    df_final = df_final_type
+
+    export(df_clean, df_final, dossier_sortie, dossier_cache=dossier_cache,
+           profil=profil_valeurs_manquantes(df_dedup), comptes_manquants=comptes_mensuels(df_dedup),
+           resume_brut=resume_donnees(df))
+
+    return {'brut': df, 'dedup': df_dedup, 'clean': df_clean, 'enrichi': df_enrichi, 'final': df_final}
+
+
+# Préparation ticker par ticker (hors mémoire, éventuellement en parallèle)
+# ===
 
-# 💾 Sauvegarde dans le dossier 'Data'
-dataframe_final_pret_pour_streamlit.to_csv("Data/dataframe_final_pret_pour_streamlit.csv", index=False)
+COLONNES_CLEAN = ['Date', 'Ticker', 'Prix', 'Type_actif']
+
+# Contexte d'un processus de préparation : paramètres et matrices des benchmarks
+# ouvertes en mémoire mappée (pages partagées entre processus par le système)
+_CONTEXTE = {}
+
+
+def traiter_partition(df, politique=POLITIQUE_NAN, fenetres=(30,), statistiques_rendement=('std',)):
+    """
+    Dédoublonnage, filtrage, remplissage et enrichissement des lignes brutes
+    d'un seul ticker, avec les fonctions des étapes du pipeline complet.
+
+    Returns:
+        DataFrame: Lignes enrichies du ticker, None si l'actif est filtré.
+    """
+    df = dedup.fonction(df)
+    df = filtre_nan.fonction(df, politique=politique, verbeux=False)
+    if df.empty:
+        return None
+    df = remplissage.fonction(df, politique=politique)
+    return enrichissement.fonction(df, fenetres=fenetres, statistiques=statistiques_rendement, verbeux=False)
+
+
+def _initialiser_processus(contexte, partitions=None):
+    """
+    Installe le contexte de préparation dans le processus, repère une fois les
+    fichiers du jeu brut (sauf s'ils sont donnés par `partitions`) et ouvre les
+    matrices des benchmarks.
+    """
+    _CONTEXTE.clear()
+    _CONTEXTE.update(contexte)
+    _CONTEXTE['partitions_brut'] = partitions or partitions_parquet(chemin_parquet(contexte['chemin_brut']))
+    if os.path.isdir(contexte['dossier_benchmarks']):
+        dates, tickers, matrices = ouvrir_matrices(contexte['dossier_benchmarks'])
+        _CONTEXTE['matrices_benchmarks'] = (dates, {t: j for j, t in enumerate(tickers)}, matrices)
+
+
+def _lignes_benchmark(benchmark):
+    """Lignes longues (Date, Ticker, Prix, Rendement) d'un benchmark, lues dans les matrices partagées."""
+    dates, colonnes, matrices = _CONTEXTE['matrices_benchmarks']
+    j = colonnes[benchmark]
+    prix = matrices['Prix'][:, j]
+    present = ~np.isnan(prix)
+    return pd.DataFrame({'Date': dates[present], 'Ticker': benchmark,
+                         'Prix': prix[present], 'Rendement': matrices['Rendement'][:, j][present]})
+
+
+def _preparer_ticker(position_ticker):
+    """
+    Prépare un ticker dans un processus : lecture de sa partition brute,
+    traitement, jointure avec ses benchmarks, puis écriture de ses morceaux de
+    sortie dans le dossier de travail (fragments CSV, fichiers Parquet, colonnes
+    des matrices).
+
+    Returns:
+        tuple: (ticker, (profil, comptes mensuels) des valeurs manquantes,
+            agrégats du rendement, dates, colonnes du jeu final, métadonnées
+            du ticker, résumés des lignes brutes et finales), agrégats à None
+            si l'actif est filtré.
+    """
+    i, ticker = position_ticker
+    c = _CONTEXTE
+    brut = charger_partition_brute(c['partitions_brut'], ticker)
+    sans_doublons = dedup.fonction(brut)
+    manquants = profil_valeurs_manquantes(sans_doublons), comptes_mensuels(sans_doublons)
+    enrichi = traiter_partition(brut, c['politique'], c['fenetres'], c['statistiques_rendement'])
+    if enrichi is None:
+        return ticker, manquants, None, None, None, None, (resume_donnees(brut), None)
+
+    disponibles = c['matrices_benchmarks'][1] if 'matrices_benchmarks' in c else {}
+    refs = [b for b in liste_benchmarks(c['benchmarks'].get(ticker)) if b != ticker and b in disponibles]
+    joint = jointure_benchmark.fonction(pd.concat([enrichi, *map(_lignes_benchmark, refs)], ignore_index=True),
+                                        benchmarks=c['benchmarks'], metriques=c['metriques_benchmark'],
+                                        verbeux=False)
+    final = typer_colonnes(joint[joint['Ticker'] == ticker].copy(), c['simple_precision'])
+
+    travail = c['dossier_travail']
+    final[COLONNES_CLEAN].to_csv(os.path.join(travail, f"{i}.clean.csv"), header=False, index=False)
+    final.to_csv(os.path.join(travail, f"{i}.final.csv"), header=False, index=False)
+    ajouter_parquet(final[COLONNES_CLEAN], c['parquet_clean'])
+    ajouter_parquet(final, c['parquet_final'], partition_annee=True)
+    # Lignes mises de côté pour les matrices (l'axe des dates n'est connu qu'à la fin)
+    # et pour les colonnes mappées (les catégories de tous les tickers aussi)
+    final.to_parquet(os.path.join(travail, f"{i}.parquet"))
+    return (ticker, manquants, agregats_rendement(final), final['Date'].unique(), list(final.columns),
+            metadonnees_tickers(final), (resume_donnees(brut), resume_donnees(final)))
+
+
+def preparer_par_partition(chemin_brut=os.path.join(DOSSIER_DONNEES, FICHIER_BRUT),
+                           dossier_sortie=DOSSIER_DONNEES,
+                           politique=POLITIQUE_NAN,
+                           benchmarks=benchmark_map,
+                           metriques_benchmark=('ratio',),
+                           fenetres=(30,),
+                           statistiques_rendement=('std',),
+                           simple_precision=False,
+                           nb_processus=1):
+    """
+    Même préparation et mêmes fichiers de sortie que `preparer`, mais ticker
+    par ticker : la mémoire utilisée par processus est bornée par le plus gros
+    ticker et ses benchmarks, quelle que soit la taille de l'univers.
+
+    1. Le fichier brut est lu partition par partition (il est d'abord converti
+       en Parquet partitionné par blocs s'il n'existe qu'en CSV).
+    2. Les benchmarks sont préparés en premier ; leurs prix et rendements sont
+       écrits en matrices date × benchmark, ouvertes en mémoire mappée (lecture
+       seule) par chaque processus.
+    3. Chaque ticker est préparé et joint à ses benchmarks, en parallèle sur
+       `nb_processus` processus. Chacun écrit ses propres morceaux de sortie ;
+       les résultats sont rassemblés dans l'ordre des tickers et les fragments
+       CSV mis bout à bout.
+    4. Les matrices date × ticker sont remplies colonne par colonne sur disque,
+       les colonnes mappées du jeu final ticker par ticker.
+
+    Le cache des étapes n'est pas utilisé dans ce mode. Les arguments ont le
+    même sens que pour `preparer`.
+    """
+    if not os.path.isdir(chemin_parquet(chemin_brut)):
+        print("⚙️  conversion du fichier brut en Parquet partitionné par ticker")
+        convertir_en_parquet(chemin_brut)
+    # Fichiers du jeu brut repérés une fois : chaque ticker est ensuite lu sans parcourir tout le jeu
+    partitions = partitions_parquet(chemin_parquet(chemin_brut))
+    tickers = sorted(partitions[1])
+
+    chemin_clean = os.path.join(dossier_sortie, FICHIER_CLEAN)
+    chemin_final = os.path.join(dossier_sortie, FICHIER_FINAL)
+    travail = os.path.join(dossier_sortie, '.partitions.tmp')
+    shutil.rmtree(travail, ignore_errors=True)
+    contexte = {'chemin_brut': chemin_brut, 'politique': politique, 'benchmarks': benchmarks,
+                'metriques_benchmark': metriques_benchmark, 'fenetres': fenetres,
+                'statistiques_rendement': statistiques_rendement, 'simple_precision': simple_precision,
+                'dossier_travail': travail, 'dossier_benchmarks': os.path.join(travail, 'benchmarks'),
+                'parquet_clean': os.path.join(travail, 'clean.parquet'),
+                'parquet_final': os.path.join(travail, 'final.parquet')}
+    os.makedirs(contexte['parquet_clean'])
+    os.makedirs(contexte['parquet_final'])
+
+    # Étape 2 : benchmarks préparés une fois, partagés en matrices mappées
+    references = sorted({b for t in tickers for b in liste_benchmarks(benchmarks.get(t))} & set(tickers))
+    lignes_benchmarks = [traiter_partition(charger_partition_brute(partitions, b), politique, fenetres,
+                                           statistiques_rendement) for b in references]
+    lignes_benchmarks = [df for df in lignes_benchmarks if df is not None]
+    if lignes_benchmarks:
+        # Double précision : les métriques relatives doivent être identiques à celles de `preparer`
+        larges = {champ: pd.concat(lignes_benchmarks).pivot(index='Date', columns='Ticker', values=champ)
+                  for champ in ('Prix', 'Rendement')}
+        ecrire_matrices(contexte['dossier_benchmarks'], larges['Prix'].index, list(larges['Prix'].columns),
+                        {champ: large.to_numpy(dtype=np.float64) for champ, large in larges.items()})
+    del lignes_benchmarks
+
+    # Étape 3 : tous les tickers, résultats rassemblés dans l'ordre
+    _initialiser_processus(contexte, partitions)
+    taches = list(enumerate(tickers))
+    if nb_processus > 1:
+        with ProcessPoolExecutor(nb_processus, initializer=_initialiser_processus,
+                                 initargs=(contexte,)) as pool:
+            resultats = list(pool.map(_preparer_ticker, taches, chunksize=max(1, len(taches) // (nb_processus * 8))))
+    else:
+        resultats = []
+        for i, tache in enumerate(taches, 1):
+            resultats.append(_preparer_ticker(tache))
+            if i % 100 == 0:
+                print(f"⏳ {i}/{len(taches)} tickers préparés")
+
+    conserves = [(i, r) for i, r in enumerate(resultats) if r[2] is not None]
+    exclus = sorted(r[0] for r in resultats if r[2] is None)
+
+    # Fragments CSV mis bout à bout (numéro de ligne ajouté au fichier nettoyé)
+    nb_lignes = 0
+    with open(chemin_clean + '.tmp', 'w', encoding='utf-8') as clean, \
+         open(chemin_final + '.tmp', 'w', encoding='utf-8') as final:
+        clean.write(',' + ','.join(COLONNES_CLEAN) + '\n')
+        final.write(','.join(conserves[0][1][4]) + '\n' if conserves else '\n')
+        for i, _ in conserves:
+            with open(os.path.join(travail, f"{i}.clean.csv"), encoding='utf-8') as fragment:
+                for ligne in fragment:
+                    clean.write(f"{nb_lignes},{ligne}")
+                    nb_lignes += 1
+            with open(os.path.join(travail, f"{i}.final.csv"), encoding='utf-8') as fragment:
+                shutil.copyfileobj(fragment, final)
+
+    for chemin, chemin_tmp in [(chemin_clean, chemin_clean + '.tmp'), (chemin_final, chemin_final + '.tmp'),
+                               (chemin_parquet(chemin_clean), contexte['parquet_clean']),
+                               (chemin_parquet(chemin_final), contexte['parquet_final'])]:
+        if os.path.isdir(chemin):
+            shutil.rmtree(chemin)
+        os.replace(chemin_tmp, chemin)
+
+    # Étape 4 : matrices remplies ticker par ticker, agrégats pour le mode incrémental
+    # et valeurs manquantes du fichier brut (tous les tickers, filtrés compris)
+    dates = pd.DatetimeIndex(np.unique(np.concatenate([r[3] for _, r in conserves])), name='Date')
+    ecrire_matrices_par_colonnes(
+        chemin_matrices(chemin_final), dates, [r[0] for _, r in conserves], TYPES_MATRICES,
+        ((r[0], pd.read_parquet(os.path.join(travail, f"{i}.parquet"), columns=['Date', *TYPES_MATRICES])
+          .set_index('Date')) for i, r in conserves)
+    )
+    if conserves:
+        morceaux = [os.path.join(travail, f"{i}.parquet") for i, _ in conserves]
+        types = pd.read_parquet(morceaux[0]).dtypes
+        categorielles = [col for col, dtype in types.items() if isinstance(dtype, pd.CategoricalDtype)]
+        categories = {col: set() for col in categorielles}
+        for morceau in morceaux:
+            for col, valeurs in pd.read_parquet(morceau, columns=categorielles).items():
+                categories[col].update(valeurs.cat.categories)
+        ecrire_colonnes_par_morceaux(chemin_colonnes(chemin_final), nb_lignes,
+                                     {col: 'category' if col in categories else dtype for col, dtype in types.items()},
+                                     {col: sorted(valeurs) for col, valeurs in categories.items()},
+                                     (pd.read_parquet(morceau) for morceau in morceaux))
+    pd.concat([r[2] for _, r in conserves]).to_parquet(os.path.join(dossier_sortie, FICHIER_AGREGATS))
+    pd.concat([r[5] for _, r in conserves]).to_parquet(os.path.join(dossier_sortie, FICHIER_METADONNEES))
+    pd.concat([r[1][0] for r in resultats]).sort_index().to_parquet(os.path.join(dossier_sortie, FICHIER_PROFIL))
+    fusionner_comptes(*[r[1][1] for r in resultats]).to_parquet(
+        os.path.join(dossier_sortie, FICHIER_COMPTES_MANQUANTS))
+    if conserves:
+        resume_final = fusionner_resumes(*[r[6][1] for _, r in conserves])
+        ecrire_resumes(os.path.join(dossier_sortie, FICHIER_RESUME),
+                       {'brut': fusionner_resumes(*[r[6][0] for r in resultats]),
+                        'clean': {**resume_final, 'colonnes': COLONNES_CLEAN}, 'final': resume_final})
+    shutil.rmtree(travail)
+
+    print(f"🧼 {len(exclus)} actif(s) supprimé(s) selon la stratégie par type : {exclus}")
+    print(f"✅ Données prêtes pour analyse avec {nb_lignes} lignes et {len(conserves)} actifs conservés.")
+    print(f"💾 '{FICHIER_CLEAN}' et '{FICHIER_FINAL}' enregistrés dans '{os.path.abspath(dossier_sortie)}'.")
+
+
+# Mise à jour incrémentale
+# ===
 
-print("✅ DataFrame sauvegardé sous le nom 'dataframe_final_pret_pour_streamlit.csv' dans le dossier 'Data'.")
+def mettre_a_jour(chemin_brut=os.path.join(DOSSIER_DONNEES, FICHIER_BRUT),
+                  dossier_sortie=DOSSIER_DONNEES,
+                  benchmarks=benchmark_map,
+                  metriques_benchmark=('ratio',),
+                  fenetres=(30,),
+                  statistiques_rendement=('std',)):
+    """
+    Prépare uniquement les jours ajoutés au fichier brut depuis la dernière
+    préparation (voir `telechargement_donnees.py --incremental`) et les ajoute
+    aux fichiers de sortie, pour un coût proportionnel au nombre de nouvelles lignes.
+
+    - Seules les lignes brutes postérieures à la dernière date préparée sont lues.
+    - Le profil et les comptes mensuels des valeurs manquantes sont complétés
+      par ceux des nouvelles lignes.
+    - Les fenêtres glissantes reprennent les max(fenetres) dernières lignes de
+      chaque ticker dans le jeu final (partitions des années récentes).
+    - La volatilité quotidienne vient des agrégats cumulés (nombre, somme, somme
+      des carrés) : les nouvelles lignes portent la valeur à jour, les lignes
+      déjà écrites gardent la leur jusqu'à la prochaine préparation complète.
+    - Le résumé des jeux est complété par celui des lignes ajoutées.
+    - Les métadonnées par ticker gardent leur première date et leurs
+      attributs ; dernière date, nombre de lignes et dernière date de début
+      sont recalculés sur la queue et les nouvelles lignes.
+    - Les actifs filtrés lors de la préparation complète restent exclus ; un
+      nouveau ticker demande une préparation complète.
+
+    Les arguments ont le même sens que pour `preparer`. La surperformance
+    cumulée, qui dépend de la première ligne de chaque actif, n'est pas
+    disponible en mode incrémental.
+
+    Returns:
+        DataFrame: Nouvelles lignes du jeu final (vide si rien à ajouter).
+    """
+    if 'surperformance_cumulee' in metriques_benchmark:
+        raise ValueError("La surperformance cumulée demande une préparation complète.")
+
+    chemin_agregats = os.path.join(dossier_sortie, FICHIER_AGREGATS)
+    chemin_clean = os.path.join(dossier_sortie, FICHIER_CLEAN)
+    chemin_final = os.path.join(dossier_sortie, FICHIER_FINAL)
+    if not os.path.exists(chemin_agregats):
+        print("⚠️ Aucune préparation complète trouvée : préparation complète lancée.")
+        return preparer(chemin_brut, dossier_sortie, benchmarks=benchmarks,
+                        metriques_benchmark=metriques_benchmark, fenetres=fenetres,
+                        statistiques_rendement=statistiques_rendement)['final']
+
+    agregats = pd.read_parquet(chemin_agregats)
+    chemin_profil = os.path.join(dossier_sortie, FICHIER_PROFIL)
+    profil = pd.read_parquet(chemin_profil) if os.path.exists(chemin_profil) else None
+    depuis = agregats['derniere_date'].min()
+    if profil is not None:
+        depuis = min(depuis, profil['derniere_date'].min())
+    brut = charger_brut(chemin_brut, depuis)
+
+    # Valeurs manquantes : lignes postérieures à la dernière date profilée de
+    # chaque ticker, actifs filtrés compris
+    if profil is not None:
+        ajout = brut[brut['Ticker'].isin(profil.index)]
+        ajout = ajout[ajout['Date'] > ajout['Ticker'].map(profil['derniere_date'])].drop_duplicates()
+        fusionner_profils(profil, profil_valeurs_manquantes(ajout)).to_parquet(chemin_profil)
+        chemin_comptes = os.path.join(dossier_sortie, FICHIER_COMPTES_MANQUANTS)
+        if os.path.exists(chemin_comptes):
+            fusionner_comptes(pd.read_parquet(chemin_comptes), comptes_mensuels(ajout)).to_parquet(chemin_comptes)
+
+    # Résumé du fichier brut : lignes postérieures à la dernière date résumée
+    chemin_resume = os.path.join(dossier_sortie, FICHIER_RESUME)
+    resumes = lire_resumes(chemin_resume) if os.path.exists(chemin_resume) else None
+    if resumes is not None and 'brut' in resumes:
+        ajout = brut if resumes['brut']['fin'] is None else brut[brut['Date'] > pd.Timestamp(resumes['brut']['fin'])]
+        resumes['brut'] = fusionner_resumes(resumes['brut'], resume_donnees(ajout))
+
+    # Nouvelles lignes brutes des actifs conservés
+    ignores = sorted(set(brut['Ticker']) - set(agregats.index))
+    if ignores:
+        print(f"ℹ️ {len(ignores)} ticker(s) non retenus par la dernière préparation complète (filtrés ou nouveaux), ignorés :")
+        print(ignores)
+    brut = brut[brut['Ticker'].isin(agregats.index)]
+    brut = brut[brut['Date'] > brut['Ticker'].map(agregats['derniere_date'])].drop_duplicates()
+    if brut.empty:
+        if resumes is not None:
+            ecrire_resumes(chemin_resume, resumes)
+        print("✅ Aucune nouvelle ligne à préparer.")
+        return brut
+
+    # Dernières lignes de chaque ticker : dernier prix connu, fenêtres glissantes
+    # et dernière date de début d'une période d'analyse
+    profondeur = max(*fenetres, LIGNES_PERIODE_MIN)
+    debut_queue = depuis - pd.Timedelta(days=2 * profondeur)
+    queue = lire_parquet(chemin_parquet(chemin_final), colonnes=['Date', 'Ticker', 'Prix', 'Type_actif'],
+                         tickers=list(agregats.index),
+                         annees=range(debut_queue.year, brut['Date'].max().year + 1))
+    # Les nouvelles lignes gardent la précision du jeu existant
+    simple_precision = queue['Prix'].dtype == np.float32
+    queue['Ticker'] = queue['Ticker'].astype('string')
+    queue['Type_actif'] = queue['Type_actif'].astype('string')
+    queue = queue.groupby('Ticker').tail(profondeur)
+
+    nouveau = brut.copy()
+    nouveau['Type_actif'] = nouveau['Ticker'].map(type_map).astype('string')
+    combine = pd.concat([queue, nouveau], ignore_index=True)
+    combine['Nouveau'] = np.r_[np.zeros(len(queue), bool), np.ones(len(nouveau), bool)]
+    combine = combine.sort_values(['Ticker', 'Date'])
+    # Remplissage : report du dernier prix connu (l'historique n'a pas de NaN initial)
+    combine['Prix'] = combine.groupby('Ticker')['Prix'].ffill()
+
+    # Mêmes calculs que la préparation complète, sur la queue et les nouvelles lignes
+    enrichi = enrichissement.fonction(combine, fenetres=fenetres, statistiques=statistiques_rendement)
+    recentes = metadonnees_tickers(enrichi)
+    enrichi = enrichi[enrichi.pop('Nouveau')]
+
+    agregats = fusionner_agregats(agregats, agregats_rendement(enrichi))
+    enrichi['Volatilité_quotidienne'] = enrichi['Ticker'].map(volatilite_agregats(agregats))
+
+    final = jointure_benchmark.fonction(enrichi, benchmarks=benchmarks, metriques=metriques_benchmark)
+    final = typer_colonnes(final, simple_precision)
+    clean = final[['Date', 'Ticker', 'Prix', 'Type_actif']]
+
+    # Ajout aux sorties, dans l'ordre des colonnes des fichiers existants
+    colonnes_final = pd.read_csv(chemin_final, nrows=0).columns
+    final[colonnes_final].to_csv(chemin_final, mode='a', header=False, index=False)
+    clean.set_axis(pd.RangeIndex(agregats['lignes'].sum() - len(clean), agregats['lignes'].sum()))\
+         .to_csv(chemin_clean, mode='a', header=False, index=True)
+    ajouter_parquet(clean, chemin_parquet(chemin_clean))
+    ajouter_parquet(final[colonnes_final], chemin_parquet(chemin_final), partition_annee=True)
+    MatriceLarge.ouvrir(chemin_matrices(chemin_final)).ajouter(final).ecrire(chemin_matrices(chemin_final))
+    if os.path.isdir(chemin_colonnes(chemin_final)):
+        ecrire_colonnes(chemin_colonnes(chemin_final),
+                        pd.concat([ouvrir_colonnes(chemin_colonnes(chemin_final)), final[colonnes_final]],
+                                  ignore_index=True))
+    agregats.to_parquet(chemin_agregats)
+    chemin_metadonnees = os.path.join(dossier_sortie, FICHIER_METADONNEES)
+    if os.path.exists(chemin_metadonnees):
+        metadonnees = pd.read_parquet(chemin_metadonnees)
+        colonnes = ['derniere_date', 'derniere_date_debut']
+        metadonnees.loc[recentes.index, colonnes] = recentes[colonnes]
+        metadonnees['lignes'] = agregats['lignes'].reindex(metadonnees.index).astype(metadonnees['lignes'].dtype)
+        metadonnees.to_parquet(chemin_metadonnees)
+    if resumes is not None:
+        resumes['clean'] = fusionner_resumes(resumes['clean'], resume_donnees(clean))
+        resumes['final'] = fusionner_resumes(resumes['final'], resume_donnees(final[colonnes_final]))
+        ecrire_resumes(chemin_resume, resumes)
+
+    print(f"✅ {len(final)} nouvelle(s) ligne(s) préparée(s) pour {final['Ticker'].nunique()} actif(s), "
+          f"jusqu'au {final['Date'].max().date()}.")
+    return final
+
+
+# Vérification
+# ===
 
+def verifier_modes(chemin_brut=os.path.join(DOSSIER_DONNEES, FICHIER_BRUT), nb_processus=1):
+    """
+    Prépare le fichier brut en mémoire (`preparer`, sans cache) puis ticker par
+    ticker (`preparer_par_partition`) dans deux dossiers temporaires, et vérifie
+    que les fichiers nettoyé et final des deux modes sont identiques octet par octet.
+
+    Returns:
+        bool: True si les deux modes écrivent les mêmes fichiers.
+    """
+    with tempfile.TemporaryDirectory() as dossier:
+        complet, par_partition = os.path.join(dossier, 'complet'), os.path.join(dossier, 'par_partition')
+        preparer(chemin_brut, complet, cache=False)
+        preparer_par_partition(chemin_brut, par_partition, nb_processus=nb_processus)
+        differents = [fichier for fichier in (FICHIER_CLEAN, FICHIER_FINAL)
+                      if not filecmp.cmp(os.path.join(complet, fichier), os.path.join(par_partition, fichier),
+                                         shallow=False)]
+
+    for fichier in differents:
+        print(f"❌ '{fichier}' diffère entre la préparation complète et la préparation par partition")
+    if not differents:
+        print(f"✅ '{FICHIER_CLEAN}' et '{FICHIER_FINAL}' identiques dans les deux modes")
+    return not differents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Préparation des données pour Streamlit")
+    parser.add_argument('--entree', default=os.path.join(DOSSIER_DONNEES, FICHIER_BRUT),
+                        help="Fichier long téléchargé (Date, Ticker, Prix)")
+    parser.add_argument('--sortie', default=DOSSIER_DONNEES,
+                        help="Dossier des fichiers nettoyé et final")
+    parser.add_argument('--sans-cache', action='store_true',
+                        help="Recalcule toutes les étapes sans lire ni écrire le cache")
+    parser.add_argument('--diagnostic', action='store_true',
+                        help="Affiche l'analyse exploratoire du fichier brut")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne prépare que les jours ajoutés depuis la dernière préparation")
+    parser.add_argument('--par-partition', action='store_true',
+                        help="Prépare ticker par ticker, en mémoire bornée (grands univers)")
+    parser.add_argument('--processus', type=int, default=1,
+                        help="Nombre de processus du mode --par-partition")
+    parser.add_argument('--simple-precision', action='store_true',
+                        help="Stocke prix, rendements et volatilités en float32 (mémoire divisée par deux)")
+    parser.add_argument('--verifier', action='store_true',
+                        help="Vérifie que les modes complet et --par-partition écrivent les mêmes fichiers")
+    args = parser.parse_args()
+
+    if args.diagnostic:
+        diagnostic(charger_brut(args.entree))
+
+    if args.verifier:
+        if not verifier_modes(args.entree, args.processus):
+            raise SystemExit(1)
+    elif args.incremental:
+        mettre_a_jour(args.entree, args.sortie)
+    elif args.par_partition:
+        preparer_par_partition(args.entree, args.sortie, simple_precision=args.simple_precision,
+                               nb_processus=args.processus)
+    else:
+        preparer(args.entree, args.sortie, simple_precision=args.simple_precision, cache=not args.sans_cache)
+
+
+if __name__ == "__main__":
+    main()
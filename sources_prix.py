@@ -0,0 +1,188 @@
+# --- IMPORTS DES LIBRAIRIES ---
+import os                         # Pour détecter le format du fichier de fixture
+import threading                  # Pour charger la fixture une seule fois entre threads
+import zlib                       # Pour dériver une graine stable par ticker
+from abc import ABC, abstractmethod   # Pour l'interface commune des sources
+import numpy as np                # Pour la génération synthétique
+import pandas as pd               # Pour manipuler les tableaux
+
+from util import type_map
+
+# Champs d'une barre journalière
+CHAMPS_OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+# --- INTERFACE COMMUNE ---
+class SourcePrix(ABC):
+    """
+    Interface d'une source de prix utilisée par `telecharger_donnees_massives`.
+
+    Une source renvoie, pour un ticker, un DataFrame indexé par date (index
+    'Date', sans fuseau horaire) contenant les champs de `CHAMPS_OHLCV`
+    disponibles, au moins 'Close'. Les dates sans cotation sont absentes de l'index.
+    """
+
+    @abstractmethod
+    def telecharger(self, ticker, start_date, end_date):
+        """
+        Args:
+            ticker (str): Symbole boursier.
+            start_date (str): Date de début incluse, format 'YYYY-MM-DD'.
+            end_date (str): Date de fin exclue, format 'YYYY-MM-DD'.
+
+        Returns:
+            DataFrame: Barres journalières du ticker sur la période.
+        """
+
+
+# --- SOURCE YAHOO FINANCE ---
+class SourceYahoo(SourcePrix):
+    """Cours ajustés téléchargés depuis Yahoo Finance."""
+
+    def telecharger(self, ticker, start_date, end_date):
+        import yfinance as yf
+
+        # yf.download partage un état global entre les appels : on passe par
+        # Ticker.history, utilisable depuis plusieurs threads à la fois.
+        data = yf.Ticker(ticker).history(start=start_date, end=end_date, auto_adjust=True)
+
+        # Les index Yahoo sont localisés (New York pour les actions, UTC pour les cryptos)
+        if data.index.tz is not None:
+            data.index = data.index.tz_localize(None)
+        data.index = data.index.normalize()
+        data.index.name = 'Date'
+        return data[[c for c in CHAMPS_OHLCV if c in data.columns]]
+
+
+# --- SOURCE FICHIER LOCAL (CSV OU PARQUET) ---
+class SourceFichier(SourcePrix):
+    """
+    Relit un fichier long Date/Ticker/Prix (CSV ou Parquet), par exemple un
+    fichier produit par un téléchargement précédent, pour travailler hors ligne.
+    Les colonnes Open/High/Low/Volume sont reprises si le fichier les contient.
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self._donnees = None
+        self._verrou = threading.Lock()
+
+    def _charger(self):
+        with self._verrou:
+            if self._donnees is None:
+                if os.path.splitext(self.chemin)[1] == '.parquet' or os.path.isdir(self.chemin):
+                    df = pd.read_parquet(self.chemin)
+                else:
+                    df = pd.read_csv(self.chemin, parse_dates=['Date'])
+                df['Date'] = pd.to_datetime(df['Date'])
+                df['Ticker'] = df['Ticker'].astype(str)
+                df = df.rename(columns={'Prix': 'Close'}).dropna(subset=['Close'])
+                df = df[['Date', 'Ticker'] + [c for c in CHAMPS_OHLCV if c in df.columns]]
+                self._donnees = {t: g.set_index('Date').drop(columns='Ticker').sort_index()
+                                 for t, g in df.groupby('Ticker', sort=False)}
+        return self._donnees
+
+    def telecharger(self, ticker, start_date, end_date):
+        donnees = self._charger()
+        if ticker not in donnees:
+            return pd.DataFrame(columns=['Close'], index=pd.DatetimeIndex([], name='Date'))
+        barres = donnees[ticker]
+        return barres[(barres.index >= start_date) & (barres.index < end_date)]
+
+
+# --- SOURCE SYNTHÉTIQUE REPRODUCTIBLE ---
+class SourceSynthetique(SourcePrix):
+    """
+    Génère des prix aléatoires reproductibles (mouvement brownien géométrique).
+
+    Chaque ticker a sa propre graine dérivée de `seed` et de son nom : la série
+    est identique quel que soit l'ordre ou la période demandée. Les cryptos
+    cotent tous les jours (week-ends compris), les autres actifs les jours
+    ouvrés ; une partie des actifs est introduite en cours de période et
+    quelques cotations sont retirées au hasard pour créer des trous.
+    """
+
+    def __init__(self, seed=0, debut_historique='2000-01-01', fin_historique='2024-12-31',
+                 part_introductions=0.4, taux_trous=0.01):
+        self.seed = seed
+        self.debut_historique = pd.Timestamp(debut_historique)
+        self.fin_historique = pd.Timestamp(fin_historique)
+        self.part_introductions = part_introductions
+        self.taux_trous = taux_trous
+        # Calendriers calculés une fois (date_range en jours ouvrés est coûteux)
+        self._calendriers = {freq: pd.date_range(self.debut_historique, self.fin_historique,
+                                                 freq=freq, name='Date')
+                             for freq in ('D', 'B')}
+
+    @staticmethod
+    def est_crypto(ticker):
+        return type_map.get(ticker) == 'Crypto' or ticker.endswith('-USD')
+
+    def barres(self, ticker):
+        """
+        Returns:
+            DataFrame: Barres OHLCV du ticker sur tout l'historique synthétique.
+        """
+        rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode())])
+        crypto = self.est_crypto(ticker)
+        dates = self._calendriers['D' if crypto else 'B']
+        jours = 365 if crypto else 252
+
+        # Paramètres annuels tirés par actif, plus volatils pour les cryptos
+        drift = rng.normal(0.08, 0.05)
+        vol = rng.uniform(0.6, 1.0) if crypto else rng.uniform(0.15, 0.45)
+        log_rendements = rng.normal((drift - vol ** 2 / 2) / jours, vol / np.sqrt(jours), len(dates))
+        close = rng.uniform(5, 500) * np.exp(np.cumsum(log_rendements))
+
+        # Ouverture proche de la clôture précédente, extrêmes autour du corps de bougie
+        vol_jour = vol / np.sqrt(jours)
+        open_ = np.concatenate([[close[0]], close[:-1]]) * np.exp(rng.normal(0, vol_jour / 4, len(dates)))
+        amplitude = np.abs(rng.normal(0, vol_jour / 2, (2, len(dates))))
+        high = np.maximum(open_, close) * np.exp(amplitude[0])
+        low = np.minimum(open_, close) * np.exp(-amplitude[1])
+        volume = rng.lognormal(np.log(rng.uniform(1e5, 5e7)), 0.5, len(dates)).astype(np.int64)
+
+        garde = rng.random(len(dates)) >= self.taux_trous
+        if rng.random() < self.part_introductions:
+            garde[:int(rng.uniform(0, 0.7) * len(dates))] = False
+
+        return pd.DataFrame({'Open': open_[garde], 'High': high[garde], 'Low': low[garde],
+                             'Close': close[garde], 'Volume': volume[garde]},
+                            index=dates[garde])
+
+    def telecharger(self, ticker, start_date, end_date):
+        barres = self.barres(ticker)
+        return barres[(barres.index >= start_date) & (barres.index < end_date)]
+
+
+# --- JEU DE DONNÉES SYNTHÉTIQUE AU FORMAT LONG ---
+def tickers_synthetiques(nb_tickers):
+    """
+    Univers de `nb_tickers` symboles : les tickers réels d'abord (pour garder
+    les benchmarks), puis des symboles 'SYN00001' (un sur quatorze en crypto '-USD').
+    """
+    reels = list(type_map)[:nb_tickers]
+    supplementaires = [f"SYN{i:05d}" + ('-USD' if i % 14 == 0 else '')
+                       for i in range(1, nb_tickers - len(reels) + 1)]
+    return reels + supplementaires
+
+
+def generer_donnees_longues(nb_tickers, nb_annees, debut='2000-01-01', seed=0):
+    """
+    Produit directement un DataFrame long Date/Ticker/Prix comparable au fichier
+    téléchargé, pour tester la préparation et l'application à grande échelle.
+
+    Args:
+        nb_tickers (int): Nombre d'actifs.
+        nb_annees (int): Nombre d'années d'historique.
+        debut (str): Première date de l'historique.
+        seed (int): Graine du générateur.
+
+    Returns:
+        DataFrame: Colonnes 'Date', 'Ticker', 'Prix' (NaN les jours sans cotation).
+    """
+    fin = pd.Timestamp(debut) + pd.DateOffset(years=nb_annees) - pd.Timedelta(days=1)
+    source = SourceSynthetique(seed=seed, debut_historique=debut, fin_historique=fin)
+
+    wide = pd.concat([source.barres(t)['Close'].rename(t) for t in tickers_synthetiques(nb_tickers)], axis=1)
+    return pd.melt(wide.reset_index(), id_vars=['Date'], var_name='Ticker', value_name='Prix')
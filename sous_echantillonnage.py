@@ -0,0 +1,142 @@
+# --- IMPORTS DES LIBRAIRIES ---
+import numpy as np                # Pour les calculs vectorisés
+import pandas as pd               # Pour manipuler les séries
+
+# Nombre de points d'une courbe envoyée au navigateur : de l'ordre du nombre de
+# pixels d'un graphique, quelle que soit la longueur de la période affichée
+POINTS_MAX = 2000
+
+# Méthodes de réduction disponibles
+METHODES = ('min_max', 'lttb')
+
+
+def indices_min_max(y, points):
+    """
+    Positions du minimum et du maximum de chaque paquet de positions
+    consécutives ((`points` - 2) // 2 paquets), plus la première et la dernière.
+    Les pics et les creux restent visibles quelle que soit la réduction.
+
+    Args:
+        y (array): Valeurs, sans NaN.
+        points (int): Nombre maximal de points gardés.
+
+    Returns:
+        ndarray: Positions gardées, croissantes.
+    """
+    n = len(y)
+    paquets = (points - 2) // 2
+    if n <= points or paquets < 1:
+        return np.arange(n)
+    bornes = np.linspace(0, n, paquets + 1).astype(np.int64)
+    # Tri par paquet puis par valeur : le paquet k occupe [bornes[k], bornes[k+1]) dans l'ordre trié
+    ordre = np.lexsort((y, np.repeat(np.arange(paquets), np.diff(bornes))))
+    return np.unique(np.concatenate([[0, n - 1], ordre[bornes[:-1]], ordre[bornes[1:] - 1]]))
+
+
+def indices_lttb(x, y, points):
+    """
+    Positions gardées par Largest-Triangle-Three-Buckets : la première, la
+    dernière, et dans chaque paquet intermédiaire le point qui forme le plus
+    grand triangle avec le point gardé dans le paquet précédent et la moyenne
+    du paquet suivant. La forme de la courbe est conservée avec `points` points.
+
+    Args:
+        x (array): Abscisses croissantes (numériques), sans NaN.
+        y (array): Valeurs, sans NaN.
+        points (int): Nombre maximal de points gardés.
+
+    Returns:
+        ndarray: Positions gardées, croissantes.
+    """
+    n = len(y)
+    if n <= points or points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # points - 2 paquets entre la première et la dernière position
+    bornes = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    bornes_suivantes = np.append(bornes[2:], n)
+    gardes = np.empty(points, dtype=np.int64)
+    gardes[0], gardes[-1] = 0, n - 1
+
+    a = 0
+    for k in range(points - 2):
+        debut, fin = bornes[k], bornes[k + 1]
+        x_suivant = x[fin:bornes_suivantes[k]].mean()
+        y_suivant = y[fin:bornes_suivantes[k]].mean()
+        aires = np.abs((x[a] - x_suivant) * (y[debut:fin] - y[a]) - (x[a] - x[debut:fin]) * (y_suivant - y[a]))
+        a = debut + int(np.argmax(aires))
+        gardes[k + 1] = a
+    return gardes
+
+
+def reduire_serie(serie, points=POINTS_MAX, methode='min_max'):
+    """
+    Série réduite à au plus `points` points pour l'affichage, NaN retirés.
+
+    Args:
+        serie (Series): Valeurs indexées par date.
+        points (int): Nombre maximal de points, pas de réduction si None.
+        methode (str): 'min_max' ou 'lttb' (voir `METHODES`).
+
+    Returns:
+        Series: Sous-ensemble des points de la série, dans l'ordre des dates.
+    """
+    if methode not in METHODES:
+        raise ValueError(f"Méthode inconnue : {methode} (attendu : {', '.join(METHODES)}).")
+    serie = serie.dropna()
+    if points is None or len(serie) <= points:
+        return serie
+    if methode == 'lttb':
+        abscisses = serie.index.asi8 if isinstance(serie.index, pd.DatetimeIndex) else serie.index.to_numpy()
+        positions = indices_lttb(abscisses, serie.to_numpy(), points)
+    else:
+        positions = indices_min_max(serie.to_numpy(), points)
+    return serie.iloc[positions]
+
+
+def histogramme(valeurs, classes=300):
+    """
+    Histogramme normalisé (probabilité par classe) de valeurs, NaN ignorés.
+
+    Args:
+        valeurs (array): Observations.
+        classes (int): Nombre de classes de même largeur.
+
+    Returns:
+        tuple: (centres des classes, largeur d'une classe, probabilités).
+    """
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    valeurs = valeurs[np.isfinite(valeurs)]
+    comptes, bornes = np.histogram(valeurs, bins=classes)
+    probabilites = comptes / max(len(valeurs), 1)
+    return (bornes[:-1] + bornes[1:]) / 2, bornes[1] - bornes[0], probabilites
+
+
+def statistiques_boite(valeurs, aberrants_max=100):
+    """
+    Statistiques d'une boîte à moustaches, mêmes conventions que Plotly
+    (quartiles par interpolation linéaire, moustaches à la dernière valeur
+    comprise dans 1,5 écart interquartile), NaN ignorés.
+
+    Args:
+        valeurs (array): Observations.
+        aberrants_max (int): Nombre maximal de valeurs aberrantes renvoyées,
+            régulièrement espacées dans l'ordre des valeurs (les extrêmes inclus).
+
+    Returns:
+        dict: 'q1', 'median', 'q3', 'mean', 'lowerfence', 'upperfence' et
+            'aberrants' (ndarray), None si aucune valeur.
+    """
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    valeurs = np.sort(valeurs[np.isfinite(valeurs)])
+    if len(valeurs) == 0:
+        return None
+    q1, mediane, q3 = np.percentile(valeurs, [25, 50, 75])
+    ecart = q3 - q1
+    dedans = valeurs[(valeurs >= q1 - 1.5 * ecart) & (valeurs <= q3 + 1.5 * ecart)]
+    aberrants = valeurs[(valeurs < dedans[0]) | (valeurs > dedans[-1])]
+    if len(aberrants) > aberrants_max:
+        aberrants = aberrants[np.linspace(0, len(aberrants) - 1, aberrants_max).round().astype(np.int64)]
+    return {'q1': q1, 'median': mediane, 'q3': q3, 'mean': valeurs.mean(),
+            'lowerfence': dedans[0], 'upperfence': dedans[-1], 'aberrants': aberrants}
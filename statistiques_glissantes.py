@@ -0,0 +1,316 @@
+# --- IMPORTS DES LIBRAIRIES ---
+import numpy as np                # Pour les calculs vectorisés
+import pandas as pd               # Pour manipuler les tableaux
+
+# Fenêtres usuelles (en jours de cotation) : 2 semaines, 1, 3 et 4 mois, 1 an
+FENETRES = (10, 30, 60, 90, 252)
+
+# Statistiques disponibles, mêmes noms et mêmes conventions que pandas.rolling
+STATISTIQUES = ('std', 'mean', 'skew', 'min', 'max')
+
+
+def bornes_segments(cles):
+    """
+    Début de chaque segment d'un tableau trié par clé (un segment par ticker).
+
+    Args:
+        cles (array): Clés triées (les lignes d'une même clé sont contiguës).
+
+    Returns:
+        ndarray: Indices de début des segments, suivis de len(cles).
+    """
+    cles = np.asarray(cles)
+    if len(cles) == 0:
+        return np.array([0])
+    changements = np.flatnonzero(cles[1:] != cles[:-1]) + 1
+    return np.concatenate([[0], changements, [len(cles)]])
+
+
+def _minmax_glissant(valeurs, fenetre, reduction):
+    """
+    Min ou max sur une fenêtre glissante se terminant à chaque position
+    (algorithme de van Herk / Gil-Werman : un cumul par bloc de `fenetre`
+    valeurs dans chaque sens, puis une comparaison par position). Les NaN sont
+    ignorés ; une fenêtre entièrement NaN donne NaN.
+    """
+    n = len(valeurs)
+    nb_blocs = -(-n // fenetre)
+    blocs = np.full(nb_blocs * fenetre, np.nan)
+    blocs[:n] = valeurs
+    blocs = blocs.reshape(nb_blocs, fenetre)
+
+    # Cumul depuis le début du bloc et depuis la fin du bloc
+    prefixe = reduction.accumulate(blocs, axis=1).reshape(-1)[:n]
+    suffixe = reduction.accumulate(blocs[:, ::-1], axis=1)[:, ::-1].reshape(-1)[:n]
+
+    # La fenêtre [i - fenetre + 1, i] couvre la fin d'un bloc et le début du suivant
+    resultat = prefixe.copy()
+    resultat[fenetre - 1:] = reduction(suffixe[:n - fenetre + 1], prefixe[fenetre - 1:])
+    return resultat
+
+
+def _cumuls_welford(colonnes, ordre, sens=1):
+    """
+    Nombre de valeurs, moyenne et sommes des carrés et des cubes des écarts à
+    la moyenne (M2, M3, selon `ordre`) des valeurs de chaque bloc (colonne de
+    `colonnes`) depuis le début du bloc, ou depuis sa fin si `sens` vaut -1.
+    Les moments sont mis à jour une valeur à la fois (Welford) : les écarts sont
+    toujours pris à la moyenne courante, sans soustraction de grandes sommes.
+    Une position est traitée à la fois, pour tous les blocs ensemble ; les NaN
+    sont ignorés.
+
+    Returns:
+        list: nobs, moyenne, M2, M3 de même forme que `colonnes` (None au-delà de `ordre`).
+    """
+    presents = ~np.isnan(colonnes)
+    x = np.where(presents, colonnes, 0)
+    nobs = np.cumsum(presents[::sens], axis=0)[::sens].astype(np.float64)
+    if ordre == 0:
+        return [nobs, None, None, None]
+    # 1 / n et (n - 1) / n aux positions présentes, 0 ailleurs : une valeur absente ne change rien
+    inverse = np.divide(1, nobs, out=np.zeros_like(nobs), where=presents)
+    facteur = (nobs - 1) * inverse
+
+    moyenne = np.zeros_like(x)
+    m2 = np.zeros_like(x) if ordre >= 2 else None
+    m3 = np.zeros_like(x) if ordre >= 3 else None
+    lignes = range(len(x)) if sens > 0 else range(len(x) - 1, -1, -1)
+    p = lignes[0]
+    moyenne[p] = x[p]
+    for r in lignes[1:]:
+        delta = x[r] - moyenne[p]
+        delta_n = delta * inverse[r]
+        np.add(moyenne[p], delta_n, out=moyenne[r])
+        if ordre >= 2:
+            terme = delta * delta * facteur[r]
+            if ordre >= 3:
+                m3[r] = m3[p] + delta_n * (terme * (nobs[r] - 2) - 3 * m2[p])
+            np.add(m2[p], terme, out=m2[r])
+        p = r
+    return [nobs, moyenne, m2, m3]
+
+
+def _moments_glissants(valeurs, bornes, fenetre, ordre):
+    """
+    Nombre de valeurs, moyenne, M2 et M3 (voir `_cumuls_welford`) sur une
+    fenêtre glissante se terminant à chaque position, sans déborder sur le
+    segment précédent. Comme pour `_minmax_glissant`, la fenêtre couvre la fin
+    d'un bloc de `fenetre` valeurs et le début du suivant ; les moments des deux
+    parties sont fusionnés par les formules de Chan et al., stables quels que
+    soient les niveaux des valeurs.
+
+    Chaque segment commence au début d'un bloc, précédé d'un bloc vide : les
+    résultats d'un segment ne dépendent pas de sa place dans le tableau (un
+    ticker préparé seul donne exactement les mêmes valeurs).
+    """
+    longueurs = np.diff(bornes)
+    blocs_segment = 1 + -(-longueurs // fenetre)
+    debuts = (np.cumsum(blocs_segment) - blocs_segment + 1) * fenetre
+    positions = np.arange(len(valeurs)) + np.repeat(debuts - bornes[:-1], longueurs)
+    nb_blocs = int(blocs_segment.sum())
+    blocs = np.full(nb_blocs * fenetre, np.nan)
+    blocs[positions] = valeurs
+    # Un bloc par colonne : chaque position du bloc est une ligne contiguë
+    colonnes = np.ascontiguousarray(blocs.reshape(nb_blocs, fenetre).T)
+
+    nobs, moyenne, m2, m3 = _cumuls_welford(colonnes, ordre)
+    suffixe = _cumuls_welford(colonnes, ordre, sens=-1)
+
+    # Fenêtre finissant en ligne r du bloc b : début du bloc b (préfixe, déjà
+    # calculé) et lignes r + 1 à la fin du bloc b - 1 (suffixe). Le premier bloc
+    # et les fenêtres qui finissent en fin de bloc n'ont pas de seconde partie.
+    nb = nobs[:-1, 1:]
+    na = suffixe[0][1:, :-1]
+    total = na + nb
+    if ordre:
+        moyenne_a, moyenne_b = suffixe[1][1:, :-1], moyenne[:-1, 1:]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = moyenne_b - moyenne_a
+            part_a = na / total
+            if ordre >= 3:
+                m2_a, m2_b = suffixe[2][1:, :-1], m2[:-1, 1:]
+                m3[:-1, 1:] += suffixe[3][1:, :-1] + delta * (delta * delta * part_a * nb * (na - nb)
+                                                               + 3 * (na * m2_b - nb * m2_a)) / total
+            if ordre >= 2:
+                m2[:-1, 1:] += suffixe[2][1:, :-1] + delta * delta * part_a * nb
+            moyenne_b -= delta * part_a
+    nb += na
+
+    # Moments lus aux positions des valeurs (ligne position % fenetre, colonne position // fenetre)
+    indices = positions % fenetre * nb_blocs + positions // fenetre
+    return [None if moment is None else moment.reshape(-1).take(indices) for moment in (nobs, moyenne, m2, m3)]
+
+
+def _valeurs_identiques(valeurs):
+    """
+    Pour chaque position, nombre de valeurs non NaN consécutives égales à la
+    dernière valeur non NaN (comptée jusqu'à cette position incluse).
+    """
+    presentes = ~np.isnan(valeurs)
+    v = valeurs[presentes]
+    rang = np.arange(len(v))
+    debut_suite = np.maximum.accumulate(np.where(np.r_[True, v[1:] != v[:-1]], rang, 0))
+    suite = rang - debut_suite + 1
+
+    # Rang de la dernière valeur présente à chaque position (-1 avant la première)
+    dernier = np.cumsum(presentes) - 1
+    return np.where(dernier >= 0, np.r_[suite, 0][dernier], 0)
+
+
+def statistiques_glissantes(valeurs, bornes, fenetres=FENETRES, statistiques=STATISTIQUES,
+                            min_periodes=None):
+    """
+    Calcule en une passe plusieurs statistiques glissantes sur plusieurs fenêtres
+    pour un tableau découpé en segments contigus (un par ticker), sans qu'aucune
+    fenêtre ne déborde sur le segment précédent.
+
+    Chaque segment est précédé de max(fenetres) - 1 valeurs NaN : une fenêtre
+    se terminant en début de segment ne lit alors que du vide, et toutes les
+    statistiques se calculent sur le tableau d'un seul tenant, par tranches
+    contiguës. Moyenne, écart-type et asymétrie viennent de moments mis à jour
+    valeur par valeur (Welford) dans des blocs de la taille de la fenêtre, puis
+    fusionnés : ils restent exacts quand un segment mêle des niveaux de valeurs
+    très différents et ne dépendent pas des autres segments ; min et max de
+    l'algorithme de van Herk / Gil-Werman.
+
+    Conventions de pandas.rolling : les NaN sont ignorés, le résultat est NaN
+    si la fenêtre compte moins de `min_periodes` valeurs, écart-type avec ddof=1
+    et asymétrie corrigée du biais, nuls sur une fenêtre constante.
+
+    Args:
+        valeurs (array): Valeurs triées par segment puis par date.
+        bornes (array): Débuts de segments suivis de len(valeurs) (voir `bornes_segments`).
+        fenetres (list): Tailles de fenêtre en nombre de lignes.
+        statistiques (list): Statistiques parmi `STATISTIQUES`.
+        min_periodes (int): Nombre minimal de valeurs par fenêtre, la taille
+            de la fenêtre si None (comme pandas).
+
+    Returns:
+        dict: (statistique, fenêtre) -> ndarray de même longueur que `valeurs`.
+    """
+    inconnues = set(statistiques) - set(STATISTIQUES)
+    if inconnues:
+        raise ValueError(f"Statistique(s) inconnue(s) : {sorted(inconnues)}")
+
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    bornes = np.asarray(bornes)
+    longueurs = np.diff(bornes)
+    marge = max(fenetres) - 1
+
+    # Position de chaque valeur dans le tableau rembourré
+    segment = np.repeat(np.arange(len(longueurs)), longueurs)
+    positions = np.arange(len(valeurs)) + marge * (segment + 1)
+    rembourre = np.full(len(valeurs) + marge * len(longueurs), np.nan)
+    rembourre[positions] = valeurs
+
+    moments = {'std': 2, 'mean': 1, 'skew': 3}
+    ordre = max((moments[s] for s in statistiques if s in moments), default=0)
+
+    if ordre >= 2:
+        # Longueur de la suite de valeurs identiques qui se termine à chaque
+        # position : une fenêtre constante a un écart-type exactement nul
+        identiques = _valeurs_identiques(rembourre).take(positions)
+
+    resultats = {}
+    for fenetre in fenetres:
+        mini = fenetre if min_periodes is None else min_periodes
+        nobs, moyenne, somme_m2, somme_m3 = _moments_glissants(valeurs, bornes, fenetre, ordre)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if ordre >= 2:
+                m2 = np.maximum(somme_m2 / nobs, 0)
+                constante = identiques >= nobs
+
+            for statistique in statistiques:
+                if statistique == 'mean':
+                    resultat = moyenne
+                    invalide = nobs < max(mini, 1)
+                elif statistique == 'std':
+                    resultat = np.sqrt(m2 * nobs / (nobs - 1))
+                    resultat[constante] = 0
+                    invalide = nobs < max(mini, 2)
+                elif statistique == 'skew':
+                    m3 = somme_m3 / nobs
+                    resultat = np.sqrt(nobs * (nobs - 1)) / (nobs - 2) * m3 / (m2 * np.sqrt(m2))
+                    resultat[constante] = 0
+                    invalide = (nobs < max(mini, 3)) | ((m2 <= 1e-14) & ~constante)
+                else:
+                    reduction = np.fmin if statistique == 'min' else np.fmax
+                    resultat = _minmax_glissant(rembourre, fenetre, reduction).take(positions)
+                    invalide = nobs < max(mini, 1)
+
+                np.copyto(resultat, np.nan, where=invalide)
+                resultats[(statistique, fenetre)] = resultat
+
+    return resultats
+
+
+def ajouter_statistiques_glissantes(df, colonne='Rendement', fenetres=FENETRES,
+                                    statistiques=STATISTIQUES, min_periodes=None, noms=None):
+    """
+    Ajoute les statistiques glissantes d'une colonne, calculées par ticker, à un
+    DataFrame long trié par ticker puis par date.
+
+    Args:
+        df (DataFrame): Données au format long, triées par 'Ticker' puis 'Date'.
+        colonne (str): Colonne sur laquelle portent les statistiques.
+        fenetres (list): Tailles de fenêtre en nombre de lignes.
+        statistiques (list): Statistiques parmi `STATISTIQUES`.
+        min_periodes (int): Voir `statistiques_glissantes`.
+        noms (callable): (statistique, fenêtre) -> nom de colonne,
+            '<colonne>_<statistique>_<fenêtre>j' par défaut.
+
+    Returns:
+        DataFrame: Le même DataFrame, enrichi en place.
+    """
+    if noms is None:
+        noms = lambda statistique, fenetre: f"{colonne}_{statistique}_{fenetre}j"
+
+    resultats = statistiques_glissantes(df[colonne].to_numpy(dtype=np.float64),
+                                        bornes_segments(df['Ticker'].to_numpy()),
+                                        fenetres, statistiques, min_periodes)
+    for (statistique, fenetre), valeurs in resultats.items():
+        df[noms(statistique, fenetre)] = valeurs
+    return df
+
+
+# --- COMPARAISON AVEC GROUPBY().TRANSFORM(ROLLING) ---
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from sources_prix import generer_donnees_longues
+
+    parser = argparse.ArgumentParser(description="Mesure le gain par rapport à groupby().transform(rolling).")
+    parser.add_argument('--nb-tickers', type=int, default=500)
+    parser.add_argument('--nb-annees', type=int, default=20)
+    args = parser.parse_args()
+
+    df = generer_donnees_longues(args.nb_tickers, args.nb_annees)
+    df = df.sort_values(['Ticker', 'Date'], ignore_index=True)
+    df['Rendement'] = df.groupby('Ticker')['Prix'].pct_change(fill_method=None) * 100
+    print(f"📊 {len(df):,} lignes, {args.nb_tickers} tickers")
+
+    debut = time.perf_counter()
+    reference = df.groupby('Ticker')['Rendement'].transform(lambda x: x.rolling(window=30).std())
+    duree_reference = time.perf_counter() - debut
+    print(f"⏱️  groupby().transform, std 30j : {duree_reference:.2f}s")
+
+    debut = time.perf_counter()
+    resultats = statistiques_glissantes(df['Rendement'].to_numpy(), bornes_segments(df['Ticker'].to_numpy()),
+                                        fenetres=(30,), statistiques=('std',))
+    duree = time.perf_counter() - debut
+    ecart = np.nanmax(np.abs(resultats[('std', 30)] - reference.to_numpy()))
+    print(f"⏱️  noyau, std 30j : {duree:.2f}s (x{duree_reference / duree:.1f}, écart max {ecart:.1e})")
+
+    debut = time.perf_counter()
+    for fenetre in FENETRES:
+        for statistique in STATISTIQUES:
+            df.groupby('Ticker')['Rendement'].transform(lambda x: getattr(x.rolling(window=fenetre), statistique)())
+    duree_reference = time.perf_counter() - debut
+    print(f"⏱️  groupby().transform, {len(STATISTIQUES)} stats × {len(FENETRES)} fenêtres : {duree_reference:.2f}s")
+
+    debut = time.perf_counter()
+    statistiques_glissantes(df['Rendement'].to_numpy(), bornes_segments(df['Ticker'].to_numpy()))
+    duree = time.perf_counter() - debut
+    print(f"⏱️  noyau, {len(STATISTIQUES)} stats × {len(FENETRES)} fenêtres : {duree:.2f}s (x{duree_reference / duree:.1f})")
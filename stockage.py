@@ -0,0 +1,704 @@
+# --- IMPORTS DES LIBRAIRIES ---
+import os                         # Pour gérer les chemins des jeux de données
+import json                       # Pour l'axe des tickers des matrices
+import shutil                     # Pour remplacer un dossier Parquet complet
+import uuid                       # Pour nommer les fichiers ajoutés sans collision
+import numpy as np                # Pour les matrices date × ticker
+import pandas as pd               # Pour manipuler les tableaux
+import pyarrow as pa              # Pour le format colonne typé
+import pyarrow.dataset as ds      # Pour lire seulement les partitions utiles
+import pyarrow.parquet as pq      # Pour écrire les jeux partitionnés
+
+# Schéma déclaré des jeux du pipeline (seules les colonnes présentes sont
+# converties) : dates en datetime64, colonnes à faible cardinalité en
+# dictionnaire (catégories pandas), année sur 16 bits. Les autres colonnes
+# décimales restent en float64, ou passent en float32 en simple précision.
+SCHEMA = {
+    'Date': 'datetime64[ns]',
+    'Ticker': 'category',
+    'Type_actif': 'category',
+    'Secteur': 'category',
+    'Benchmark': 'category',
+    'Année': 'int16',
+}
+COLONNES_CATEGORIELLES = [col for col, type_col in SCHEMA.items() if type_col == 'category']
+
+# Schéma des colonnes de partition : Ticker reste catégoriel, Année entière
+_SCHEMA_PARTITIONS = pa.schema([('Ticker', pa.dictionary(pa.int32(), pa.string())),
+                                ('Année', pa.int16())])
+
+
+def chemin_parquet(chemin_csv):
+    """Dossier Parquet associé à un fichier CSV du pipeline (même nom, extension .parquet)."""
+    return os.path.splitext(chemin_csv)[0] + '.parquet'
+
+
+def chemin_matrices(chemin_csv):
+    """Dossier des matrices date × ticker associé à un fichier CSV du pipeline (extension .matrices)."""
+    return os.path.splitext(chemin_csv)[0] + '.matrices'
+
+
+def typer_colonnes(df, simple_precision=False):
+    """
+    Applique le schéma déclaré (`SCHEMA`) aux colonnes présentes.
+
+    Args:
+        df (DataFrame): Données au format long.
+        simple_precision (bool): Passe aussi les colonnes float64 en float32
+            (prix, rendements, volatilités : moitié moins de mémoire, environ
+            7 chiffres significatifs).
+
+    Returns:
+        DataFrame: Le même DataFrame, modifié en place.
+    """
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'])
+    for col, type_col in SCHEMA.items():
+        if col in df.columns and col != 'Date' and df[col].dtype != type_col:
+            df[col] = df[col].astype(type_col)
+    if simple_precision:
+        for col in df.columns[df.dtypes == np.float64]:
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+def rapport_memoire(avant, apres):
+    """
+    Mémoire occupée par colonne avant et après typage (chaînes comprises).
+
+    Args:
+        avant, apres (DataFrame): Même jeu de données, avant et après `typer_colonnes`.
+
+    Returns:
+        DataFrame: Par colonne (et 'Total', index compris) : types, octets avant
+            et après, et facteur de réduction.
+    """
+    octets_avant, octets_apres = avant.memory_usage(deep=True), apres.memory_usage(deep=True)
+    rapport = pd.DataFrame({'type_avant': avant.dtypes.astype(str), 'type_apres': apres.dtypes.astype(str),
+                            'octets_avant': octets_avant, 'octets_apres': octets_apres},
+                           index=octets_avant.index)
+    rapport.loc['Total', ['octets_avant', 'octets_apres']] = [octets_avant.sum(), octets_apres.sum()]
+    rapport = rapport.astype({'octets_avant': 'int64', 'octets_apres': 'int64'})
+    rapport['reduction'] = (rapport['octets_avant'] / rapport['octets_apres']).round(1)
+    return rapport
+
+
+def _partitions(partition_annee):
+    return ['Ticker', 'Année'] if partition_annee else ['Ticker']
+
+
+def _table(df, partition_annee):
+    df = df.copy()
+    if partition_annee and 'Année' not in df.columns:
+        df['Année'] = df['Date'].dt.year
+    typer_colonnes(df)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def ecrire_parquet(df, chemin, partition_annee=False):
+    """
+    Écrit un jeu de données Parquet partitionné par ticker (et éventuellement par année).
+    Le dossier est écrit à côté puis substitué à l'ancien pour ne jamais exposer
+    un jeu partiel aux lecteurs.
+
+    Args:
+        df (DataFrame): Données au format long (colonnes 'Date' et 'Ticker').
+        chemin (str): Dossier de destination.
+        partition_annee (bool): Ajoute un niveau de partition par année
+            (la colonne 'Année' est créée si elle n'existe pas).
+    """
+    tmp = chemin + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    pq.write_to_dataset(_table(df, partition_annee), root_path=tmp,
+                        partition_cols=_partitions(partition_annee))
+    shutil.rmtree(chemin, ignore_errors=True)
+    os.replace(tmp, chemin)
+
+
+def ajouter_parquet(df, chemin, partition_annee=False):
+    """
+    Ajoute des lignes à un jeu Parquet existant : chaque partition concernée
+    reçoit un nouveau fichier, les fichiers existants ne sont pas réécrits.
+
+    Args:
+        df (DataFrame): Nouvelles lignes au format long.
+        chemin (str): Dossier du jeu de données.
+        partition_annee (bool): Doit correspondre au partitionnement d'origine.
+    """
+    pq.write_to_dataset(_table(df, partition_annee), root_path=chemin,
+                        partition_cols=_partitions(partition_annee),
+                        basename_template=f"ajout-{uuid.uuid4().hex}-{{i}}.parquet",
+                        existing_data_behavior='overwrite_or_ignore')
+
+
+def lire_parquet(chemin, colonnes=None, tickers=None, annees=None, depuis=None):
+    """
+    Lit un jeu Parquet partitionné en ne chargeant que les colonnes et les
+    partitions demandées.
+
+    Args:
+        chemin (str): Dossier du jeu de données.
+        colonnes (list): Colonnes à lire, toutes si None.
+        tickers (list): Tickers à lire, tous si None.
+        annees (list): Années à lire (jeu partitionné par année), toutes si None.
+        depuis (date): Ne lit que les lignes postérieures à cette date ; les
+            fichiers dont les statistiques de 'Date' sont antérieures ne sont
+            pas ouverts (utile pour relire les seuls ajouts).
+
+    Returns:
+        DataFrame: Données typées triées par ticker puis date,
+            'Date' et 'Ticker' en tête de colonnes.
+    """
+    dataset = _dataset(chemin)
+
+    filtre = None
+    if tickers is not None:
+        filtre = ds.field('Ticker').isin([str(t) for t in tickers])
+    if annees is not None:
+        filtre_annees = ds.field('Année').isin(list(annees))
+        filtre = filtre_annees if filtre is None else filtre & filtre_annees
+    if depuis is not None:
+        filtre_dates = ds.field('Date') > pa.scalar(pd.Timestamp(depuis).to_datetime64())
+        filtre = filtre_dates if filtre is None else filtre & filtre_dates
+
+    return _ordonner(dataset.to_table(columns=colonnes, filter=filtre).to_pandas(), colonnes)
+
+
+def _ordonner(df, colonnes=None):
+    """Lignes triées par ticker puis date, colonnes demandées ou 'Date' et 'Ticker' en tête."""
+    # L'ordre des fichiers d'une partition (fichiers ajoutés) n'est pas garanti
+    cles = [c for c in ('Ticker', 'Date') if c in df.columns]
+    if cles:
+        df = df.sort_values(cles, kind='stable', ignore_index=True)
+
+    if colonnes is not None:
+        return df[colonnes]
+    tete = [c for c in ('Date', 'Ticker') if c in df.columns]
+    return df[tete + [c for c in df.columns if c not in tete]]
+
+
+def _dataset(chemin):
+    noms = _noms_partitions(chemin)
+    schema = pa.schema([champ for champ in _SCHEMA_PARTITIONS if champ.name in noms])
+    return ds.dataset(chemin, format='parquet',
+                      partitioning=ds.partitioning(schema, flavor='hive', dictionaries='infer'))
+
+
+def tickers_parquet(chemin):
+    """Tickers présents dans un jeu Parquet partitionné, lus dans les chemins (aucune donnée chargée)."""
+    tickers = set()
+    for fragment in _dataset(chemin).get_fragments():
+        tickers.add(str(ds.get_partition_keys(fragment.partition_expression)['Ticker']))
+    return sorted(tickers)
+
+
+def convertir_en_parquet(chemin_csv, taille_bloc=1_000_000):
+    """
+    Crée la version Parquet (partitionnée par ticker) d'un fichier CSV long du
+    pipeline en le lisant par blocs de `taille_bloc` lignes : la mémoire utilisée
+    ne dépend pas de la taille du fichier.
+    """
+    chemin = chemin_parquet(chemin_csv)
+    tmp = chemin + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    for bloc in pd.read_csv(chemin_csv, chunksize=taille_bloc):
+        ajouter_parquet(bloc, tmp)
+    shutil.rmtree(chemin, ignore_errors=True)
+    os.replace(tmp, chemin)
+
+
+def _ordre_fragment(fragment):
+    """Clé de tri d'un fichier : valeurs de partition, puis première date (les fichiers ajoutés viennent après)."""
+    cles = ds.get_partition_keys(fragment.partition_expression)
+    statistiques = fragment.row_groups[0].statistics.get('Date') if fragment.row_groups else None
+    premiere = pd.Timestamp(statistiques['min']) if statistiques else pd.Timestamp.min
+    return str(cles.get('Ticker', '')), cles.get('Année', 0), premiere
+
+
+def fragments_parquet(chemin, tickers=None):
+    """
+    Fichiers d'un jeu Parquet partitionné, dans l'ordre ticker, année puis
+    date, sans lire de données (seules les métadonnées des fichiers sont lues).
+
+    Args:
+        chemin (str): Dossier du jeu de données.
+        tickers (list): Tickers retenus (filtre sur les chemins), tous si None.
+
+    Returns:
+        tuple: (schéma du jeu, liste des fragments Parquet).
+    """
+    dataset = _dataset(chemin)
+    filtre = None if tickers is None else ds.field('Ticker').isin([str(t) for t in tickers])
+    return dataset.schema, sorted(dataset.get_fragments(filter=filtre), key=_ordre_fragment)
+
+
+def partitions_parquet(chemin):
+    """
+    Fichiers d'un jeu Parquet partitionné regroupés par ticker, repérés en un
+    seul parcours du dossier : `lire_partition` lit ensuite un ticker sans
+    parcourir à nouveau tout le jeu (une lecture par ticker reste en O(1)
+    quel que soit le nombre de tickers).
+
+    Args:
+        chemin (str): Dossier du jeu de données.
+
+    Returns:
+        tuple: (schéma du jeu, dictionnaire ticker -> fragments Parquet).
+    """
+    dataset = _dataset(chemin)
+    fragments = {}
+    for fragment in dataset.get_fragments():
+        ticker = str(ds.get_partition_keys(fragment.partition_expression)['Ticker'])
+        fragments.setdefault(ticker, []).append(fragment)
+    return dataset.schema, fragments
+
+
+def lire_partition(partitions, ticker, colonnes=None):
+    """
+    Lignes d'un ticker, identiques à `lire_parquet(chemin, colonnes, tickers=[ticker])`.
+
+    Args:
+        partitions (tuple): Fichiers du jeu, voir `partitions_parquet`.
+        ticker (str): Ticker à lire (aucune ligne s'il est absent).
+        colonnes (list): Colonnes à lire, toutes si None.
+
+    Returns:
+        DataFrame: Données typées triées par date.
+    """
+    schema, fragments = partitions
+    tables = [fragment.to_table(schema=schema, columns=colonnes) for fragment in fragments.get(str(ticker), [])]
+    table = pa.concat_tables(tables) if tables else schema.empty_table()
+    if colonnes is not None and not tables:
+        table = table.select(colonnes)
+    return _ordonner(table.to_pandas(), colonnes)
+
+
+def _noms_partitions(chemin):
+    """Noms des niveaux de partition, déduits du premier chemin de fichier."""
+    for racine, dossiers, _ in os.walk(chemin):
+        if not dossiers:
+            relatif = os.path.relpath(racine, chemin)
+            return [niveau.split('=')[0] for niveau in relatif.split(os.sep) if '=' in niveau]
+    return []
+
+
+def lire_donnees(chemin_csv, colonnes=None, tickers=None, depuis=None):
+    """
+    Charge un jeu du pipeline depuis sa version Parquet si elle existe,
+    sinon depuis le CSV (qui est alors typé comme le Parquet).
+
+    Args:
+        chemin_csv (str): Chemin du fichier CSV du pipeline.
+        colonnes (list): Colonnes à lire, toutes si None.
+        tickers (list): Tickers à lire, tous si None.
+        depuis (date): Ne garde que les lignes postérieures à cette date.
+
+    Returns:
+        DataFrame: Données typées.
+    """
+    chemin = chemin_parquet(chemin_csv)
+    if os.path.isdir(chemin):
+        return lire_parquet(chemin, colonnes=colonnes, tickers=tickers, depuis=depuis)
+
+    df = typer_colonnes(pd.read_csv(chemin_csv, usecols=colonnes))
+    if tickers is not None:
+        df = df[df['Ticker'].isin(tickers)].reset_index(drop=True)
+    if depuis is not None:
+        df = df[df['Date'] > pd.Timestamp(depuis)].reset_index(drop=True)
+    return df
+
+
+# --- MATRICES DATE × TICKER (NUMPY, LECTURE EN MÉMOIRE PARTAGÉE) ---
+def ecrire_matrices(dossier, dates, tickers, matrices, ordre='C'):
+    """
+    Écrit des matrices date × ticker partageant le même axe des dates : un fichier
+    .npy par champ, plus les axes ('dates.npy', 'tickers.json'). Chaque champ se
+    relit seul, en mémoire mappée, sans charger les autres.
+
+    Args:
+        dossier (str): Dossier de destination (remplacé en bloc).
+        dates (DatetimeIndex): Axe des dates, trié.
+        tickers (list): Axe des tickers.
+        matrices (dict): Nom du champ -> tableau numpy (len(dates), len(tickers)).
+        ordre (str): 'C' pour qu'une date (une ligne) soit contiguë sur le disque,
+            'F' pour qu'un ticker (une colonne) le soit.
+    """
+    tmp = dossier + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, 'dates.npy'), np.asarray(dates, dtype='datetime64[ns]'))
+    with open(os.path.join(tmp, 'tickers.json'), 'w', encoding='utf-8') as f:
+        json.dump([str(t) for t in tickers], f)
+    for champ, matrice in matrices.items():
+        # Ordre C : une ligne (une date) est contiguë, une plage de dates aussi
+        # Ordre F : l'historique d'un ticker est contigu
+        contigue = np.ascontiguousarray(matrice) if ordre == 'C' else np.asfortranarray(matrice)
+        np.save(os.path.join(tmp, f'{champ}.npy'), contigue)
+    shutil.rmtree(dossier, ignore_errors=True)
+    os.replace(tmp, dossier)
+
+
+def ecrire_matrices_par_colonnes(dossier, dates, tickers, types, colonnes):
+    """
+    Écrit des matrices date × ticker (ordre F) colonne par colonne, sans jamais
+    les charger entières : les fichiers .npy sont créés sur disque puis remplis
+    en mémoire mappée, un ticker à la fois.
+
+    Args:
+        dossier (str): Dossier de destination (remplacé en bloc).
+        dates (DatetimeIndex): Axe des dates, trié.
+        tickers (list): Axe des tickers.
+        types (dict): Champ -> dtype numpy.
+        colonnes (iterable): Couples (ticker, DataFrame indexé par Date
+            contenant les champs), dans n'importe quel ordre.
+    """
+    tmp = dossier + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, 'dates.npy'), np.asarray(dates, dtype='datetime64[ns]'))
+    with open(os.path.join(tmp, 'tickers.json'), 'w', encoding='utf-8') as f:
+        json.dump([str(t) for t in tickers], f)
+
+    matrices = {}
+    for champ, dtype in types.items():
+        matrices[champ] = np.lib.format.open_memmap(os.path.join(tmp, f'{champ}.npy'), mode='w+',
+                                                    dtype=dtype, shape=(len(dates), len(tickers)),
+                                                    fortran_order=True)
+        matrices[champ][:] = np.nan
+
+    position = {str(t): j for j, t in enumerate(tickers)}
+    for ticker, df in colonnes:
+        lignes = dates.get_indexer(df.index)
+        for champ, matrice in matrices.items():
+            matrice[lignes, position[str(ticker)]] = df[champ].to_numpy()
+
+    for matrice in matrices.values():
+        matrice.flush()
+    del matrices
+    shutil.rmtree(dossier, ignore_errors=True)
+    os.replace(tmp, dossier)
+
+
+def ouvrir_matrices(dossier, champs=None):
+    """
+    Ouvre les matrices d'un dossier écrit par `ecrire_matrices` en mémoire mappée
+    (lecture seule, chargées à la demande par le système).
+
+    Args:
+        dossier (str): Dossier des matrices.
+        champs (list): Champs à ouvrir, tous si None.
+
+    Returns:
+        tuple: (DatetimeIndex des dates, liste des tickers, dict champ -> tableau).
+    """
+    dates = pd.DatetimeIndex(np.load(os.path.join(dossier, 'dates.npy')), name='Date')
+    with open(os.path.join(dossier, 'tickers.json'), encoding='utf-8') as f:
+        tickers = json.load(f)
+    if champs is None:
+        champs = [os.path.splitext(nom)[0] for nom in sorted(os.listdir(dossier))
+                  if nom.endswith('.npy') and nom != 'dates.npy']
+    matrices = {champ: np.load(os.path.join(dossier, f'{champ}.npy'), mmap_mode='r')
+                for champ in champs}
+    return dates, tickers, matrices
+
+
+# --- JEU LONG EN COLONNES (NUMPY, PARTAGÉ ENTRE SESSIONS ET PROCESSUS) ---
+def chemin_colonnes(chemin_csv):
+    """Dossier des colonnes en mémoire mappée associé à un fichier CSV du pipeline (extension .colonnes)."""
+    return os.path.splitext(chemin_csv)[0] + '.colonnes'
+
+
+def _type_codes(categories):
+    """Type des codes que pandas choisit pour ces catégories : les codes lus n'ont pas à être convertis."""
+    return pd.Categorical([], categories=categories).codes.dtype
+
+
+def ecrire_colonnes_par_morceaux(dossier, lignes, types, categories, morceaux):
+    """
+    Écrit un jeu long colonne par colonne, un morceau de lignes à la fois : un
+    fichier .npy par colonne (dates en datetime64, colonnes catégorielles en
+    codes), créé sur disque puis rempli en mémoire mappée, et 'colonnes.json'
+    (ordre, types et catégories des colonnes).
+
+    Args:
+        dossier (str): Dossier de destination (remplacé en bloc).
+        lignes (int): Nombre total de lignes.
+        types (dict): Colonne -> dtype numpy, ou 'category'.
+        categories (dict): Colonne catégorielle -> liste des catégories.
+        morceaux (iterable): DataFrames successifs, dans l'ordre des lignes.
+    """
+    tmp = dossier + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    description = {'lignes': int(lignes), 'colonnes': []}
+    fichiers = {}
+    for colonne, type_col in types.items():
+        categorielle = str(type_col) == 'category'
+        dtype = _type_codes(categories[colonne]) if categorielle else np.dtype(type_col)
+        fichiers[colonne] = np.lib.format.open_memmap(os.path.join(tmp, f'{colonne}.npy'), mode='w+',
+                                                      dtype=dtype, shape=(lignes,))
+        description['colonnes'].append({'nom': colonne, 'type': 'category' if categorielle else dtype.str,
+                                        **({'categories': list(categories[colonne])} if categorielle else {})})
+
+    position = 0
+    for df in morceaux:
+        fin = position + len(df)
+        for colonne, fichier in fichiers.items():
+            if str(types[colonne]) == 'category':
+                fichier[position:fin] = pd.Categorical(df[colonne], categories=categories[colonne]).codes
+            else:
+                fichier[position:fin] = df[colonne].to_numpy(dtype=fichier.dtype)
+        position = fin
+    if position != lignes:
+        raise ValueError(f"{position} ligne(s) écrite(s) pour {lignes} annoncée(s).")
+
+    for fichier in fichiers.values():
+        fichier.flush()
+    del fichiers
+    with open(os.path.join(tmp, 'colonnes.json'), 'w', encoding='utf-8') as f:
+        json.dump(description, f, ensure_ascii=False)
+    shutil.rmtree(dossier, ignore_errors=True)
+    os.replace(tmp, dossier)
+
+
+def ecrire_colonnes(dossier, df):
+    """
+    Écrit un jeu long en colonnes (voir `ecrire_colonnes_par_morceaux`), trié
+    par (Ticker, Date). Les colonnes de texte sont écrites comme catégorielles.
+    """
+    df = df.sort_values(['Ticker', 'Date'], kind='stable')
+    types, categories = {}, {}
+    for colonne, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) or dtype == object or pd.api.types.is_string_dtype(dtype):
+            types[colonne] = 'category'
+            categories[colonne] = [str(c) for c in df[colonne].astype('category').cat.categories]
+        else:
+            types[colonne] = dtype
+    ecrire_colonnes_par_morceaux(dossier, len(df), types, categories, [df])
+
+
+def ouvrir_colonnes(dossier, colonnes=None):
+    """
+    Ouvre un jeu écrit par `ecrire_colonnes` sans copie : chaque colonne est une
+    vue en lecture seule sur son fichier en mémoire mappée. Les pages lues sont
+    celles du cache du système, partagées par toutes les sessions d'un processus
+    et par tous les processus qui ouvrent le même dossier.
+
+    Args:
+        dossier (str): Dossier des colonnes.
+        colonnes (list): Colonnes à ouvrir (dans cet ordre), toutes si None.
+
+    Returns:
+        DataFrame: Colonnes typées (dates, catégories), index RangeIndex.
+    """
+    with open(os.path.join(dossier, 'colonnes.json'), encoding='utf-8') as f:
+        description = json.load(f)
+    # Un fichier vide ne peut pas être mappé
+    mode = 'r' if description['lignes'] else None
+
+    series = {}
+    for colonne in description['colonnes']:
+        nom = colonne['nom']
+        if colonnes is not None and nom not in colonnes:
+            continue
+        valeurs = np.load(os.path.join(dossier, f'{nom}.npy'), mmap_mode=mode)
+        if colonne['type'] == 'category':
+            valeurs = pd.Categorical.from_codes(valeurs, dtype=pd.CategoricalDtype(colonne['categories']),
+                                                validate=False)
+        series[nom] = pd.Series(valeurs, name=nom, copy=False)
+
+    ordre = list(series) if colonnes is None else colonnes
+    return pd.DataFrame({nom: series[nom] for nom in ordre}, copy=False)
+
+
+def ouvrir_donnees(chemin_csv, colonnes=None):
+    """
+    Jeu du pipeline en lecture seule, partagé sans copie s'il a été écrit en
+    colonnes (voir `ouvrir_colonnes`), sinon chargé par `lire_donnees`.
+    """
+    chemin = chemin_colonnes(chemin_csv)
+    if os.path.isdir(chemin):
+        return ouvrir_colonnes(chemin, colonnes)
+    return lire_donnees(chemin_csv, colonnes=colonnes)
+
+
+def version_donnees(chemin_csv):
+    """
+    Version d'un jeu du pipeline, sans le lire : date de modification et taille
+    du CSV et des descriptions des versions colonnes et matrices (réécrites à
+    chaque préparation ou mise à jour du jeu), et inode du dossier Parquet
+    (remplacé par un nouveau dossier à chaque réécriture).
+
+    Returns:
+        str: Change dès que le pipeline réécrit le jeu.
+    """
+    fichiers = [chemin_csv, chemin_parquet(chemin_csv),
+                os.path.join(chemin_colonnes(chemin_csv), 'colonnes.json'),
+                os.path.join(chemin_matrices(chemin_csv), 'tickers.json'),
+                os.path.join(chemin_matrices(chemin_csv), 'dates.npy')]
+    etats = []
+    for fichier in fichiers:
+        try:
+            etat = os.stat(fichier)
+        except FileNotFoundError:
+            continue
+        etats.append(f'{etat.st_ino:x}-{etat.st_mtime_ns:x}-{etat.st_size:x}')
+    return '.'.join(etats)
+
+
+# --- BARRES OHLCV COMPACTES ---
+# Prix en float32 (NaN = pas de cotation), volume en int64 (0 = pas de cotation)
+TYPES_OHLCV = {'Open': np.float32, 'High': np.float32, 'Low': np.float32,
+               'Close': np.float32, 'Volume': np.int64}
+
+
+def ecrire_ohlcv(dossier, barres):
+    """
+    Stocke les barres OHLCV au format compact : une matrice date × ticker par champ,
+    float32 pour les prix, int64 pour le volume, axe des dates commun.
+
+    Args:
+        dossier (str): Dossier de destination.
+        barres (dict): Champ -> DataFrame large (index Date, une colonne par ticker).
+    """
+    champs = [c for c in TYPES_OHLCV if c in barres]
+    dates = barres[champs[0]].index
+    for champ in champs[1:]:
+        dates = dates.union(barres[champ].index)
+    tickers = list(barres[champs[0]].columns)
+
+    matrices = {}
+    for champ in champs:
+        large = barres[champ].reindex(index=dates, columns=tickers)
+        if champ == 'Volume':
+            large = large.fillna(0)
+        matrices[champ] = large.to_numpy(dtype=TYPES_OHLCV[champ])
+    ecrire_matrices(dossier, dates, tickers, matrices)
+
+
+def lire_ohlcv(dossier, champs=('Close',), tickers=None, format='large'):
+    """
+    Relit seulement les champs OHLCV demandés.
+
+    Args:
+        dossier (str): Dossier écrit par `ecrire_ohlcv`.
+        champs (list): Champs à lire parmi Open/High/Low/Close/Volume.
+        tickers (list): Tickers à lire, tous si None.
+        format (str): 'large' (dict champ -> DataFrame date × ticker) ou
+            'long' (un DataFrame Date/Ticker/<champs>).
+
+    Returns:
+        dict ou DataFrame: Selon `format`.
+    """
+    dates, axe_tickers, matrices = ouvrir_matrices(dossier, list(champs))
+    tickers = axe_tickers if tickers is None else [t for t in tickers if t in axe_tickers]
+    colonnes = [axe_tickers.index(t) for t in tickers]
+
+    larges = {champ: pd.DataFrame(matrices[champ][:, colonnes], index=dates, columns=tickers)
+              for champ in champs}
+    if format == 'large':
+        return larges
+
+    long = pd.DataFrame({'Date': np.tile(dates.values, len(tickers)),
+                         'Ticker': pd.Categorical(np.repeat(tickers, len(dates)), categories=tickers)})
+    for champ in champs:
+        # Ordre ticker puis date, comme les fichiers longs du pipeline
+        long[champ] = matrices[champ][:, colonnes].T.reshape(-1)
+    return long
+
+
+def _etendre_npy(chemin, lignes):
+    """
+    Ajoute des lignes à la fin d'un fichier .npy en ordre C sans réécrire les
+    lignes existantes : les données sont écrites en fin de fichier, puis la
+    forme est mise à jour dans l'en-tête (rempli d'espaces par numpy). Tant que
+    l'en-tête n'est pas réécrit, le fichier se relit dans son état précédent.
+
+    Returns:
+        bool: False (fichier inchangé) si la nouvelle forme ne tient pas dans
+            l'en-tête existant ou si le fichier n'est pas en ordre C.
+    """
+    with open(chemin, 'r+b') as fichier:
+        version = np.lib.format.read_magic(fichier)
+        lire_entete = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        forme, fortran, dtype = lire_entete(fichier)
+        debut_donnees = fichier.tell()
+        if fortran or tuple(lignes.shape[1:]) != tuple(forme[1:]):
+            return False
+
+        forme = (forme[0] + len(lignes),) + tuple(forme[1:])
+        entete = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': forme})
+        # Magie (6 octets), version (2) et longueur de l'en-tête (2 en version 1.0, 4 au-delà)
+        prefixe = 10 if version == (1, 0) else 12
+        place = debut_donnees - prefixe - 1
+        if len(entete) > place:
+            return False
+
+        fichier.seek(0, os.SEEK_END)
+        fichier.write(np.ascontiguousarray(lignes, dtype=dtype).tobytes())
+        fichier.flush()
+        fichier.seek(prefixe)
+        fichier.write((entete.ljust(place) + '\n').encode('latin1'))
+    return True
+
+
+def ajouter_ohlcv(dossier, barres):
+    """
+    Intègre de nouvelles barres au stockage existant, ou le crée s'il n'existe pas.
+
+    Les barres des dates postérieures à la dernière date stockée sont ajoutées
+    en fin de fichiers (voir `_etendre_npy`) et celles des dates déjà stockées
+    complètent les cellules vides en place : une mise à jour ne coûte que ses
+    nouvelles lignes. Les valeurs déjà stockées sont conservées. Les nouveaux
+    tickers et les dates intercalées dans l'historique imposent une réécriture
+    complète.
+
+    Args:
+        dossier (str): Dossier écrit par `ecrire_ohlcv`.
+        barres (dict): Champ -> DataFrame large des nouvelles barres.
+    """
+    champs = [c for c in TYPES_OHLCV if c in barres]
+    if not os.path.isdir(dossier) or not all(os.path.exists(os.path.join(dossier, f'{c}.npy')) for c in champs):
+        return ecrire_ohlcv(dossier, barres)
+
+    dates, tickers, _ = ouvrir_matrices(dossier, [])
+    nouvelles_dates = barres[champs[0]].index
+    for champ in champs[1:]:
+        nouvelles_dates = nouvelles_dates.union(barres[champ].index)
+    connues = nouvelles_dates.isin(dates)
+    suite = nouvelles_dates[~connues]
+    nouveaux_tickers = [t for champ in champs for t in barres[champ].columns if str(t) not in tickers]
+
+    if nouveaux_tickers or (len(dates) and len(suite) and suite.min() <= dates[-1]):
+        existant = lire_ohlcv(dossier, champs=champs)
+        barres = {champ: large.combine_first(barres[champ]) for champ, large in existant.items()}
+        return ecrire_ohlcv(dossier, barres)
+
+    # Dates déjà stockées : seules les cellules vides sont complétées, en place
+    lignes = dates.get_indexer(nouvelles_dates[connues])
+    if len(lignes):
+        for champ in champs:
+            matrice = np.load(os.path.join(dossier, f'{champ}.npy'), mmap_mode='r+')
+            bloc = np.ix_(lignes, range(len(tickers)))
+            ajout = barres[champ].reindex(index=nouvelles_dates[connues], columns=tickers).to_numpy()
+            vide = matrice[bloc] == 0 if champ == 'Volume' else np.isnan(matrice[bloc])
+            matrice[bloc] = np.where(vide & ~np.isnan(ajout), ajout, matrice[bloc])
+            matrice.flush()
+            del matrice
+
+    # Nouvelles dates : lignes ajoutées en fin de fichiers, l'axe des dates en dernier
+    if len(suite):
+        blocs = {}
+        for champ in champs:
+            large = barres[champ].reindex(index=suite, columns=tickers)
+            if champ == 'Volume':
+                large = large.fillna(0)
+            blocs[champ] = large.to_numpy(dtype=TYPES_OHLCV[champ])
+        fichiers = [(os.path.join(dossier, f'{champ}.npy'), bloc) for champ, bloc in blocs.items()]
+        fichiers.append((os.path.join(dossier, 'dates.npy'), np.asarray(suite, dtype='datetime64[ns]')))
+        for chemin, bloc in fichiers:
+            if not _etendre_npy(chemin, bloc):
+                existant = lire_ohlcv(dossier, champs=champs)
+                return ecrire_ohlcv(dossier, {champ: large.combine_first(barres[champ])
+                                              for champ, large in existant.items()})
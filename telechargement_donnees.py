@@ -1,48 +1,207 @@
 
 
 # --- IMPORTS DES LIBRAIRIES ---
-import yfinance as yf             # Pour télécharger les données financières
 import pandas as pd               # Pour manipuler les tableaux
 import os                         # Pour créer le dossier de sauvegarde
+import time                       # Pour mesurer la durée de chaque téléchargement
+import argparse                   # Pour choisir le mode complet ou incrémental
+from concurrent.futures import ThreadPoolExecutor   # Pour paralléliser les appels réseau
+
+from stockage import lire_donnees, ecrire_parquet, ajouter_parquet, chemin_parquet
+from stockage import ecrire_ohlcv, ajouter_ohlcv
+from sources_prix import (SourceYahoo, SourceFichier, SourceSynthetique, CHAMPS_OHLCV,
+                          tickers_synthetiques, generer_donnees_longues)
+
+# --- TÉLÉCHARGEMENT D'UN SEUL TICKER ---
+def _telecharger_ticker(source, ticker, start_date, end_date):
+    """
+    Télécharge les barres OHLCV d'un ticker et mesure la durée de l'appel.
+    Les erreurs sont capturées pour ne pas interrompre le reste du lot.
+
+    Args:
+        source (SourcePrix): Source de prix à interroger.
+        ticker (str): Symbole boursier.
+        start_date (str): Date de début au format 'YYYY-MM-DD'.
+        end_date (str): Date de fin au format 'YYYY-MM-DD'.
+
+    Returns:
+        tuple: (ticker, barres OHLCV ou None, durée en secondes, message d'erreur ou None).
+    """
+    debut = time.perf_counter()
+    try:
+        data = source.telecharger(ticker, start_date, end_date)
+        duree = time.perf_counter() - debut
+
+        if 'Close' not in data.columns or data['Close'].dropna().empty:
+            return ticker, None, duree, "aucune donnée 'Close' valide"
+
+        return ticker, data, duree, None
+    except Exception as e:
+        return ticker, None, time.perf_counter() - debut, str(e)
 
 # --- FONCTION PRINCIPALE DE TÉLÉCHARGEMENT ---
-def telecharger_donnees_massives(tickers, start_date='2000-01-01', end_date='2024-12-31'):
+def telecharger_donnees_massives(tickers, start_date='2000-01-01', end_date='2024-12-31',
+                                 taille_lot=50, max_workers=8, source=None, ohlcv=False):
     """
-    Télécharge les cours de clôture pour une liste de tickers depuis Yahoo Finance.
-    Combine toutes les séries de prix dans un seul DataFrame.
+    Télécharge les cours pour une liste de tickers (Yahoo Finance par défaut).
+    Les tickers sont traités par lots sur un pool de threads borné ; les barres
+    sont collectées dans une liste puis assemblées en une seule fois.
 
     Args:
         tickers (list): Liste des symboles boursiers.
         start_date (str): Date de début au format 'YYYY-MM-DD'.
         end_date (str): Date de fin au format 'YYYY-MM-DD'.
+        taille_lot (int): Nombre de tickers soumis au pool à chaque lot.
+        max_workers (int): Nombre maximal de téléchargements simultanés.
+        source (SourcePrix): Source des prix, `SourceYahoo()` si None.
+        ohlcv (bool): Renvoie tous les champs Open/High/Low/Close/Volume.
 
     Returns:
-        DataFrame: Données de prix de clôture pour chaque ticker (format large).
+        DataFrame: Données de prix de clôture pour chaque ticker (format large),
+            ou si `ohlcv` un dict champ -> DataFrame large (mêmes dates et tickers).
+            Le rapport par ticker (liste de dictionnaires Ticker/Durée_s/Erreur)
+            est disponible dans `attrs['rapport_telechargement']` de chaque DataFrame.
     """
-    all_data = pd.DataFrame()
-    successful_tickers = []
+    source = SourceYahoo() if source is None else source
+    barres = {}
+    rapport = []
 
     print(f"Téléchargement de {len(tickers)} tickers entre {start_date} et {end_date}...\n")
+    debut_total = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i in range(0, len(tickers), taille_lot):
+            lot = tickers[i:i + taille_lot]
+            # map conserve l'ordre des tickers dans le lot
+            resultats = executor.map(lambda t: _telecharger_ticker(source, t, start_date, end_date), lot)
+
+            for ticker, data, duree, erreur in resultats:
+                rapport.append({'Ticker': ticker, 'Durée_s': round(duree, 3), 'Erreur': erreur})
+                if erreur is None:
+                    barres[ticker] = data.reindex(columns=CHAMPS_OHLCV)
+                    print(f"  ▶️ {ticker} ({duree:.2f}s)")
+                else:
+                    print(f"    ❌ Erreur pour {ticker} : {erreur} ({duree:.2f}s)")
+
+    # Un seul assemblage à la fin au lieu d'un pd.concat par ticker
+    # (colonnes à deux niveaux : ticker puis champ)
+    if barres:
+        all_data = pd.concat(barres, axis=1).sort_index()
+        all_data.index.name = 'Date'
+        champs = {champ: all_data.xs(champ, axis=1, level=1) for champ in CHAMPS_OHLCV}
+    else:
+        # Aucune barre (jour sans cotation, source indisponible) : tables vides par champ
+        champs = {champ: pd.DataFrame(index=pd.DatetimeIndex([], name='Date')) for champ in CHAMPS_OHLCV}
 
+    rapport = pd.DataFrame(rapport, columns=['Ticker', 'Durée_s', 'Erreur'])
+    echecs = rapport[rapport['Erreur'].notna()]
+    print(f"\n⏱️ {len(rapport) - len(echecs)} réussis, {len(echecs)} échecs "
+          f"en {time.perf_counter() - debut_total:.1f}s")
+    if not echecs.empty:
+        print("  - Échecs : " + ", ".join(echecs['Ticker']))
+
+    # Stocké sous forme de liste : pandas compare les attrs lors des concat/melt
+    for large in champs.values():
+        large.attrs['rapport_telechargement'] = rapport.to_dict('records')
+    return champs if ohlcv else champs['Close']
+
+# --- PASSAGE AU FORMAT LONG ---
+def format_long(donnees_wide):
+    """
+    Transforme un DataFrame large (une colonne par ticker) en format long Date/Ticker/Prix.
+
+    Args:
+        donnees_wide (DataFrame): Prix indexés par date, une colonne par ticker.
+
+    Returns:
+        DataFrame: Colonnes 'Date', 'Ticker', 'Prix'.
+    """
+    return pd.melt(
+        donnees_wide.reset_index(),
+        id_vars=['Date'],
+        var_name='Ticker',
+        value_name='Prix'
+    )
+
+# --- MISE À JOUR INCRÉMENTALE DU FICHIER DE PRIX ---
+def mettre_a_jour_donnees(tickers, output_path, start_date='2000-01-01', end_date=None,
+                          dossier_ohlcv=None, **kwargs):
+    """
+    Complète le fichier long existant avec les seules dates manquantes.
+    Le jeu Parquet associé, s'il existe, et le stockage OHLCV sont complétés de la même façon.
+    Pour chaque ticker déjà stocké, seule la fin de l'historique (après la dernière
+    date enregistrée) est téléchargée ; les nouveaux tickers sont téléchargés
+    depuis `start_date`. Les lignes sont ajoutées en fin de fichier, sans
+    recopier l'historique ; un ajout interrompu est annulé en ramenant le
+    fichier à sa taille d'origine.
+
+    Args:
+        tickers (list): Liste des symboles boursiers.
+        output_path (str): Chemin du fichier CSV long (Date, Ticker, Prix).
+        start_date (str): Date de début pour les tickers absents du fichier.
+        end_date (str): Date de fin (exclue), par défaut demain.
+        dossier_ohlcv (str): Stockage OHLCV compact à compléter, ignoré si None.
+        **kwargs: Options transmises à `telecharger_donnees_massives`.
+
+    Returns:
+        DataFrame: Lignes ajoutées au fichier (format long).
+    """
+    if end_date is None:
+        end_date = (pd.Timestamp.today().normalize() + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+    existant = lire_donnees(output_path, colonnes=['Date', 'Ticker'])
+    existant['Ticker'] = existant['Ticker'].astype(str)
+    derniere_date = existant.groupby('Ticker')['Date'].max()
+
+    # Regroupement des tickers par date de reprise pour limiter le nombre d'appels
+    debuts = {}
     for ticker in tickers:
-        try:
-            print(f"  ▶️ {ticker}")
-            data = yf.download(ticker, start=start_date, end=end_date)
+        if ticker in derniere_date.index:
+            debut = (derniere_date[ticker] + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        else:
+            debut = start_date
+        if debut < end_date:
+            debuts.setdefault(debut, []).append(ticker)
+
+    nouveaux = [t for t in tickers if t not in derniere_date.index]
+    print(f"🔄 Mise à jour de {len(tickers) - len(nouveaux)} tickers existants "
+          f"et {len(nouveaux)} nouveaux tickers...")
+
+    morceaux = [telecharger_donnees_massives(groupe, start_date=debut, end_date=end_date,
+                                             ohlcv=True, **kwargs)
+                for debut, groupe in debuts.items()]
+    morceaux = [m for m in morceaux if not m['Close'].empty]
+    if not morceaux:
+        print("✅ Aucune nouvelle donnée.")
+        return pd.DataFrame(columns=['Date', 'Ticker', 'Prix'])
+
+    barres = {champ: pd.concat([m[champ] for m in morceaux], axis=1).sort_index()
+              for champ in CHAMPS_OHLCV}
+    nouvelles_lignes = format_long(barres['Close'])
 
-            if 'Close' in data.columns and not data['Close'].empty:
-                prices = data['Close']
-                prices.name = ticker
-                all_data = pd.concat([all_data, prices], axis=1)
-                successful_tickers.append(ticker)
-            else:
-                print(f"    ⚠️ Aucune donnée 'Close' valide pour {ticker}.")
-        except Exception as e:
-            print(f"    ❌ Erreur pour {ticker} : {e}")
+    # On ne garde que les lignes postérieures au dernier enregistrement de chaque ticker
+    seuil = nouvelles_lignes['Ticker'].map(derniere_date)
+    nouvelles_lignes = nouvelles_lignes[seuil.isna() | (nouvelles_lignes['Date'] > seuil)]
 
-    if not all_data.empty:
-        all_data.columns = successful_tickers
+    # Ajout en place, sans recopier l'historique ; si l'ajout échoue, le fichier
+    # est ramené à sa taille d'origine (aucune ligne partielle ne reste)
+    taille_origine = os.path.getsize(output_path)
+    try:
+        with open(output_path, 'a', encoding='utf-8', newline='') as fichier:
+            nouvelles_lignes.to_csv(fichier, header=False, index=False)
+    except BaseException:
+        os.truncate(output_path, taille_origine)
+        raise
 
-    return all_data
+    # Le jeu Parquet reçoit un nouveau fichier par partition, sans réécriture
+    if os.path.isdir(chemin_parquet(output_path)):
+        ajouter_parquet(nouvelles_lignes, chemin_parquet(output_path))
+
+    if dossier_ohlcv is not None:
+        ajouter_ohlcv(dossier_ohlcv, barres)
+
+    print(f"✅ {len(nouvelles_lignes)} lignes ajoutées à {output_path}")
+    return nouvelles_lignes
 
 # --- EXÉCUTION PRINCIPALE DU SCRIPT ---
 if __name__ == "__main__":
@@ -59,15 +218,67 @@ if __name__ == "__main__":
         'ABBV', 'TMO', 'DHR', 'AVGO', 'TXN', 'CSCO', 'CMCSA', 'VZ', 'TMUS'
     ]
 
+    parser = argparse.ArgumentParser(description="Téléchargement des cours de clôture")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne télécharge que les dates manquantes du fichier existant")
+    parser.add_argument('--source', choices=['yahoo', 'fichier', 'synthetique'], default='yahoo',
+                        help="Origine des prix (fichier et synthetique fonctionnent hors ligne)")
+    parser.add_argument('--fixture', help="Fichier long Date/Ticker/Prix pour --source fichier")
+    parser.add_argument('--nb-tickers', type=int,
+                        help="Taille de l'univers synthétique (par défaut la liste ci-dessus)")
+    parser.add_argument('--nb-annees', type=int,
+                        help="Génère directement un jeu synthétique long de cette durée")
+    parser.add_argument('--seed', type=int, default=0, help="Graine de la source synthétique")
+    parser.add_argument('--sortie', default='donnees_financieres_300k_lignes.csv',
+                        help="Nom du fichier écrit dans le dossier Data")
+    args = parser.parse_args()
+    if args.source == 'fichier' and not args.fixture:
+        parser.error("--source fichier demande un fichier long avec --fixture")
+
+    if args.source == 'fichier':
+        source = SourceFichier(args.fixture)
+    elif args.source == 'synthetique':
+        source = SourceSynthetique(seed=args.seed)
+        if args.nb_tickers:
+            extended_tickers = tickers_synthetiques(args.nb_tickers)
+    else:
+        source = SourceYahoo()
+
     start_date_data = '2000-01-01'
     end_date_data = '2024-12-31'
 
+    output_dir = 'Data'
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, args.sortie)
+    # Barres complètes (Open/High/Low/Close/Volume) au format compact
+    dossier_ohlcv = os.path.join(output_dir, 'ohlcv')
+
+    # --- MODE SYNTHÉTIQUE DIRECT : JEU DE TEST À GRANDE ÉCHELLE ---
+    if args.source == 'synthetique' and args.nb_annees:
+        donnees_financieres_long = generer_donnees_longues(len(extended_tickers), args.nb_annees,
+                                                           start_date_data, seed=args.seed)
+        donnees_financieres_long.to_csv(output_path, index=False)
+        ecrire_parquet(donnees_financieres_long, chemin_parquet(output_path))
+        print(f"💾 {len(donnees_financieres_long)} lignes synthétiques sauvegardées dans : {output_path}")
+        raise SystemExit(0)
+
+    # --- MODE INCRÉMENTAL : ON COMPLÈTE LE FICHIER EXISTANT ---
+    if args.incremental and os.path.exists(output_path):
+        print("📥 Début de la mise à jour incrémentale...")
+        mettre_a_jour_donnees(extended_tickers, output_path, start_date=start_date_data,
+                              dossier_ohlcv=dossier_ohlcv, source=source)
+        raise SystemExit(0)
+
     print("📥 Début du téléchargement...")
-    donnees_financieres_wide = telecharger_donnees_massives(
+    barres = telecharger_donnees_massives(
         extended_tickers,
         start_date=start_date_data,
-        end_date=end_date_data
+        end_date=end_date_data,
+        source=source,
+        ohlcv=True
     )
+    donnees_financieres_wide = barres['Close']
+    ecrire_ohlcv(dossier_ohlcv, barres)
 
     print("\n✅ Données téléchargées.")
     print(f"  - Nombre de dates : {len(donnees_financieres_wide)}")
@@ -76,25 +287,16 @@ if __name__ == "__main__":
 
     # --- TRANSFORMATION AU FORMAT LONG ---
     print("\n🔁 Transformation en format long...")
-    donnees_financieres_wide = donnees_financieres_wide.reset_index()
-    donnees_financieres_long = pd.melt(
-        donnees_financieres_wide,
-        id_vars=['Date'],
-        var_name='Ticker',
-        value_name='Prix'
-    )
-
+    donnees_financieres_long = format_long(donnees_financieres_wide)
 
     print(f"  - Lignes après nettoyage : {len(donnees_financieres_long)}")
     print("  - Aperçu :")
     print(donnees_financieres_long.head())
 
     # --- ENREGISTREMENT DANS LE DOSSIER 'data/' ---
-    output_dir = 'Data'
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, 'donnees_financieres_300k_lignes.csv')
-
     donnees_financieres_long.to_csv(output_path, index=False)
+    # Version Parquet typée, partitionnée par ticker, lue en priorité par le pipeline
+    ecrire_parquet(donnees_financieres_long, chemin_parquet(output_path))
 
-    print(f"\n💾 Fichier sauvegardé dans : {output_path}")
+    print(f"\n💾 Fichier sauvegardé dans : {output_path} (+ {chemin_parquet(output_path)})")
     print("🎉 Données prêtes à être utilisées dans le notebook ou Streamlit.")
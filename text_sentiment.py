@@ -1,6 +1,8 @@
+import os
 import pandas as pd
 import re
 import joblib
+from functools import lru_cache
 import matplotlib.pyplot as plt
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
@@ -11,7 +13,17 @@ from unidecode import unidecode
 import nltk
 from nltk.corpus import stopwords
 
-nltk.download('stopwords')
+from amorcage_modele import FICHIERS_MODELE
+
+@lru_cache(maxsize=1)
+def mots_vides() -> frozenset:
+
+    #CORPUS NLTK TELECHARGE AU PREMIER BESOIN SEULEMENT (ET NON A L'IMPORT DU MODULE)
+    try:
+        return frozenset(stopwords.words('french'))
+    except LookupError:
+        nltk.download('stopwords', quiet=True)
+        return frozenset(stopwords.words('french'))
 
 def text_cleaner(texte:str) -> str:
 
@@ -23,7 +35,7 @@ def text_cleaner(texte:str) -> str:
     texte = re.sub(r'[^\w\s]', ' ', texte)
     texte = re.sub(r'\d+', '', texte)
 
-    stop_words = set(stopwords.words('french'))
+    stop_words = mots_vides()
     mots_suppr = ['a', 'h', 'he']
 
     tokens = texte.split()
@@ -47,10 +59,9 @@ def generer_wordcloud(texte_nettoye:str) -> plt.Figure:
 
     return plt.gcf()
 
-if __name__ == "__main__":
+def entrainer(chemin_csv:str="sentiment_training.csv", dossier:str=".") -> str:
 
-    CSV_PATH = "sentiment_training.csv"
-    df = pd.read_csv(CSV_PATH)
+    df = pd.read_csv(chemin_csv)
 
     texte_col = df.columns[0]
     df["clean_text"] = df[texte_col].apply(text_cleaner)
@@ -70,7 +81,16 @@ if __name__ == "__main__":
     y_pred = model.predict(X_test)
     classification_report_text = classification_report(y_test, y_pred)
 
-    joblib.dump(model, "sentiment_model.joblib")
-    joblib.dump(vectorizer, "tfidf_vectorizer.joblib")
-    joblib.dump(classification_report_text, "classification_report.joblib")
+    #CHAQUE FICHIER EST ECRIT A COTE PUIS RENOMME : UN LECTEUR NE VOIT JAMAIS UN FICHIER PARTIEL,
+    #LE RAPPORT (DERNIER FICHIER) N'APPARAIT QUE QUAND LE MODELE ET LE VECTORIZER SONT EN PLACE
+    for objet, nom in zip((model, vectorizer, classification_report_text), FICHIERS_MODELE):
+        chemin = os.path.join(dossier, nom)
+        joblib.dump(objet, chemin + ".tmp")
+        os.replace(chemin + ".tmp", chemin)
+
+    return classification_report_text
+
+if __name__ == "__main__":
+
+    entrainer()
     print("\n Modèle et vectorizer sauvegardés.")
\ No newline at end of file
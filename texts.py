@@ -1,6 +1,6 @@
 text_1 = """Les données pour chaque actif proviennent de **l'api de Yahoo Finance**, 
-puis un dataframe regroupant toutes les données à été constitué en utilisant successivement
-la fonction pandas : **pd.concat([],axis=1)**"""
+téléchargées en parallèle par lots, puis un dataframe regroupant toutes les données à été constitué
+en une seule fois avec la fonction pandas : **pd.concat([],axis=1)**"""
 
 text_2 = """Chaque actif possède une **date d'introduction en bourse différente**, par conséquent, 
 sur la période du 01-01-2000 au 31-12-2024, certains actifs n'étaient pas encore côtés en bourse générant 
@@ -0,0 +1,128 @@
+# --- IMPORTS DES LIBRAIRIES ---
+import numpy as np                # Pour les calculs d'indices
+import pandas as pd               # Pour manipuler les tableaux
+
+from statistiques_glissantes import bornes_segments
+
+# Colonnes constantes pour un ticker, lues une fois par ticker
+COLONNES_ATTRIBUTS = ['Type_actif', 'Secteur', 'Benchmark']
+# Nombre minimal de lignes d'une période d'analyse dans app.py
+LIGNES_PERIODE_MIN = 20
+
+
+class TrameIndexee:
+    """
+    Format long trié par (Ticker, Date), accompagné d'un index
+    ticker -> (début, fin) des lignes du ticker.
+
+    Les lignes d'un actif se lisent par une tranche de positions (et une
+    période par deux recherches dichotomiques dans cette tranche) au lieu d'une
+    comparaison sur toute la colonne 'Ticker'. Les attributs constants par
+    actif (type, secteur, benchmark) sont regroupés dans une petite table.
+    """
+
+    def __init__(self, df):
+        df = self._trier(df)
+        self.df = df
+        self._dates = df['Date'].to_numpy()
+
+        tickers = df['Ticker'].astype(str).to_numpy()
+        bornes = bornes_segments(tickers)
+        self.index = {tickers[debut]: (debut, fin) for debut, fin in zip(bornes[:-1], bornes[1:])}
+
+        colonnes = ['Ticker'] + [col for col in COLONNES_ATTRIBUTS if col in df.columns]
+        self.attributs = df[colonnes].iloc[bornes[:-1]].astype({'Ticker': str}).set_index('Ticker')
+
+    @staticmethod
+    def _trier(df):
+        """Trie par (Ticker, Date), sauf si chaque ticker occupe déjà un bloc de lignes par dates croissantes."""
+        codes, uniques = pd.factorize(df['Ticker'])
+        dates = df['Date'].to_numpy()
+        meme_ticker = codes[1:] == codes[:-1]
+        if len(bornes_segments(codes)) - 1 == len(uniques) and (dates[1:] > dates[:-1])[meme_ticker].all():
+            # Sans copie si l'index est déjà 0..n-1 (colonnes en mémoire mappée, voir `stockage.ouvrir_colonnes`)
+            return df if df.index.equals(pd.RangeIndex(len(df))) else df.reset_index(drop=True)
+        return df.sort_values(['Ticker', 'Date']).reset_index(drop=True)
+
+    @property
+    def tickers(self):
+        return list(self.index)
+
+    def __contains__(self, ticker):
+        return str(ticker) in self.index
+
+    def plage(self, ticker, debut=None, fin=None):
+        """Tranche de positions des lignes d'un ticker sur [debut, fin] (bornes incluses, comme .loc)."""
+        i, j = self.index[str(ticker)]
+        dates = self._dates[i:j]
+        if debut is not None:
+            i, j = i + dates.searchsorted(np.datetime64(pd.Timestamp(debut)), side='left'), j
+            dates = self._dates[i:j]
+        if fin is not None:
+            j = i + dates.searchsorted(np.datetime64(pd.Timestamp(fin)), side='right')
+        return slice(i, j)
+
+    def lignes(self, ticker, debut=None, fin=None):
+        """Lignes d'un ticker (toutes les colonnes) sur une période."""
+        return self.df.iloc[self.plage(ticker, debut, fin)]
+
+    def serie(self, ticker, champs, debut=None, fin=None):
+        """
+        Historique d'un ticker sur une période, même forme que `MatriceLarge.serie`.
+
+        Args:
+            ticker (str): Ticker.
+            champs (list or str): Colonne(s) à lire.
+            debut, fin (date): Bornes incluses de la période, tout l'historique si None.
+
+        Returns:
+            DataFrame: Index Date, une colonne par champ.
+        """
+        champs = [champs] if isinstance(champs, str) else list(champs)
+        lignes = self.plage(ticker, debut, fin)
+        return pd.DataFrame({champ: self.df[champ].to_numpy()[lignes] for champ in champs},
+                            index=pd.DatetimeIndex(self._dates[lignes], name='Date'))
+
+    def plusieurs(self, tickers, colonnes=None):
+        """Lignes de plusieurs tickers, concaténées par tranches (sans filtre sur toute la colonne)."""
+        bornes = [self.index[str(t)] for t in tickers if str(t) in self.index]
+        positions = np.concatenate([np.arange(i, j) for i, j in bornes]) if bornes else np.array([], dtype=int)
+        df = self.df if colonnes is None else self.df[colonnes]
+        return df.take(positions)
+
+
+def metadonnees_tickers(df, lignes_min=LIGNES_PERIODE_MIN):
+    """
+    Table d'une ligne par ticker avec ce qu'il faut à app.py pour proposer une
+    période d'analyse, sans relire l'historique à chaque affichage.
+
+    Args:
+        df (DataFrame or TrameIndexee): Format long avec 'Date', 'Ticker', 'Prix'
+            (et les attributs de `COLONNES_ATTRIBUTS`).
+        lignes_min (int): Nombre minimal de lignes d'une période.
+
+    Returns:
+        DataFrame: Index Ticker ; colonnes premiere_date (veille du premier prix
+            différent du premier prix, les prix initiaux étant complétés par
+            bfill ; première date si le prix ne change jamais), derniere_date,
+            lignes, derniere_date_debut (date de début la plus tardive qui
+            laisse `lignes_min` lignes) et les attributs de l'actif.
+    """
+    trame = df if isinstance(df, TrameIndexee) else TrameIndexee(df)
+    debuts, fins = (np.array([bornes[k] for bornes in trame.index.values()], dtype=np.int64) for k in (0, 1))
+    dates = trame._dates
+    prix = trame.df['Prix'].to_numpy()
+
+    # Premier prix différent du premier prix de chaque segment (fins si aucun)
+    differents = np.flatnonzero(prix != np.repeat(prix[debuts], fins - debuts))
+    premier_different = np.append(differents, len(prix))[differents.searchsorted(debuts)]
+    change = premier_different < fins
+    premieres = np.where(change, dates[np.minimum(premier_different, len(prix) - 1)] - np.timedelta64(1, 'D'),
+                         dates[debuts])
+
+    metadonnees = pd.DataFrame({'premiere_date': premieres,
+                                'derniere_date': dates[fins - 1],
+                                'lignes': fins - debuts,
+                                'derniere_date_debut': dates[np.maximum(fins - lignes_min, debuts)]},
+                               index=pd.Index(trame.tickers, name='Ticker'))
+    return metadonnees.join(trame.attributs)
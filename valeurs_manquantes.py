@@ -0,0 +1,231 @@
+# --- IMPORTS DES LIBRAIRIES ---
+import numpy as np                # Pour les calculs vectorisés
+import pandas as pd               # Pour manipuler les tableaux
+
+from statistiques_glissantes import bornes_segments
+
+# Bornes inférieures des classes de longueur des trous (en lignes, soit en jours
+# calendaires dans le fichier brut) : week-ends, jours fériés et ponts,
+# interruptions de cotation, historique absent (avant introduction ou après retrait)
+CLASSES_TROUS = (1, 3, 8, 31)
+
+
+def _noms_classes(classes=CLASSES_TROUS):
+    """Noms des colonnes de l'histogramme des trous : 'trous_1_2j', ..., 'trous_31j_plus'."""
+    noms = [f"trous_{debut}_{fin - 1}j" for debut, fin in zip(classes, classes[1:])]
+    return noms + [f"trous_{classes[-1]}j_plus"]
+
+
+def profil_valeurs_manquantes(df, colonne='Prix', classes_trous=CLASSES_TROUS):
+    """
+    Profil des valeurs manquantes de chaque ticker, calculé en une passe
+    vectorisée (un tri, puis des réductions par segment) au lieu d'un groupby
+    avec des fonctions Python par groupe.
+
+    Un trou est une suite de lignes consécutives (par date) sans valeur.
+
+    Args:
+        df (DataFrame): Format long avec 'Date', 'Ticker' et `colonne`.
+        colonne (str): Colonne dont on profile les valeurs manquantes.
+        classes_trous (list): Bornes inférieures des classes de longueur des trous.
+
+    Returns:
+        DataFrame: Une ligne par ticker (index 'Ticker', trié) avec
+            - total_manquants, total_observations, pourcentage_manquants
+              (mêmes définitions que l'ancienne agrégation par groupby) ;
+            - premiere_date_valide, derniere_date_valide (NaT si aucune valeur) ;
+            - derniere_date : dernière date présente, valeur ou non ;
+            - plus_long_trou, trou_initial, trou_final (en lignes) ;
+            - une colonne par classe de longueur des trous (nombre de trous).
+    """
+    codes, tickers = pd.factorize(df['Ticker'].astype(str), sort=True)
+    dates = df['Date'].to_numpy(dtype='datetime64[ns]')
+    manquant = df[colonne].isna().to_numpy()
+
+    # Un segment de lignes contiguës par ticker, dans l'ordre des dates. Le tri
+    # est sauté si les lignes y sont déjà (cas du fichier téléchargé).
+    bornes = bornes_segments(codes)
+    if len(bornes) - 1 != len(tickers) or not (dates[1:] > dates[:-1])[codes[1:] == codes[:-1]].all():
+        ordre = np.lexsort((dates, codes))
+        codes, dates, manquant = codes[ordre], dates[ordre], manquant[ordre]
+        bornes = bornes_segments(codes)
+    debuts, fins = bornes[:-1], bornes[1:]
+    n = len(manquant)
+
+    # Trous : un trou commence sur une ligne manquante dont la précédente est
+    # présente ou appartient à un autre ticker (et finit symétriquement)
+    debut_segment = np.zeros(n, bool)
+    debut_segment[debuts] = True
+    fin_segment = np.zeros(n, bool)
+    fin_segment[fins - 1] = True
+    precedent = np.r_[False, manquant[:-1]] & ~debut_segment
+    suivant = np.r_[manquant[1:], False] & ~fin_segment
+    debuts_trous = np.flatnonzero(manquant & ~precedent)
+    longueurs = np.flatnonzero(manquant & ~suivant) - debuts_trous + 1
+    segments_trous = codes[debuts_trous]
+
+    nb_tickers = len(tickers)
+    plus_long = np.zeros(nb_tickers, np.int64)
+    np.maximum.at(plus_long, segments_trous, longueurs)
+    classes = np.searchsorted(np.asarray(classes_trous), longueurs, side='right') - 1
+    histogramme = np.bincount(segments_trous * len(classes_trous) + classes,
+                              minlength=nb_tickers * len(classes_trous)).reshape(nb_tickers, len(classes_trous))
+
+    # Réductions par segment (indices croissants), remises dans l'ordre des tickers
+    rang = np.argsort(codes[debuts])
+    total_manquants = np.add.reduceat(manquant.astype(np.int64), debuts)[rang]
+    # Première et dernière valeur présente : positions extrêmes des lignes valides du segment
+    positions = np.arange(n)
+    premiere = np.minimum.reduceat(np.where(manquant, n, positions), debuts)[rang]
+    derniere = np.maximum.reduceat(np.where(manquant, -1, positions), debuts)[rang]
+    debuts, fins = debuts[rang], fins[rang]
+    lignes = fins - debuts
+    sans_valeur = premiere >= fins
+
+    # Trous en début et en fin d'historique (tout l'historique si aucune valeur)
+    trou_initial = np.where(sans_valeur, lignes, premiere - debuts)
+    trou_final = np.where(sans_valeur, lignes, fins - 1 - derniere)
+
+    profil = pd.DataFrame({
+        'total_manquants': total_manquants,
+        'total_observations': (lignes - total_manquants).astype(np.int64),
+        'pourcentage_manquants': np.round(total_manquants / lignes * 100, 2),
+        'premiere_date_valide': np.where(sans_valeur, np.datetime64('NaT'), dates[np.minimum(premiere, n - 1)]),
+        'derniere_date_valide': np.where(sans_valeur, np.datetime64('NaT'), dates[np.maximum(derniere, 0)]),
+        'derniere_date': dates[fins - 1],
+        'plus_long_trou': plus_long,
+        'trou_initial': trou_initial.astype(np.int64),
+        'trou_final': trou_final.astype(np.int64),
+    }, index=pd.Index(tickers, name='Ticker'))
+    for nom, compte in zip(_noms_classes(classes_trous), histogramme.T):
+        profil[nom] = compte
+    return profil
+
+
+def fusionner_profils(ancien, nouveau, classes_trous=CLASSES_TROUS):
+    """
+    Profil de l'historique complet à partir du profil déjà enregistré et de
+    celui des seules lignes postérieures à sa `derniere_date` (mode incrémental).
+    Un trou à cheval sur les deux périodes est recompté comme un seul trou.
+
+    Returns:
+        DataFrame: Profil fusionné, tickers des deux profils.
+    """
+    communs = ancien.index.intersection(nouveau.index)
+    a, b = ancien.loc[communs], nouveau.loc[communs]
+    fusion = a.copy()
+
+    for col in ['total_manquants', 'total_observations', *_noms_classes(classes_trous)]:
+        fusion[col] = a[col] + b[col]
+    fusion['pourcentage_manquants'] = (fusion['total_manquants'] /
+                                       (fusion['total_manquants'] + fusion['total_observations']) * 100).round(2)
+    fusion['premiere_date_valide'] = a['premiere_date_valide'].fillna(b['premiere_date_valide'])
+    fusion['derniere_date_valide'] = b['derniere_date_valide'].fillna(a['derniere_date_valide'])
+    fusion['derniere_date'] = b['derniere_date']
+
+    # Trou final de l'ancien profil prolongé par le trou initial du nouveau
+    ancien_sans_valeur = a['premiere_date_valide'].isna()
+    nouveau_sans_valeur = b['premiere_date_valide'].isna()
+    raccord = a['trou_final'] + b['trou_initial']
+    fusion['trou_initial'] = a['trou_initial'].where(~ancien_sans_valeur, raccord)
+    fusion['trou_final'] = b['trou_final'].where(~nouveau_sans_valeur, raccord)
+
+    noms = np.array(_noms_classes(classes_trous))
+    bornes = np.asarray(classes_trous)
+    a_raccorder = (a['trou_final'] > 0) & (b['trou_initial'] > 0)
+    for ticker in communs[a_raccorder.to_numpy()]:
+        for longueur, signe in [(a.at[ticker, 'trou_final'], -1), (b.at[ticker, 'trou_initial'], -1),
+                                (raccord[ticker], 1)]:
+            fusion.at[ticker, noms[np.searchsorted(bornes, longueur, side='right') - 1]] += signe
+    fusion['plus_long_trou'] = np.maximum.reduce([a['plus_long_trou'], b['plus_long_trou'],
+                                                  raccord.where(a_raccorder, 0)])
+
+    return pd.concat([ancien.drop(communs), fusion, nouveau.drop(communs)]).sort_index()
+
+
+def remplir_segments(valeurs, bornes, arriere=True):
+    """
+    Remplissage des NaN segment par segment (un segment par ticker) sans
+    groupby : report de la dernière valeur connue du segment (ffill), puis, là
+    où `arriere` est vrai, de la première valeur connue vers le début (bfill).
+
+    Args:
+        valeurs (array): Valeurs triées par segment.
+        bornes (array): Débuts des segments suivis de len(valeurs), voir `bornes_segments`.
+        arriere (bool or array): bfill partout, nulle part, ou ligne par ligne.
+
+    Returns:
+        ndarray: Copie remplie de `valeurs` (NaN si le segment n'a aucune valeur).
+    """
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    n = len(valeurs)
+    positions = np.arange(n)
+    longueurs = np.diff(bornes)
+    presente = ~np.isnan(valeurs)
+
+    # Dernière (première) position valide jusqu'à (depuis) chaque ligne, limitée au segment
+    avant = np.maximum.accumulate(np.where(presente, positions, -1)) if n else positions
+    rempli = np.where(avant >= np.repeat(bornes[:-1], longueurs), valeurs[np.maximum(avant, 0)], np.nan)
+    if np.any(arriere):
+        apres = np.minimum.accumulate(np.where(presente, positions, n)[::-1])[::-1]
+        en_tete = np.isnan(rempli) & arriere & (apres < np.repeat(bornes[1:], longueurs))
+        rempli[en_tete] = valeurs[apres[en_tete]]
+    return rempli
+
+
+# --- CARTE DES VALEURS MANQUANTES ---
+
+def comptes_mensuels(df, colonne='Prix'):
+    """
+    Nombre de lignes et de valeurs présentes par ticker et par mois : une
+    version réduite de la matrice date × ticker des valeurs manquantes, dont
+    les comptes s'additionnent (tickers préparés séparément, lignes ajoutées).
+
+    Returns:
+        DataFrame: Index (Ticker, Mois), colonnes 'lignes' et 'valeurs'.
+    """
+    mois = df['Date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    comptes = df[colonne].groupby([df['Ticker'].astype(str).to_numpy(), mois]).agg(['size', 'count'])
+    return comptes.set_axis(['lignes', 'valeurs'], axis=1).rename_axis(['Ticker', 'Mois'])
+
+
+def fusionner_comptes(*comptes):
+    """Additionne des comptes mensuels (voir `comptes_mensuels`)."""
+    return pd.concat(comptes).groupby(level=['Ticker', 'Mois']).sum().sort_index()
+
+
+def carte_valeurs_manquantes(comptes, hauteur=100, largeur=300):
+    """
+    Carte date × ticker de la fraction de valeurs manquantes, réduite à au plus
+    `hauteur` × `largeur` blocs : sa taille, et donc son coût d'affichage, ne
+    dépend pas de la taille du jeu de données.
+
+    Une date sans ligne pour un ticker compte comme manquante : un mois compte
+    autant de cellules par ticker que de dates dans le fichier (le maximum des
+    lignes du mois sur l'ensemble des tickers).
+
+    Args:
+        comptes (DataFrame): Comptes mensuels, voir `comptes_mensuels`.
+        hauteur (int): Nombre maximal de blocs de tickers (lignes de la carte).
+        largeur (int): Nombre maximal de blocs de mois (colonnes de la carte).
+
+    Returns:
+        DataFrame: Fraction manquante (entre 0 et 1) par bloc ; index : premier
+            ticker du bloc, colonnes : premier mois du bloc.
+    """
+    valeurs = comptes['valeurs'].unstack('Mois', fill_value=0)
+    mois = pd.period_range(valeurs.columns.min(), valeurs.columns.max(), freq='M').to_timestamp()
+    valeurs = valeurs.reindex(columns=mois, fill_value=0).to_numpy(np.int64)
+    cellules = comptes['lignes'].groupby(level='Mois').max().reindex(mois, fill_value=0).to_numpy(np.int64)
+    tickers = comptes.index.unique('Ticker')
+
+    # Bornes des blocs : découpage régulier des deux axes
+    lignes = np.unique(np.linspace(0, len(tickers), min(hauteur, len(tickers)) + 1).astype(int))
+    colonnes = np.unique(np.linspace(0, len(mois), min(largeur, len(mois)) + 1).astype(int))
+
+    presentes = np.add.reduceat(np.add.reduceat(valeurs, lignes[:-1], axis=0), colonnes[:-1], axis=1)
+    total = np.outer(np.diff(lignes), np.add.reduceat(cellules, colonnes[:-1]))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = 1 - presentes / total
+    return pd.DataFrame(fraction, index=pd.Index(tickers[lignes[:-1]], name='Ticker'),
+                        columns=pd.DatetimeIndex(mois[colonnes[:-1]], name='Mois'))